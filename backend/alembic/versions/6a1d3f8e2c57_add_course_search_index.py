@@ -0,0 +1,49 @@
+"""Add full-text and trigram search indexes for courses
+
+Revision ID: 6a1d3f8e2c57
+Revises: 5f7c9b2a1d44
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "6a1d3f8e2c57"
+down_revision: Union[str, None] = "5f7c9b2a1d44"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Search indexes are PostgreSQL-only; other dialects use the in-process index
+    # in app/services/search_service.py.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column("courses", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+    op.execute(
+        "UPDATE courses SET search_vector = "
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+    )
+    op.create_index("ix_courses_search_vector", "courses", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_courses_title_trgm",
+        "courses",
+        ["title"],
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.drop_index("ix_courses_title_trgm", table_name="courses")
+    op.drop_index("ix_courses_search_vector", table_name="courses")
+    op.drop_column("courses", "search_vector")
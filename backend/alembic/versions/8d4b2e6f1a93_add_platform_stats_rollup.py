@@ -0,0 +1,55 @@
+"""Add platform stats rollup table
+
+Revision ID: 8d4b2e6f1a93
+Revises: 6a1d3f8e2c57
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "8d4b2e6f1a93"
+down_revision: Union[str, None] = "6a1d3f8e2c57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "platform_stats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("total_users", sa.Integer(), nullable=False),
+        sa.Column("total_students", sa.Integer(), nullable=False),
+        sa.Column("total_teachers", sa.Integer(), nullable=False),
+        sa.Column("total_courses", sa.Integer(), nullable=False),
+        sa.Column("published_courses", sa.Integer(), nullable=False),
+        sa.Column("total_enrollments", sa.Integer(), nullable=False),
+        sa.Column("total_revenue", sa.Float(), nullable=False),
+        sa.Column("reconciled_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Seed the single rollup row from the existing data
+    op.execute(
+        """
+        INSERT INTO platform_stats (
+            id, total_users, total_students, total_teachers, total_courses,
+            published_courses, total_enrollments, total_revenue, reconciled_at
+        )
+        SELECT
+            1,
+            (SELECT COUNT(*) FROM users),
+            (SELECT COUNT(*) FROM users WHERE role = 'student'),
+            (SELECT COUNT(*) FROM users WHERE role = 'teacher'),
+            (SELECT COUNT(*) FROM courses),
+            (SELECT COUNT(*) FROM courses WHERE status = 'published'),
+            (SELECT COUNT(*) FROM enrollments),
+            (SELECT COALESCE(SUM(amount), 0) FROM payments WHERE status = 'completed'),
+            CURRENT_TIMESTAMP
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("platform_stats")
@@ -0,0 +1,47 @@
+"""Add denormalized rating, lesson and revenue counters to courses
+
+Revision ID: a5c8e2f4b7d1
+Revises: e3b6d1a8f4c2
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a5c8e2f4b7d1"
+down_revision: Union[str, None] = "e3b6d1a8f4c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("courses", sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("courses", sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("courses", sa.Column("lesson_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("courses", sa.Column("revenue", sa.Float(), nullable=False, server_default="0"))
+
+    # Backfill from the source tables (same totals as course_stats_service.reconcile)
+    op.execute(
+        """
+        UPDATE courses SET
+            total_students = (SELECT COUNT(*) FROM enrollments WHERE enrollments.course_id = courses.id),
+            rating_sum = COALESCE((SELECT SUM(rating) FROM reviews WHERE reviews.course_id = courses.id), 0),
+            rating_count = (SELECT COUNT(*) FROM reviews WHERE reviews.course_id = courses.id),
+            lesson_count = (SELECT COUNT(*) FROM lessons WHERE lessons.course_id = courses.id),
+            revenue = COALESCE((SELECT SUM(amount) FROM payments
+                                WHERE payments.course_id = courses.id AND payments.status = 'completed'), 0)
+        """
+    )
+    op.execute(
+        "UPDATE courses SET avg_rating = CASE WHEN rating_count > 0"
+        " THEN ROUND(rating_sum * 1.0 / rating_count, 2) ELSE 0 END"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("courses", "revenue")
+    op.drop_column("courses", "lesson_count")
+    op.drop_column("courses", "rating_count")
+    op.drop_column("courses", "rating_sum")
@@ -0,0 +1,29 @@
+"""Add autograder queue columns to lesson submissions
+
+Revision ID: b2f7c1d9e4a6
+Revises: 8d4b2e6f1a93
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b2f7c1d9e4a6"
+down_revision: Union[str, None] = "8d4b2e6f1a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("lesson_submissions", sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("lesson_submissions", sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True))
+    # Workers poll for the oldest queued row
+    op.create_index("ix_lesson_submissions_status_id", "lesson_submissions", ["status", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lesson_submissions_status_id", table_name="lesson_submissions")
+    op.drop_column("lesson_submissions", "locked_at")
+    op.drop_column("lesson_submissions", "attempts")
@@ -0,0 +1,60 @@
+"""Replace enrollments.completed with a completed_lessons counter; one progress row per lesson
+
+Revision ID: b9e4c7a2d6f3
+Revises: a5c8e2f4b7d1
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b9e4c7a2d6f3"
+down_revision: Union[str, None] = "a5c8e2f4b7d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep one progress row per (enrollment, lesson), preferring a completed one
+    op.execute(
+        """
+        DELETE FROM progress WHERE EXISTS (
+            SELECT 1 FROM progress other
+            WHERE other.enrollment_id = progress.enrollment_id AND other.lesson_id = progress.lesson_id
+              AND (COALESCE(other.completed, false) > COALESCE(progress.completed, false)
+                   OR (COALESCE(other.completed, false) = COALESCE(progress.completed, false) AND other.id < progress.id))
+        )
+        """
+    )
+    op.drop_index("ix_progress_enrollment_lesson", table_name="progress")
+    op.create_unique_constraint("uq_progress_enrollment_lesson", "progress", ["enrollment_id", "lesson_id"])
+
+    op.add_column("enrollments", sa.Column("completed_lessons", sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        """
+        UPDATE enrollments SET completed_lessons = (
+            SELECT COUNT(*) FROM progress
+            WHERE progress.enrollment_id = enrollments.id AND progress.completed = true
+        )
+        """
+    )
+    # Completion is now completed_lessons >= courses.lesson_count
+    op.drop_column("enrollments", "completed")
+
+
+def downgrade() -> None:
+    op.add_column("enrollments", sa.Column("completed", sa.Boolean(), nullable=True))
+    op.execute(
+        """
+        UPDATE enrollments SET completed = (
+            SELECT courses.lesson_count > 0 AND enrollments.completed_lessons >= courses.lesson_count
+            FROM courses WHERE courses.id = enrollments.course_id
+        )
+        """
+    )
+    op.drop_column("enrollments", "completed_lessons")
+
+    op.drop_constraint("uq_progress_enrollment_lesson", "progress", type_="unique")
+    op.create_index("ix_progress_enrollment_lesson", "progress", ["enrollment_id", "lesson_id"], unique=False)
@@ -0,0 +1,24 @@
+"""Add progress.position_seconds for video watch position
+
+Revision ID: c2f7a9d4e1b6
+Revises: b9e4c7a2d6f3
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c2f7a9d4e1b6"
+down_revision: Union[str, None] = "b9e4c7a2d6f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("progress", sa.Column("position_seconds", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("progress", "position_seconds")
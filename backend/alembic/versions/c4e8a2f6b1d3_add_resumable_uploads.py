@@ -0,0 +1,42 @@
+"""Add resumable upload sessions
+
+Revision ID: c4e8a2f6b1d3
+Revises: b2f7c1d9e4a6
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c4e8a2f6b1d3"
+down_revision: Union[str, None] = "b2f7c1d9e4a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "resumable_uploads",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("object_name", sa.String(length=255), nullable=False),
+        sa.Column("content_type", sa.String(length=255), nullable=False),
+        sa.Column("total_size", sa.BigInteger(), nullable=False),
+        sa.Column("chunk_size", sa.Integer(), nullable=False),
+        sa.Column("received_bytes", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_resumable_uploads_user_id", "resumable_uploads", ["user_id"], unique=False)
+    # Garbage collection scans for sessions idle since before a cutoff
+    op.create_index("ix_resumable_uploads_updated_at", "resumable_uploads", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_resumable_uploads_updated_at", table_name="resumable_uploads")
+    op.drop_index("ix_resumable_uploads_user_id", table_name="resumable_uploads")
+    op.drop_table("resumable_uploads")
@@ -0,0 +1,44 @@
+"""Add HLS video packaging jobs and lessons.hls_manifest_url
+
+Revision ID: d7a3f9c2e5b8
+Revises: c4e8a2f6b1d3
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d7a3f9c2e5b8"
+down_revision: Union[str, None] = "c4e8a2f6b1d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "video_packages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("source_object", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="queued"),
+        sa.Column("manifest_object", sa.String(length=255), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("source_object"),
+    )
+    op.create_index("ix_video_packages_id", "video_packages", ["id"], unique=False)
+    # Workers poll for the oldest queued job
+    op.create_index("ix_video_packages_status_id", "video_packages", ["status", "id"], unique=False)
+    op.add_column("lessons", sa.Column("hls_manifest_url", sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("lessons", "hls_manifest_url")
+    op.drop_index("ix_video_packages_status_id", table_name="video_packages")
+    op.drop_index("ix_video_packages_id", table_name="video_packages")
+    op.drop_table("video_packages")
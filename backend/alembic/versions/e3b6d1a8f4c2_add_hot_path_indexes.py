@@ -0,0 +1,72 @@
+"""Add composite indexes for hot filter paths and per-user uniqueness constraints
+
+Revision ID: e3b6d1a8f4c2
+Revises: d7a3f9c2e5b8
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e3b6d1a8f4c2"
+down_revision: Union[str, None] = "d7a3f9c2e5b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_enrollments_course_enrolled_at", "enrollments", ["course_id", "enrolled_at"]),
+    ("ix_progress_enrollment_lesson", "progress", ["enrollment_id", "lesson_id"]),
+    ("ix_reviews_course_created_at", "reviews", ["course_id", "created_at"]),
+    ("ix_payments_user_course_status", "payments", ["user_id", "course_id", "status"]),
+    ("ix_lessons_course_order", "lessons", ["course_id", "order_index"]),
+    ("ix_courses_status_created_at", "courses", ["status", "created_at", "id"]),
+    ("ix_courses_teacher_created_at", "courses", ["teacher_id", "created_at"]),
+]
+
+# (constraint name, table); one row per user and course
+UNIQUE_CONSTRAINTS = [
+    ("uq_enrollments_user_course", "enrollments"),
+    ("uq_reviews_user_course", "reviews"),
+    ("uq_certificates_user_course", "certificates"),
+]
+
+
+def _remove_duplicates():
+    """Keep the oldest row per (user_id, course_id) so the unique constraints can be created."""
+    # Progress rows of duplicate enrollments move to the enrollment that is kept
+    op.execute(
+        """
+        UPDATE progress SET enrollment_id = (
+            SELECT MIN(keep.id) FROM enrollments dup
+            JOIN enrollments keep ON keep.user_id = dup.user_id AND keep.course_id = dup.course_id
+            WHERE dup.id = progress.enrollment_id
+        )
+        WHERE enrollment_id NOT IN (SELECT MIN(id) FROM enrollments GROUP BY user_id, course_id)
+        """
+    )
+    for _, table in UNIQUE_CONSTRAINTS:
+        op.execute(f"DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY user_id, course_id)")
+    # Counters that were incremented once per duplicate row
+    op.execute("UPDATE courses SET total_students = (SELECT COUNT(*) FROM enrollments WHERE enrollments.course_id = courses.id)")
+    op.execute(
+        "UPDATE courses SET avg_rating = COALESCE("
+        "(SELECT ROUND(CAST(AVG(rating) AS numeric), 2) FROM reviews WHERE reviews.course_id = courses.id), 0)"
+    )
+
+
+def upgrade() -> None:
+    _remove_duplicates()
+    for name, table in UNIQUE_CONSTRAINTS:
+        op.create_unique_constraint(name, table, ["user_id", "course_id"])
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    for name, table in reversed(UNIQUE_CONSTRAINTS):
+        op.drop_constraint(name, table, type_="unique")
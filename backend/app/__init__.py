@@ -0,0 +1,5 @@
+import time
+
+# Taken on first import of the package, before FastAPI, models and routers load;
+# app.main reports startup time relative to it.
+BOOT_STARTED = time.perf_counter()
@@ -8,6 +8,31 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
 
+    # Database connection pool
+    DB_POOL_SIZE: int = 10  # persistent connections per process
+    DB_MAX_OVERFLOW: int = 10  # extra connections opened under bursts, closed when returned
+    DB_POOL_TIMEOUT_SECONDS: float = 10  # wait for a free connection before failing the request
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # reopen older connections (-1 disables)
+    DB_POOL_PRE_PING: bool = True  # test connections on checkout, drops ones killed by a failover
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # server-side cap per statement; 0 disables
+    DB_PGBOUNCER_MODE: bool = False  # no local pool (NullPool) when PgBouncer does the pooling
+
+    # Read replicas (routes on get_read_db / get_async_read_db)
+    DATABASE_REPLICA_URLS: str = ""  # comma-separated; empty sends every read to DATABASE_URL
+    REPLICA_STICKY_SECONDS: int = 10  # after a write, that client's reads stay on the primary this long
+    REPLICA_MAX_LAG_SECONDS: float = 5  # replicas further behind are skipped
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: int = 5  # 0 disables lag checks (replicas are then always used)
+
+    AUTH_CACHE_TTL_SECONDS: int = 30  # 0 disables the per-process user principal cache
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # Password hashing (bcrypt on a dedicated process pool)
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_TARGET_MS: int = 0  # >0 calibrates the rounds to this latency at startup
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_TIMEOUT_SECONDS: int = 10
+
     # MinIO
     MINIO_ENDPOINT: str = "minio:9000"
     MINIO_EXTERNAL_ENDPOINT: str = "localhost:9000"
@@ -15,6 +40,26 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = "minioadmin"
     MINIO_BUCKET_NAME: str = "course-seller"
     MINIO_SECURE: bool = False
+    MINIO_UPLOAD_PART_SIZE: int = 5 * 1024 * 1024  # multipart part size; S3 minimum is 5 MiB
+    MINIO_IO_WORKERS: int = 16  # threads (and HTTP connections) for storage calls from async routes
+    IMAGE_PROCESS_WORKERS: int = 2  # processes rendering thumbnail renditions
+    PRESIGNED_UPLOAD_EXPIRE_MINUTES: int = 15
+    RESUMABLE_UPLOAD_EXPIRE_HOURS: int = 24  # idle resumable uploads are discarded after this
+    RESUMABLE_UPLOAD_GC_INTERVAL_SECONDS: int = 3600  # 0 disables the cleanup thread
+
+    # Lesson video HLS packaging (services/video_packaging.py)
+    VIDEO_PACKAGING_WORKERS: int = 1  # worker threads per process; 0 disables packaging
+    VIDEO_PACKAGING_POLL_SECONDS: float = 5  # idle workers check the queue this often
+    VIDEO_PACKAGING_TIMEOUT_SECONDS: int = 3600  # ffmpeg limit per job; the lease is twice this
+    VIDEO_PACKAGING_MAX_ATTEMPTS: int = 3  # claims before a job is marked failed
+    FFMPEG_BINARY: str = "ffmpeg"
+    FFPROBE_BINARY: str = "ffprobe"
+
+    # Startup
+    STARTUP_TARGET_SECONDS: float = 3.0  # a slower boot is logged as a warning
+
+    # Platform stats rollup
+    STATS_RECONCILE_INTERVAL_SECONDS: int = 900  # 0 disables the periodic reconcile
 
     class Config:
         env_file = ".env"
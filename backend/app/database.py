@@ -1,12 +1,131 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from app.config import get_settings
+from app.services import metrics_service
 
 settings = get_settings()
 
-engine = create_engine(settings.DATABASE_URL)
+# Sync URL scheme -> async driver
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+class _TimedPoolMixin:
+    """Records how long callers wait for a connection and how often they give up."""
+
+    metric_prefix = "db_pool"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics_service.inc(f"{self.metric_prefix}_timeouts_total")
+            raise
+        finally:
+            metrics_service.observe(f"{self.metric_prefix}_checkout_seconds", time.perf_counter() - started)
+
+
+class _TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class _TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metric_prefix = "db_async_pool"
+
+
+def async_url(url: str) -> str:
+    """Rewrite a sync DATABASE_URL for the matching async driver (asyncpg / aiosqlite)."""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+def engine_options(url: str, settings, is_async: bool = False, pool_metrics: bool = True) -> dict:
+    """create_engine() / create_async_engine() keyword arguments for the DB_* pool settings."""
+    is_postgres = url.startswith("postgresql")
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer owns the pooling. Holding our own pool on top would pin server
+        # connections, and transaction pooling rejects startup options, so the
+        # statement timeout has to be set on the role instead.
+        options = {"poolclass": NullPool, "pool_pre_ping": False}
+        if is_async and is_postgres:
+            # asyncpg prepares every statement; under transaction pooling a cached or
+            # reused statement name may land on a different server connection.
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    if not url.startswith("sqlite:///:memory:"):
+        options.update(
+            poolclass=(_TimedAsyncQueuePool if is_async else _TimedQueuePool) if pool_metrics else (AsyncAdaptedQueuePool if is_async else QueuePool),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        )
+    if is_postgres and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, settings))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for `async def` routes: DB waits suspend the coroutine instead of
+# holding one of the threads FastAPI runs sync routes on. It keeps its own pool,
+# so a process can open up to twice the DB_POOL_SIZE + DB_MAX_OVERFLOW connections.
+async_engine = create_async_engine(async_url(settings.DATABASE_URL), **engine_options(settings.DATABASE_URL, settings, is_async=True))
+# expire_on_commit=False: response models are serialized after the handler returns,
+# and an expired attribute would need a lazy load, which AsyncSession cannot do.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def _pool_gauges() -> dict[str, float]:
+    gauges = {}
+    for prefix, pool in (("db_pool", engine.pool), ("db_async_pool", async_engine.sync_engine.pool)):
+        if not isinstance(pool, QueuePool):
+            continue
+        capacity = pool.size() + settings.DB_MAX_OVERFLOW
+        checked_out = pool.checkedout()
+        gauges.update({
+            f"{prefix}_size": pool.size(),
+            f"{prefix}_checked_out": checked_out,
+            f"{prefix}_overflow": max(pool.overflow(), 0),
+            f"{prefix}_saturation": checked_out / capacity if capacity else 0.0,
+        })
+    return gauges
+
+
+for _prefix, _label in (("db_pool", "sync"), ("db_async_pool", "async")):
+    metrics_service.describe(f"{_prefix}_checkout_seconds", "summary", f"Time spent waiting for a pooled {_label} database connection")
+    metrics_service.describe(f"{_prefix}_timeouts_total", "counter", f"{_label.capitalize()} connection checkouts that hit DB_POOL_TIMEOUT_SECONDS")
+    metrics_service.describe(f"{_prefix}_size", "gauge", f"Configured persistent connections in the {_label} pool")
+    metrics_service.describe(f"{_prefix}_checked_out", "gauge", f"{_label.capitalize()} connections currently in use")
+    metrics_service.describe(f"{_prefix}_overflow", "gauge", f"{_label.capitalize()} connections open beyond the pool size")
+    metrics_service.describe(f"{_prefix}_saturation", "gauge", f"Checked-out {_label} connections as a fraction of pool size + overflow")
+metrics_service.register_collector(_pool_gauges)
+
 
 class Base(DeclarativeBase):
     pass
@@ -18,3 +137,156 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# --- Read replicas ---
+#
+# Read-only routes depend on get_read_db / get_async_read_db instead of get_db.
+# Each GET request is sent round-robin to a replica that is reachable and no more
+# than REPLICA_MAX_LAG_SECONDS behind. A client that just made a successful write
+# keeps reading from the primary for REPLICA_STICKY_SECONDS so it sees its own
+# changes. The pin travels with the client as a short-lived cookie holding its
+# expiry time, so whichever worker or instance serves the next read honours it.
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+PRIMARY_PIN_COOKIE = "db_primary_until"
+
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class _Replica:
+    def __init__(self, index: int, url: str):
+        self.name = str(index)
+        self.engine = create_engine(url, **engine_options(url, settings, pool_metrics=False))
+        self.async_engine = create_async_engine(async_url(url), **engine_options(url, settings, is_async=True, pool_metrics=False))
+        # info["replica"] lets read paths that would need to write fall back to the primary
+        self.session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine, info={"replica": True})
+        self.async_session = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False, info={"replica": True})
+        self.available = True
+        self.lag_seconds = 0.0
+
+    def usable(self) -> bool:
+        return self.available and self.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+
+    def check(self):
+        try:
+            with self.engine.connect() as conn:
+                query = _REPLICA_LAG_SQL if self.engine.dialect.name == "postgresql" else text("SELECT 0")
+                self.lag_seconds = float(conn.execute(query).scalar() or 0)
+            self.available = True
+        except Exception as e:
+            if self.available:
+                print(f"⚠️ Read replica {self.name} unavailable: {e}")
+            self.available = False
+
+
+_replicas = [_Replica(i, url.strip()) for i, url in enumerate(settings.DATABASE_REPLICA_URLS.split(",")) if url.strip()]
+_next_replica = itertools.count()
+_monitor_thread = None
+
+
+def mark_write(response: Response):
+    """Pin the client to the primary for REPLICA_STICKY_SECONDS (read-your-writes)."""
+    if not _replicas:
+        return
+    response.set_cookie(
+        PRIMARY_PIN_COOKIE,
+        str(int(time.time()) + settings.REPLICA_STICKY_SECONDS),
+        max_age=settings.REPLICA_STICKY_SECONDS,
+        path="/api",
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def _pinned(request: Request) -> bool:
+    try:
+        until = float(request.cookies.get(PRIMARY_PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    # The cookie is client-controlled: honour at most one sticky period from now
+    now = time.time()
+    return now < until <= now + settings.REPLICA_STICKY_SECONDS
+
+
+def _route(request: Request) -> Optional[_Replica]:
+    """The replica to serve this request from, or None for the primary."""
+    if not _replicas or request.method not in SAFE_METHODS:
+        return None
+    if _pinned(request):
+        metrics_service.inc('db_reads_total{target="primary",reason="sticky"}')
+        return None
+    candidates = [replica for replica in _replicas if replica.usable()]
+    if not candidates:
+        metrics_service.inc('db_reads_total{target="primary",reason="no_replica"}')
+        return None
+    replica = candidates[next(_next_replica) % len(candidates)]
+    metrics_service.inc('db_reads_total{target="replica",reason="routed"}')
+    return replica
+
+
+def read_sessionmaker(request: Request) -> sessionmaker:
+    """The sessionmaker for this request's reads, for code that opens its own
+    session (e.g. a streamed body that outlives the request-scoped one)."""
+    replica = _route(request)
+    return replica.session if replica else SessionLocal
+
+
+def get_read_db(request: Request):
+    db = read_sessionmaker(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    replica = _route(request)
+    async with (replica.async_session if replica else AsyncSessionLocal)() as db:
+        yield db
+
+
+def _replica_gauges() -> dict[str, float]:
+    gauges = {}
+    for replica in _replicas:
+        gauges[f'db_replica_lag_seconds{{replica="{replica.name}"}}'] = replica.lag_seconds
+        gauges[f'db_replica_available{{replica="{replica.name}"}}'] = 1.0 if replica.usable() else 0.0
+    return gauges
+
+
+def _monitor_loop(interval: int):
+    while True:
+        for replica in _replicas:
+            replica.check()
+        time.sleep(interval)
+
+
+def start_replica_monitor():
+    """Start the replica lag checker once per process (no-op without replicas)."""
+    global _monitor_thread
+    interval = settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS
+    if not _replicas or interval <= 0 or _monitor_thread is not None:
+        return
+    _monitor_thread = threading.Thread(target=_monitor_loop, args=(interval,), daemon=True, name="replica-monitor")
+    _monitor_thread.start()
+
+
+async def dispose_async_engines():
+    await async_engine.dispose()
+    for replica in _replicas:
+        await replica.async_engine.dispose()
+
+
+metrics_service.describe("db_reads_total", "counter", "Requests on read-only sessions, by database served and why")
+metrics_service.describe("db_replica_lag_seconds", "gauge", "Replication lag per read replica")
+metrics_service.describe("db_replica_available", "gauge", "1 if the replica is reachable and within REPLICA_MAX_LAG_SECONDS")
+metrics_service.register_collector(_replica_gauges)
@@ -1,8 +1,16 @@
+import math
+import time
 from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from app import BOOT_STARTED
+from app.config import get_settings
+from app.database import SAFE_METHODS, mark_write
 from app.models import *  # noqa: F401, F403 — imports all models for relationship resolution
-from app.routers import auth, users, courses, lessons, lesson_submissions, enrollments, payments, reviews, categories, certificates, admin, uploads, land, teacher_applications, coupons, testimonials, placement_stats
+from app.routers import auth, users, courses, lessons, lesson_submissions, enrollments, payments, reviews, categories, certificates, admin, uploads, land, teacher_applications, coupons, testimonials, placement_stats, metrics, health
+from app.services import metrics_service
 
 app = FastAPI(
     title="Course Seller API",
@@ -29,23 +37,127 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
-# MinIO bucket initialization on startup
+def _json_safe(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+# Same body as FastAPI's default 422, which echoes each rejected input and so
+# fails (500) on the NaN/Infinity values the schemas reject
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    return JSONResponse(status_code=422, content={"detail": _json_safe(jsonable_encoder(exc.errors()))})
+
+
+# Close the async engines' pooled connections (the sync engines' close with the process)
+@app.on_event("shutdown")
+async def close_async_engine():
+    from app.database import dispose_async_engines
+    await dispose_async_engines()
+
+
+# Read replicas: lag checks, and read-your-writes stickiness after successful writes
+@app.on_event("startup")
+def monitor_read_replicas():
+    from app.database import start_replica_monitor
+    start_replica_monitor()
+
+
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        mark_write(response)
+    return response
+
+
+# MinIO bucket initialization in the background; readiness is reported by /health/ready
 @app.on_event("startup")
 def init_minio():
-    import time
-    from app.services.minio_service import ensure_bucket
-    max_retries = 5
-    for attempt in range(max_retries):
-        try:
-            ensure_bucket()
-            print("✅ MinIO bucket ready")
-            return
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"⏳ MinIO not ready (attempt {attempt + 1}/{max_retries}), retrying in 2s... ({e})")
-                time.sleep(2)
-            else:
-                print(f"⚠️ MinIO init failed after {max_retries} attempts: {e}")
+    from app.services.minio_service import start_background_init
+    start_background_init()
+
+
+@app.on_event("shutdown")
+def stop_minio_io_pool():
+    from app.services.minio_service import shutdown
+    shutdown()
+
+
+@app.on_event("shutdown")
+def stop_image_pool():
+    from app.services.image_service import shutdown
+    shutdown()
+
+
+# Periodic reconcile of the platform stats rollup
+@app.on_event("startup")
+def start_stats_reconcile():
+    from app.services.stats_service import start_reconcile_loop
+    start_reconcile_loop()
+
+
+# Cleanup of abandoned resumable uploads
+@app.on_event("startup")
+def start_resumable_upload_gc():
+    from app.services.resumable_upload_service import start_gc_loop
+    start_gc_loop()
+
+
+# bcrypt work factor calibration and hashing pool teardown
+@app.on_event("startup")
+def calibrate_password_hashing():
+    from app.services.password_service import calibrate
+    calibrate()
+
+
+@app.on_event("shutdown")
+def stop_password_hashing():
+    from app.services.password_service import shutdown
+    shutdown()
+
+
+# Autograder sandbox pool and worker threads
+@app.on_event("startup")
+def start_autograder_workers():
+    from app.services.autograder_service import DEFAULT_AUTOGRADER_IMAGE
+    from app.services.grading_queue import start_workers
+    from app.services.sandbox_pool import start_pool
+    start_pool(DEFAULT_AUTOGRADER_IMAGE)
+    start_workers()
+
+
+@app.on_event("shutdown")
+def stop_autograder_sandboxes():
+    from app.services.sandbox_pool import stop_pool
+    stop_pool()
+
+
+# HLS packaging of uploaded lesson videos
+@app.on_event("startup")
+def start_video_packaging_workers():
+    from app.services.video_packaging import start_workers
+    start_workers()
+
+
+# Registered last so it measures the whole startup sequence
+@app.on_event("startup")
+def record_startup_time():
+    startup_seconds = time.perf_counter() - BOOT_STARTED
+    metrics_service.register_collector(lambda: {"app_startup_seconds": startup_seconds})
+    target = get_settings().STARTUP_TARGET_SECONDS
+    if startup_seconds > target:
+        print(f"⚠️ Startup took {startup_seconds:.2f}s (target {target}s)")
+    else:
+        print(f"🚀 Ready to serve in {startup_seconds:.2f}s")
+
+
+metrics_service.describe("app_startup_seconds", "gauge", "Seconds from importing the app to finishing startup hooks")
 
 
 # Include all routers
@@ -66,6 +178,8 @@ app.include_router(land.router)
 app.include_router(teacher_applications.router)
 app.include_router(testimonials.router)
 app.include_router(placement_stats.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 
 @app.get("/")
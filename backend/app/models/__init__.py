@@ -13,3 +13,6 @@ from app.models.permission import ManagerPermission
 from app.models.testimonial import Testimonial
 from app.models.placement_stat import PlacementStat
 from app.models.lesson_submission import LessonSubmission
+from app.models.platform_stat import PlatformStat
+from app.models.resumable_upload import ResumableUpload
+from app.models.video_package import VideoPackage
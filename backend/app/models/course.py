@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -6,6 +6,11 @@ from app.database import Base
 
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (
+        # Catalog keyset order (newest) and the teacher's own course list
+        Index("ix_courses_status_created_at", "status", "created_at", "id"),
+        Index("ix_courses_teacher_created_at", "teacher_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -16,8 +21,13 @@ class Course(Base):
     teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     status = Column(String(20), nullable=False, default="draft")  # draft, published, archived
+    # Counters maintained by app.services.course_stats_service
     avg_rating = Column(Float, default=0.0)
     total_students = Column(Integer, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    lesson_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -6,14 +6,25 @@ from app.database import Base
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="uq_enrollments_user_course"),
+        Index("ix_enrollments_course_enrolled_at", "course_id", "enrolled_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
     enrolled_at = Column(DateTime(timezone=True), server_default=func.now())
-    completed = Column(Boolean, default=False)
+    # Lessons with completed progress; maintained by app.services.progress_service
+    completed_lessons = Column(Integer, nullable=False, default=0)
 
     # Relationships
     user = relationship("User", back_populates="enrollments")
     course = relationship("Course", back_populates="enrollments")
     progress = relationship("Progress", back_populates="enrollment", cascade="all, delete-orphan")
+
+    @property
+    def completed(self) -> bool:
+        """Every lesson of the course is completed (compares counters; loads `course` if needed)."""
+        lesson_count = self.course.lesson_count
+        return lesson_count > 0 and (self.completed_lessons or 0) >= lesson_count
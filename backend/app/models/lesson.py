@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -6,6 +6,7 @@ from app.database import Base
 
 class Lesson(Base):
     __tablename__ = "lessons"
+    __table_args__ = (Index("ix_lessons_course_order", "course_id", "order_index"),)
 
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
@@ -13,6 +14,8 @@ class Lesson(Base):
     content_type = Column(String(40), nullable=False, default="text")
     content = Column(Text, nullable=True)
     video_url = Column(String(500), nullable=True)
+    # Set once app/services/video_packaging.py has packaged video_url as HLS
+    hls_manifest_url = Column(String(500), nullable=True)
     pdf_url = Column(String(500), nullable=True)
     ppt_url = Column(String(500), nullable=True)
     code_template = Column(Text, nullable=True)
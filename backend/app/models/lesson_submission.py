@@ -15,6 +15,8 @@ class LessonSubmission(Base):
     submission_text = Column(Text, nullable=True)
     submission_code = Column(Text, nullable=True)
     status = Column(String(30), nullable=False, default="submitted")
+    attempts = Column(Integer, nullable=False, default=0)  # autograder claims
+    locked_at = Column(DateTime(timezone=True), nullable=True)  # autograder lease start
     score = Column(Float, nullable=True)
     max_score = Column(Float, nullable=True)
     feedback = Column(Text, nullable=True)
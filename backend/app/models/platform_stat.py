@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+from app.database import Base
+
+
+class PlatformStat(Base):
+    __tablename__ = "platform_stats"
+
+    # Single-row rollup of platform counters, maintained by app/services/stats_service.py
+    id = Column(Integer, primary_key=True, default=1)
+
+    total_users = Column(Integer, nullable=False, default=0)
+    total_students = Column(Integer, nullable=False, default=0)
+    total_teachers = Column(Integer, nullable=False, default=0)
+    total_courses = Column(Integer, nullable=False, default=0)
+    published_courses = Column(Integer, nullable=False, default=0)
+    total_enrollments = Column(Integer, nullable=False, default=0)
+    total_revenue = Column(Float, nullable=False, default=0.0)
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
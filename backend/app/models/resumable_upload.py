@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ResumableUpload(Base):
+    __tablename__ = "resumable_uploads"
+
+    # Upload session for app/services/resumable_upload_service.py; chunks live in MinIO under .uploads/<id>/
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    object_name = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    received_bytes = Column(BigInteger, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class VideoPackage(Base):
+    __tablename__ = "video_packages"
+
+    # HLS packaging job per uploaded source video; see app/services/video_packaging.py
+    id = Column(Integer, primary_key=True, index=True)
+    source_object = Column(String(255), nullable=False, unique=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued / processing / ready / failed
+    manifest_object = Column(String(255), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
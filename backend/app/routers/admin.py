@@ -1,15 +1,13 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func as sql_func
 from app.database import get_db
 from app.models.user import User
 from app.models.course import Course
-from app.models.enrollment import Enrollment
-from app.models.payment import Payment
 from app.models.permission import ManagerPermission
 from app.schemas.schemas import AdminStats, UserOut, CourseOut, ManagerPermissionOut, ManagerPermissionUpdate
-from app.utils.auth import require_role, require_permission
+from app.utils.auth import require_role, require_permission, invalidate_user
+from app.services import search_service, stats_service
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -19,25 +17,32 @@ def get_stats(db: Session = Depends(get_db), current_user: User = Depends(requir
     if current_user is None:
         return JSONResponse(status_code=403, content={"success": False, "message": "Admin access required"})
     try:
-        total_users = db.query(User).count()
-        total_courses = db.query(Course).count()
-        total_enrollments = db.query(Enrollment).count()
-        total_revenue = db.query(sql_func.sum(Payment.amount)).filter(Payment.status == "completed").scalar() or 0.0
-        total_teachers = db.query(User).filter(User.role == "teacher").count()
-        total_students = db.query(User).filter(User.role == "student").count()
-
+        stats = stats_service.get_stats(db)
         return AdminStats(
-            total_users=total_users,
-            total_courses=total_courses,
-            total_enrollments=total_enrollments,
-            total_revenue=total_revenue,
-            total_teachers=total_teachers,
-            total_students=total_students,
+            total_users=stats.total_users,
+            total_courses=stats.total_courses,
+            total_enrollments=stats.total_enrollments,
+            total_revenue=stats.total_revenue,
+            total_teachers=stats.total_teachers,
+            total_students=stats.total_students,
         )
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to get stats: {str(e)}"})
 
 
+@router.post("/stats/reconcile", response_model=AdminStats)
+def reconcile_stats(db: Session = Depends(get_db), current_user: User = Depends(require_role(["admin"]))):
+    if current_user is None:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Admin access required"})
+    try:
+        stats_service.reconcile(db)
+        db.commit()
+        return get_stats(db=db, current_user=current_user)
+    except Exception as e:
+        db.rollback()
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to reconcile stats: {str(e)}"})
+
+
 @router.get("/users", response_model=list[UserOut])
 def admin_list_users(
     search: str = None,
@@ -95,6 +100,7 @@ def toggle_user_active(user_id: int, db: Session = Depends(get_db), current_user
             return JSONResponse(status_code=404, content={"success": False, "message": "User not found"})
         user.is_active = not user.is_active
         db.commit()
+        invalidate_user(user.id)
         return {"success": True, "message": f"User {'activated' if user.is_active else 'deactivated'}", "is_active": user.is_active}
     except Exception as e:
         db.rollback()
@@ -111,8 +117,10 @@ def change_user_role(user_id: int, role: str, db: Session = Depends(get_db), cur
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
             return JSONResponse(status_code=404, content={"success": False, "message": "User not found"})
+        stats_service.role_changed(db, user.role, role)
         user.role = role
         db.commit()
+        invalidate_user(user.id)
         return {"success": True, "message": f"User role changed to {role}"}
     except Exception as e:
         db.rollback()
@@ -127,6 +135,7 @@ def approve_course(course_id: int, db: Session = Depends(get_db), current_user:
         course = db.query(Course).filter(Course.id == course_id).first()
         if not course:
             return JSONResponse(status_code=404, content={"success": False, "message": "Course not found"})
+        stats_service.course_status_changed(db, course.status, "published")
         course.status = "published"
         db.commit()
         return {"success": True, "message": "Course approved and published"}
@@ -143,6 +152,7 @@ def reject_course(course_id: int, db: Session = Depends(get_db), current_user: U
         course = db.query(Course).filter(Course.id == course_id).first()
         if not course:
             return JSONResponse(status_code=404, content={"success": False, "message": "Course not found"})
+        stats_service.course_status_changed(db, course.status, "archived")
         course.status = "archived"
         db.commit()
         return {"success": True, "message": "Course rejected"}
@@ -159,6 +169,8 @@ def admin_delete_course(course_id: int, db: Session = Depends(get_db), current_u
         course = db.query(Course).filter(Course.id == course_id).first()
         if not course:
             return JSONResponse(status_code=404, content={"success": False, "message": "Course not found"})
+        stats_service.course_removed(db, course)
+        search_service.unindex_course(db, course_id)
         db.delete(course)
         db.commit()
         return {"success": True, "message": "Course deleted"}
@@ -222,5 +234,6 @@ def update_manager_permissions(
         setattr(perms, key, value)
         
     db.commit()
+    invalidate_user(user.id)
     db.refresh(perms)
     return perms
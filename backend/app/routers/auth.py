@@ -5,6 +5,8 @@ from app.database import get_db
 from app.models.user import User
 from app.schemas.schemas import UserRegister, UserLogin, Token, UserOut
 from app.utils.auth import hash_password, verify_password, create_access_token, get_current_user
+from app.services.password_service import PasswordHasherBusy, needs_rehash
+from app.services import stats_service
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -29,9 +31,13 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
             role=user_data.role,
         )
         db.add(user)
+        stats_service.user_registered(db, user.role)
         db.commit()
         db.refresh(user)
         return user
+    except PasswordHasherBusy:
+        db.rollback()
+        return JSONResponse(status_code=503, content={"success": False, "message": "Server is busy, please try again"})
     except Exception as e:
         db.rollback()
         return JSONResponse(status_code=500, content={"success": False, "message": f"Registration failed: {str(e)}"})
@@ -46,14 +52,33 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
         if not user.is_active:
             return JSONResponse(status_code=403, content={"success": False, "message": "Account is deactivated"})
 
-        token = create_access_token(data={"sub": str(user.id), "role": user.role})
+        user_id, role = user.id, user.role
+        # Upgrade hashes made with an outdated bcrypt cost while we have the plaintext.
+        # Best effort: the password is already verified, so a busy or slow hasher must
+        # not fail the login; the upgrade is retried on a later one.
+        if needs_rehash(user.password_hash):
+            try:
+                user.password_hash = hash_password(user_data.password)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ Password rehash for user {user_id} skipped: {e!r}")
+
+        token = create_access_token(data={"sub": str(user_id), "role": role})
         return {"access_token": token}
+    except PasswordHasherBusy:
+        db.rollback()
+        return JSONResponse(status_code=503, content={"success": False, "message": "Server is busy, please try again"})
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "message": f"Login failed: {str(e)}"})
 
 
 @router.get("/me", response_model=UserOut)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     if current_user is None:
         return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated"})
-    return current_user
+    # current_user is a cached authorization principal; the profile comes from the DB
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        return JSONResponse(status_code=404, content={"success": False, "message": "User not found"})
+    return user
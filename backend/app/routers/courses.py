@@ -1,57 +1,203 @@
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import JSONResponse
+import base64
+import binascii
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func as sql_func
+from sqlalchemy import func as sql_func, and_, or_, select
 from typing import Optional
-from app.database import get_db
+from app.database import get_db, get_read_db, get_async_read_db, read_sessionmaker
 from app.models.user import User
 from app.models.course import Course
 from app.models.payment import Payment
 from app.models.enrollment import Enrollment
 from app.models.review import Review
-from app.models.lesson import Lesson
-from app.schemas.schemas import CourseCreate, CourseUpdate, CourseOut
+from app.schemas.schemas import CourseCreate, CourseUpdate, CourseOut, CoursePage
 from app.utils.auth import get_current_user, require_role
+from app.services import search_service, stats_service
 
 router = APIRouter(prefix="/api/courses", tags=["Courses"])
 
+CATALOG_PAGE_SIZE = 24
+CATALOG_MAX_PAGE_SIZE = 100
+EXPORT_BATCH_SIZE = 500
+ANALYTICS_PAGE_SIZE = 50
 
-@router.get("/", response_model=list[CourseOut])
-def list_courses(
+# Everything CourseOut reads. Async sessions cannot lazy-load during response
+# serialization, so routes on get_async_db must load it all up front.
+COURSE_OUT_LOADS = (joinedload(Course.teacher).joinedload(User.permissions), joinedload(Course.category))
+
+# Catalog keyset sort keys: sort_by -> (column, descending). Course.id breaks ties
+# in the same direction so page boundaries stay stable while rows are inserted.
+CATALOG_SORT_KEYS = {
+    "price": (Course.price, False),
+    "rating": (sql_func.coalesce(Course.avg_rating, 0.0), True),
+    "students": (sql_func.coalesce(Course.total_students, 0), True),
+    "newest": (Course.created_at, True),
+}
+
+
+@router.get("/", response_model=CoursePage)
+async def list_courses(
     search: Optional[str] = None,
     category_id: Optional[int] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    sort_by: Optional[str] = Query(None, regex="^(price|rating|newest|students)$"),
-    db: Session = Depends(get_db),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|price|rating|newest|students)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(CATALOG_PAGE_SIZE, ge=1, le=CATALOG_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
+    sort_by = _resolve_sort(sort_by, search)
     try:
-        query = db.query(Course).options(joinedload(Course.teacher), joinedload(Course.category))
-        query = query.filter(Course.status == "published")
-
-        if search:
-            query = query.filter(Course.title.ilike(f"%{search}%"))
-        if category_id:
-            query = query.filter(Course.category_id == category_id)
-        if min_price is not None:
-            query = query.filter(Course.price >= min_price)
-        if max_price is not None:
-            query = query.filter(Course.price <= max_price)
-
-        if sort_by == "price":
-            query = query.order_by(Course.price.asc())
-        elif sort_by == "rating":
-            query = query.order_by(Course.avg_rating.desc())
-        elif sort_by == "students":
-            query = query.order_by(Course.total_students.desc())
-        else:
-            query = query.order_by(Course.created_at.desc())
-
-        return query.all()
+        after = _decode_cursor(cursor, sort_by) if cursor else None
+    except ValueError:
+        return JSONResponse(status_code=400, content={"success": False, "message": "Invalid cursor"})
+    try:
+        # The in-process search index loads through the ORM, so this gets a sync view of the session
+        clauses = await db.run_sync(_search_clauses, search, sort_by, after, limit + 1)
+        rows = []
+        for search_clause in clauses:
+            stmt, rank = _catalog_query(search_clause, category_id, min_price, max_price)
+            stmt = _apply_keyset(stmt, sort_by, after, rank)
+            result = await db.execute(stmt.options(*COURSE_OUT_LOADS).limit(limit + 1 - len(rows)))
+            rows += result.all()
+            if len(rows) > limit:
+                break
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            course, value = rows[-1]
+            next_cursor = _encode_cursor(value, course.id)
+        return {"items": [course for course, _ in rows], "next_cursor": next_cursor}
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to list courses: {str(e)}"})
 
 
+@router.get("/export")
+def export_courses(
+    request: Request,
+    search: Optional[str] = None,
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort_by: Optional[str] = Query(None, regex="^(relevance|price|rating|newest|students)$"),
+):
+    """Stream every matching published course as one JSON array, fetched in keyset batches."""
+    sort_by = _resolve_sort(sort_by, search)
+    session_factory = read_sessionmaker(request)
+
+    def generate():
+        # The request-scoped session is closed before a streamed body is sent, so
+        # the export owns its own read session (a replica when one is usable).
+        db = session_factory()
+        try:
+            yield "["
+            after = None
+            first = True
+            while True:
+                batch = []
+                for search_clause in _search_clauses(db, search, sort_by, after, EXPORT_BATCH_SIZE):
+                    stmt, rank = _catalog_query(search_clause, category_id, min_price, max_price)
+                    stmt = _apply_keyset(stmt, sort_by, after, rank)
+                    batch += db.execute(stmt.options(*COURSE_OUT_LOADS).limit(EXPORT_BATCH_SIZE - len(batch))).all()
+                    if len(batch) >= EXPORT_BATCH_SIZE:
+                        break
+                for course, _ in batch:
+                    yield ("" if first else ",") + CourseOut.model_validate(course).model_dump_json()
+                    first = False
+                if len(batch) < EXPORT_BATCH_SIZE:
+                    break
+                after = (batch[-1][1], batch[-1][0].id)
+                db.expunge_all()
+            yield "]"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/json")
+
+
+def _resolve_sort(sort_by: Optional[str], search: Optional[str]) -> str:
+    """Searches default to relevance; relevance without a search term means newest."""
+    if sort_by is None:
+        return "relevance" if search else "newest"
+    if sort_by == "relevance" and not search:
+        return "newest"
+    return sort_by
+
+
+def _search_clauses(db: Session, search: Optional[str], sort_by: str, after: Optional[tuple], window: int):
+    """The search clauses to query in order: several only when an in-process relevance search is windowed."""
+    if not search:
+        return [None]
+    if sort_by == "relevance":
+        return search_service.ranked_search_clauses(db, search, after, window)
+    return [search_service.search_clause(db, search)]
+
+
+def _catalog_query(search_clause, category_id, min_price, max_price):
+    """Return the filtered published-course select and the search rank expression (or None).
+
+    `search_clause` is search_service.search_clause()'s (criterion, rank) for a search, else None.
+    """
+    query = select(Course).filter(Course.status == "published")
+    rank = None
+    if search_clause is not None:
+        criterion, rank = search_clause
+        query = query.filter(criterion)
+    if category_id:
+        query = query.filter(Course.category_id == category_id)
+    if min_price is not None:
+        query = query.filter(Course.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Course.price <= max_price)
+    return query, rank
+
+
+def _apply_keyset(query, sort_by: str, after: Optional[tuple], rank=None):
+    """Select and order by the sort key with Course.id as tie-breaker, seeking past `after`.
+
+    Rows come back as (Course, sort_value) so cursors never re-derive the key in Python.
+    """
+    if sort_by == "relevance":
+        column, descending = rank, True
+    else:
+        column, descending = CATALOG_SORT_KEYS[sort_by]
+    query = query.add_columns(column)
+    if after is not None:
+        value, last_id = after
+        if descending:
+            query = query.filter(or_(column < value, and_(column == value, Course.id < last_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, Course.id > last_id)))
+    if descending:
+        return query.order_by(column.desc(), Course.id.desc())
+    return query.order_by(column.asc(), Course.id.asc())
+
+
+def _encode_cursor(value, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        if sort_by == "newest":
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, (int, float)):
+            raise ValueError("Cursor value does not match sort order")
+        return value, int(row_id)
+    except (TypeError, binascii.Error, json.JSONDecodeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+
+
 @router.get("/my", response_model=list[CourseOut])
 def my_courses(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     if current_user is None:
@@ -69,102 +215,46 @@ def my_courses(db: Session = Depends(get_db), current_user: User = Depends(get_c
 
 
 @router.get("/my/analytics")
-def my_analytics(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def my_analytics(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     if current_user is None:
         return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated"})
     if current_user.role not in ["teacher", "admin"]:
         return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers can view analytics"})
     try:
-        teacher_courses = db.query(Course).filter(Course.teacher_id == current_user.id).all()
-        course_ids = [c.id for c in teacher_courses]
-
-        # Overview stats
-        total_revenue = 0.0
-        total_students = 0
-        total_reviews = 0
-        total_lessons = 0
-        rating_sum = 0.0
-        rating_count = 0
-
-        if course_ids:
-            rev = db.query(sql_func.coalesce(sql_func.sum(Payment.amount), 0.0)).filter(
-                Payment.course_id.in_(course_ids), Payment.status == "completed"
-            ).scalar()
-            total_revenue = float(rev) if rev else 0.0
-
-            total_students = db.query(Enrollment).filter(Enrollment.course_id.in_(course_ids)).count()
-            total_reviews = db.query(Review).filter(Review.course_id.in_(course_ids)).count()
-            total_lessons = db.query(Lesson).filter(Lesson.course_id.in_(course_ids)).count()
-
-            avg_r = db.query(sql_func.avg(Review.rating)).filter(Review.course_id.in_(course_ids)).scalar()
-            if avg_r:
-                rating_sum = float(avg_r)
-                rating_count = 1  # used as flag for avg
+        teacher_courses = (
+            db.query(Course)
+            .filter(Course.teacher_id == current_user.id)
+            .order_by(Course.created_at.desc())
+            .all()
+        )
+        owned = db.query(Course.id).filter(Course.teacher_id == current_user.id).scalar_subquery()
+
+        # Students, ratings, lessons and revenue are counters on the course row;
+        # only the number of sales still needs a grouped statement
+        sales_counts = dict(
+            db.query(Payment.course_id, sql_func.count(Payment.id))
+            .filter(Payment.course_id.in_(owned), Payment.status == "completed")
+            .group_by(Payment.course_id)
+            .all()
+        )
+
+        total_reviews = sum(c.rating_count for c in teacher_courses)
+        rating_sum = sum(c.rating_sum for c in teacher_courses)
 
         overview = {
             "total_courses": len(teacher_courses),
             "published_courses": len([c for c in teacher_courses if c.status == "published"]),
             "draft_courses": len([c for c in teacher_courses if c.status == "draft"]),
-            "total_students": total_students,
-            "total_revenue": total_revenue,
-            "avg_rating": round(rating_sum, 2) if rating_count else 0.0,
+            "total_students": sum(c.total_students or 0 for c in teacher_courses),
+            "total_revenue": sum(c.revenue for c in teacher_courses),
+            "avg_rating": round(rating_sum / total_reviews, 2) if total_reviews else 0.0,
             "total_reviews": total_reviews,
-            "total_lessons": total_lessons,
+            "total_lessons": sum(c.lesson_count for c in teacher_courses),
         }
 
-        # Per-course details
+        # Per-course details; student and review lists live under /my/analytics/students|reviews
         courses_data = []
         for course in teacher_courses:
-            # Enrolled students
-            enrollments = (
-                db.query(Enrollment)
-                .options(joinedload(Enrollment.user))
-                .filter(Enrollment.course_id == course.id)
-                .order_by(Enrollment.enrolled_at.desc())
-                .all()
-            )
-            students = [
-                {
-                    "id": e.user.id,
-                    "name": e.user.name,
-                    "email": e.user.email,
-                    "avatar_url": e.user.avatar_url,
-                    "enrolled_at": e.enrolled_at.isoformat() if e.enrolled_at else None,
-                    "completed": e.completed,
-                }
-                for e in enrollments
-            ]
-
-            # Reviews
-            reviews = (
-                db.query(Review)
-                .options(joinedload(Review.user))
-                .filter(Review.course_id == course.id)
-                .order_by(Review.created_at.desc())
-                .all()
-            )
-            reviews_data = [
-                {
-                    "id": r.id,
-                    "user_name": r.user.name,
-                    "user_avatar": r.user.avatar_url,
-                    "rating": r.rating,
-                    "comment": r.comment,
-                    "created_at": r.created_at.isoformat() if r.created_at else None,
-                }
-                for r in reviews
-            ]
-
-            # Revenue for this course
-            course_rev = db.query(sql_func.coalesce(sql_func.sum(Payment.amount), 0.0)).filter(
-                Payment.course_id == course.id, Payment.status == "completed"
-            ).scalar()
-            sales_count = db.query(Payment).filter(
-                Payment.course_id == course.id, Payment.status == "completed"
-            ).count()
-
-            lesson_count = db.query(Lesson).filter(Lesson.course_id == course.id).count()
-
             courses_data.append({
                 "id": course.id,
                 "title": course.title,
@@ -172,37 +262,34 @@ def my_analytics(db: Session = Depends(get_db), current_user: User = Depends(get
                 "price": course.price,
                 "status": course.status,
                 "avg_rating": course.avg_rating or 0.0,
-                "total_students": len(students),
-                "revenue": float(course_rev) if course_rev else 0.0,
-                "sales": sales_count,
-                "lesson_count": lesson_count,
+                "total_students": course.total_students or 0,
+                "review_count": course.rating_count,
+                "revenue": course.revenue,
+                "sales": sales_counts.get(course.id, 0),
+                "lesson_count": course.lesson_count,
                 "thumbnail_url": course.thumbnail_url,
                 "category_id": course.category_id,
                 "created_at": course.created_at.isoformat() if course.created_at else None,
-                "students": students,
-                "reviews": reviews_data,
             })
 
         # Recent activity (last 10 enrollments)
-        recent_enrollments = []
-        if course_ids:
-            recent = (
-                db.query(Enrollment)
-                .options(joinedload(Enrollment.user), joinedload(Enrollment.course))
-                .filter(Enrollment.course_id.in_(course_ids))
-                .order_by(Enrollment.enrolled_at.desc())
-                .limit(10)
-                .all()
-            )
-            recent_enrollments = [
-                {
-                    "student_name": e.user.name,
-                    "student_avatar": e.user.avatar_url,
-                    "course_title": e.course.title,
-                    "enrolled_at": e.enrolled_at.isoformat() if e.enrolled_at else None,
-                }
-                for e in recent
-            ]
+        recent = (
+            db.query(Enrollment)
+            .options(joinedload(Enrollment.user), joinedload(Enrollment.course))
+            .filter(Enrollment.course_id.in_(owned))
+            .order_by(Enrollment.enrolled_at.desc())
+            .limit(10)
+            .all()
+        )
+        recent_enrollments = [
+            {
+                "student_name": e.user.name,
+                "student_avatar": e.user.avatar_url,
+                "course_title": e.course.title,
+                "enrolled_at": e.enrolled_at.isoformat() if e.enrolled_at else None,
+            }
+            for e in recent
+        ]
 
         return {
             "overview": overview,
@@ -213,6 +300,118 @@ def my_analytics(db: Session = Depends(get_db), current_user: User = Depends(get
         return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to get analytics: {str(e)}"})
 
 
+@router.get("/my/analytics/students")
+def my_analytics_students(
+    course_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(ANALYTICS_PAGE_SIZE, ge=1, le=CATALOG_MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Students enrolled in the teacher's courses, newest enrollment first."""
+    if current_user is None:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated"})
+    if current_user.role not in ["teacher", "admin"]:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers can view analytics"})
+    try:
+        after = _decode_cursor(cursor, "newest") if cursor else None
+    except ValueError:
+        return JSONResponse(status_code=400, content={"success": False, "message": "Invalid cursor"})
+    try:
+        query = (
+            db.query(Enrollment)
+            .join(Course, Enrollment.course_id == Course.id)
+            .options(joinedload(Enrollment.user), joinedload(Enrollment.course))
+            .filter(Course.teacher_id == current_user.id)
+        )
+        if course_id:
+            query = query.filter(Enrollment.course_id == course_id)
+        if after is not None:
+            enrolled_at, last_id = after
+            query = query.filter(or_(
+                Enrollment.enrolled_at < enrolled_at,
+                and_(Enrollment.enrolled_at == enrolled_at, Enrollment.id < last_id),
+            ))
+        enrollments = query.order_by(Enrollment.enrolled_at.desc(), Enrollment.id.desc()).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(enrollments) > limit:
+            enrollments = enrollments[:limit]
+            next_cursor = _encode_cursor(enrollments[-1].enrolled_at, enrollments[-1].id)
+        items = [
+            {
+                "id": e.user.id,
+                "name": e.user.name,
+                "email": e.user.email,
+                "avatar_url": e.user.avatar_url,
+                "course_id": e.course_id,
+                "course_title": e.course.title,
+                "enrolled_at": e.enrolled_at.isoformat() if e.enrolled_at else None,
+                "completed": e.completed,
+            }
+            for e in enrollments
+        ]
+        return {"items": items, "next_cursor": next_cursor}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to get students: {str(e)}"})
+
+
+@router.get("/my/analytics/reviews")
+def my_analytics_reviews(
+    course_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(ANALYTICS_PAGE_SIZE, ge=1, le=CATALOG_MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Reviews on the teacher's courses, newest first."""
+    if current_user is None:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated"})
+    if current_user.role not in ["teacher", "admin"]:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers can view analytics"})
+    try:
+        after = _decode_cursor(cursor, "newest") if cursor else None
+    except ValueError:
+        return JSONResponse(status_code=400, content={"success": False, "message": "Invalid cursor"})
+    try:
+        query = (
+            db.query(Review)
+            .join(Course, Review.course_id == Course.id)
+            .options(joinedload(Review.user), joinedload(Review.course))
+            .filter(Course.teacher_id == current_user.id)
+        )
+        if course_id:
+            query = query.filter(Review.course_id == course_id)
+        if after is not None:
+            created_at, last_id = after
+            query = query.filter(or_(
+                Review.created_at < created_at,
+                and_(Review.created_at == created_at, Review.id < last_id),
+            ))
+        reviews = query.order_by(Review.created_at.desc(), Review.id.desc()).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            next_cursor = _encode_cursor(reviews[-1].created_at, reviews[-1].id)
+        items = [
+            {
+                "id": r.id,
+                "user_name": r.user.name,
+                "user_avatar": r.user.avatar_url,
+                "course_id": r.course_id,
+                "course_title": r.course.title,
+                "rating": r.rating,
+                "comment": r.comment,
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+            }
+            for r in reviews
+        ]
+        return {"items": items, "next_cursor": next_cursor}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to get reviews: {str(e)}"})
+
+
 @router.post("/", response_model=CourseOut, status_code=201)
 def create_course(course_data: CourseCreate, db: Session = Depends(get_db), current_user: User = Depends(require_role(["teacher", "admin"]))):
     if current_user is None:
@@ -220,6 +419,9 @@ def create_course(course_data: CourseCreate, db: Session = Depends(get_db), curr
     try:
         course = Course(**course_data.model_dump(), teacher_id=current_user.id)
         db.add(course)
+        db.flush()
+        search_service.index_course(db, course)
+        stats_service.record(db, total_courses=1)
         db.commit()
         db.refresh(course)
         return course
@@ -229,14 +431,10 @@ def create_course(course_data: CourseCreate, db: Session = Depends(get_db), curr
 
 
 @router.get("/{course_id}", response_model=CourseOut)
-def get_course(course_id: int, db: Session = Depends(get_db)):
+async def get_course(course_id: int, db: AsyncSession = Depends(get_async_read_db)):
     try:
-        course = (
-            db.query(Course)
-            .options(joinedload(Course.teacher), joinedload(Course.category))
-            .filter(Course.id == course_id)
-            .first()
-        )
+        result = await db.execute(select(Course).options(*COURSE_OUT_LOADS).filter(Course.id == course_id))
+        course = result.scalars().first()
         if not course:
             return JSONResponse(status_code=404, content={"success": False, "message": "Course not found"})
         return course
@@ -261,8 +459,13 @@ def update_course(course_id: int, course_data: CourseUpdate, db: Session = Depen
             return JSONResponse(status_code=403, content={"success": False, "message": "Not authorized to update this course"})
 
         update_data = course_data.model_dump(exclude_unset=True)
+        if "status" in update_data:
+            stats_service.course_status_changed(db, course.status, update_data["status"])
         for key, value in update_data.items():
             setattr(course, key, value)
+        if "title" in update_data or "description" in update_data:
+            db.flush()
+            search_service.index_course(db, course)
 
         db.commit()
         db.refresh(course)
@@ -283,6 +486,8 @@ def delete_course(course_id: int, db: Session = Depends(get_db), current_user: U
         if course.teacher_id != current_user.id and current_user.role != "admin":
             return JSONResponse(status_code=403, content={"success": False, "message": "Not authorized to delete this course"})
 
+        stats_service.course_removed(db, course)
+        search_service.unindex_course(db, course_id)
         db.delete(course)
         db.commit()
         return {"success": True, "message": "Course deleted"}
@@ -1,15 +1,15 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session, joinedload
-from datetime import datetime, timezone
 from app.database import get_db
 from app.models.user import User
 from app.models.course import Course
 from app.models.enrollment import Enrollment
 from app.models.progress import Progress
 from app.models.lesson import Lesson
-from app.schemas.schemas import EnrollmentCreate, EnrollmentOut, ProgressUpdate, ProgressOut
+from app.schemas.schemas import EnrollmentCreate, EnrollmentOut, ProgressUpdate, ProgressBulkUpdate, ProgressEventBatch, ProgressOut
 from app.utils.auth import get_current_user
+from app.services import course_stats_service, progress_service, stats_service
 
 router = APIRouter(prefix="/api/enrollments", tags=["Enrollments"])
 
@@ -31,7 +31,8 @@ def enroll(data: EnrollmentCreate, db: Session = Depends(get_db), current_user:
 
         enrollment = Enrollment(user_id=current_user.id, course_id=data.course_id)
         db.add(enrollment)
-        course.total_students = (course.total_students or 0) + 1
+        course_stats_service.record(db, course.id, total_students=1)
+        stats_service.record(db, total_enrollments=1)
         db.commit()
         db.refresh(enrollment)
         return enrollment
@@ -63,34 +64,65 @@ def update_progress(data: ProgressUpdate, db: Session = Depends(get_db), current
         if not enrollment:
             return JSONResponse(status_code=403, content={"success": False, "message": "Not enrolled in this course"})
 
-        progress = db.query(Progress).filter(Progress.enrollment_id == enrollment.id, Progress.lesson_id == data.lesson_id).first()
-
-        if progress:
-            progress.completed = data.completed
-            progress.completed_at = datetime.now(timezone.utc) if data.completed else None
-        else:
-            progress = Progress(
-                enrollment_id=enrollment.id,
-                lesson_id=data.lesson_id,
-                completed=data.completed,
-                completed_at=datetime.now(timezone.utc) if data.completed else None,
-            )
-            db.add(progress)
-
-        total_lessons = db.query(Lesson).filter(Lesson.course_id == lesson.course_id).count()
-        completed_lessons = db.query(Progress).filter(Progress.enrollment_id == enrollment.id, Progress.completed == True).count()
-        if data.completed:
-            completed_lessons += 1 if not progress.id else 0
-        enrollment.completed = completed_lessons >= total_lessons
+        progress_service.mark_lessons(db, enrollment, [data.lesson_id], data.completed)
+        db.commit()
+        return db.query(Progress).filter(Progress.enrollment_id == enrollment.id, Progress.lesson_id == data.lesson_id).first()
+    except Exception as e:
+        db.rollback()
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to update progress: {str(e)}"})
+
+
+@router.patch("/progress/bulk", response_model=list[ProgressOut])
+def update_progress_bulk(data: ProgressBulkUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    if current_user is None:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated"})
+    lesson_ids = list(dict.fromkeys(data.lesson_ids))
+    if not lesson_ids or len(lesson_ids) > progress_service.MAX_BATCH_LESSONS:
+        return JSONResponse(status_code=400, content={"success": False, "message": f"Provide between 1 and {progress_service.MAX_BATCH_LESSONS} lesson IDs"})
+    try:
+        enrollment = db.query(Enrollment).filter(Enrollment.user_id == current_user.id, Enrollment.course_id == data.course_id).first()
+        if not enrollment:
+            return JSONResponse(status_code=403, content={"success": False, "message": "Not enrolled in this course"})
+
+        found = {lesson_id for (lesson_id,) in db.query(Lesson.id).filter(Lesson.course_id == data.course_id, Lesson.id.in_(lesson_ids))}
+        if len(found) != len(lesson_ids):
+            missing = ", ".join(str(lesson_id) for lesson_id in lesson_ids if lesson_id not in found)
+            return JSONResponse(status_code=404, content={"success": False, "message": f"Lessons not found in this course: {missing}"})
 
+        progress_service.mark_lessons(db, enrollment, lesson_ids, data.completed)
         db.commit()
-        db.refresh(progress)
-        return progress
+        return db.query(Progress).filter(Progress.enrollment_id == enrollment.id, Progress.lesson_id.in_(lesson_ids)).all()
     except Exception as e:
         db.rollback()
         return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to update progress: {str(e)}"})
 
 
+@router.post("/progress/events")
+def record_progress_events(data: ProgressEventBatch, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Batched player heartbeats: events are coalesced per lesson and written with a single upsert."""
+    if current_user is None:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated"})
+    if not data.events or len(data.events) > progress_service.MAX_BATCH_EVENTS:
+        return JSONResponse(status_code=400, content={"success": False, "message": f"Provide between 1 and {progress_service.MAX_BATCH_EVENTS} events"})
+    try:
+        enrollment = db.query(Enrollment).filter(Enrollment.user_id == current_user.id, Enrollment.course_id == data.course_id).first()
+        if not enrollment:
+            return JSONResponse(status_code=403, content={"success": False, "message": "Not enrolled in this course"})
+
+        latest = progress_service.coalesce_events(data.events)
+        found = {lesson_id for (lesson_id,) in db.query(Lesson.id).filter(Lesson.course_id == data.course_id, Lesson.id.in_(latest))}
+        if len(found) != len(latest):
+            missing = ", ".join(str(lesson_id) for lesson_id in latest if lesson_id not in found)
+            return JSONResponse(status_code=404, content={"success": False, "message": f"Lessons not found in this course: {missing}"})
+
+        progress_service.record_events(db, enrollment, latest)
+        db.commit()
+        return {"success": True, "events": len(data.events), "lessons": len(latest)}
+    except Exception as e:
+        db.rollback()
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to record progress: {str(e)}"})
+
+
 @router.get("/{enrollment_id}/progress", response_model=list[ProgressOut])
 def get_progress(enrollment_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     if current_user is None:
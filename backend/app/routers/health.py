@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.services.minio_service import storage_status
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+def live():
+    """Liveness: the process is up and serving requests."""
+    return {"success": True, "status": "alive"}
+
+
+@router.get("/ready")
+def ready(db: Session = Depends(get_db)):
+    """Readiness: the database answers and the MinIO bucket has been prepared. 503 otherwise."""
+    checks = {}
+    try:
+        db.execute(text("SELECT 1"))
+        checks["database"] = {"ready": True, "error": None}
+    except Exception as e:
+        checks["database"] = {"ready": False, "error": str(e)}
+    checks["storage"] = storage_status()
+
+    is_ready = all(check["ready"] for check in checks.values())
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"success": is_ready, "status": "ready" if is_ready else "starting", "checks": checks},
+    )
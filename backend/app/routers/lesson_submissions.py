@@ -1,22 +1,29 @@
+import asyncio
 import json
+import time
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.course import Course
 from app.models.enrollment import Enrollment
 from app.models.lesson import Lesson
 from app.models.lesson_submission import LessonSubmission
 from app.models.user import User
 from app.schemas.schemas import LessonSubmissionCreate, LessonSubmissionOut
-from app.services.autograder_service import run_autograder
-from app.utils.auth import get_current_user
+from app.services import autograder_service, grading_queue
+from app.utils.auth import get_current_user, get_current_user_optional_async
 
 router = APIRouter(prefix="/api/lessons", tags=["Lesson Submissions"])
 
+MAX_LONG_POLL_SECONDS = 20
+LONG_POLL_INTERVAL_SECONDS = 0.5
+
 
 def _has_lesson_access(db: Session, lesson: Lesson, current_user: User) -> bool:
     if current_user.role == "admin":
@@ -57,6 +64,34 @@ def my_submissions(
     return submissions
 
 
+@router.get("/submissions/{submission_id}", response_model=LessonSubmissionOut)
+async def get_submission(
+    submission_id: int,
+    wait: int = Query(0, ge=0, le=MAX_LONG_POLL_SECONDS),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_optional_async),
+):
+    """Fetch one of the caller's submissions. With `wait`, long-poll until grading finishes.
+
+    Async so a waiting client holds neither a threadpool worker nor a pooled
+    connection between polls.
+    """
+    if current_user is None:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Not authenticated"})
+
+    deadline = time.monotonic() + wait
+    while True:
+        submission = (await db.execute(select(LessonSubmission).filter(LessonSubmission.id == submission_id))).scalar_one_or_none()
+        if not submission or (submission.user_id != current_user.id and current_user.role != "admin"):
+            return JSONResponse(status_code=404, content={"success": False, "message": "Submission not found"})
+        if submission.status not in grading_queue.IN_PROGRESS_STATUSES or time.monotonic() >= deadline:
+            return submission
+        # End the read transaction (returning the connection to the pool and expiring
+        # the row) so the next poll sees the worker's commit
+        await db.rollback()
+        await asyncio.sleep(LONG_POLL_INTERVAL_SECONDS)
+
+
 @router.post("/{lesson_id}/submit", response_model=LessonSubmissionOut, status_code=201)
 def submit_lesson(
     lesson_id: int,
@@ -129,24 +164,28 @@ def _submit_autograded_assignment(lesson: Lesson, payload: LessonSubmissionCreat
     if not payload.submission_code:
         return JSONResponse(status_code=400, content={"success": False, "message": "Code submission is required"})
 
-    result = run_autograder(
-        code=payload.submission_code,
-        language=lesson.autograde_language or "python",
-        tests_json=lesson.autograde_tests or "{}",
-    )
     submission = LessonSubmission(
         lesson_id=lesson.id,
         user_id=current_user.id,
         submission_type="assignment_autograded",
         submission_code=payload.submission_code,
-        status=result["status"],
-        score=result.get("score"),
-        max_score=result.get("max_score"),
-        feedback=result.get("feedback"),
-        graded_at=datetime.now(timezone.utc) if result["status"] != "pending_manual_review" else None,
     )
+    # Byte-identical code against the same tests was graded before: answer right away
+    cached = autograder_service.cached_result(
+        payload.submission_code, lesson.autograde_language or "python", lesson.autograde_tests or "{}"
+    )
+    if cached is not None:
+        grading_queue.apply_result(submission, cached)
+        db.add(submission)
+        db.commit()
+        db.refresh(submission)
+        return submission
+
+    # Otherwise grading runs on the autograder workers; clients poll GET /submissions/{id}
+    grading_queue.enqueue(db, submission)
     db.add(submission)
     db.commit()
+    grading_queue.notify()
     db.refresh(submission)
     return submission
 
@@ -1,60 +1,63 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from typing import Optional
+from sqlalchemy import case, exists, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_async_read_db
 from app.models.user import User
 from app.models.course import Course
 from app.models.lesson import Lesson
 from app.models.enrollment import Enrollment
 from app.schemas.schemas import LessonCreate, LessonUpdate, LessonOut
-from app.utils.auth import get_current_user, get_current_user_optional
+from app.services import autograder_service, course_stats_service, progress_service, video_packaging
+from app.utils.auth import get_current_user, get_current_user_optional_async
 
 router = APIRouter(prefix="/api", tags=["Lessons"])
 
 
+# Columns everyone may see; the rest of LessonOut is content for enrolled users only
+LESSON_OUTLINE_COLUMNS = (Lesson.id, Lesson.course_id, Lesson.title, Lesson.content_type, Lesson.order_index, Lesson.created_at)
+LESSON_CONTENT_COLUMNS = (
+    Lesson.content, Lesson.video_url, Lesson.hls_manifest_url, Lesson.pdf_url, Lesson.ppt_url,
+    Lesson.code_template, Lesson.quiz_data, Lesson.autograde_tests, Lesson.autograde_language,
+)
+
+
 @router.get("/courses/{course_id}/lessons", response_model=list[LessonOut])
-def list_lessons(
+async def list_lessons(
     course_id: int,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Optional[User] = Depends(get_current_user_optional_async)
 ):
+    # One statement: the course row (for the 404) outer-joined to its lessons, with
+    # the content columns projected according to the caller's access
+    if current_user is None:
+        # Guests only ever get the outline, so the content columns are not selected
+        content = ()
+    elif current_user.role == "admin":
+        content = LESSON_CONTENT_COLUMNS
+    else:
+        # Teacher or enrolled student. The uncorrelated EXISTS is evaluated once per query;
+        # for anyone else the CASE yields NULL, so large out-of-line values are never fetched
+        has_access = or_(
+            Course.teacher_id == current_user.id,
+            exists().where(Enrollment.user_id == current_user.id, Enrollment.course_id == course_id),
+        )
+        content = tuple(case((has_access, column), else_=None).label(column.key) for column in LESSON_CONTENT_COLUMNS)
     try:
-        course = db.query(Course).filter(Course.id == course_id).first()
-        if not course:
+        result = await db.execute(
+            select(*LESSON_OUTLINE_COLUMNS, *content)
+            .select_from(Course)
+            .outerjoin(Lesson, Lesson.course_id == Course.id)
+            .filter(Course.id == course_id)
+            .order_by(Lesson.order_index)
+        )
+        rows = result.all()
+        if not rows:
             return JSONResponse(status_code=404, content={"success": False, "message": "Course not found"})
-
-        lessons = db.query(Lesson).filter(Lesson.course_id == course_id).order_by(Lesson.order_index).all()
-
-        # Check access rights
-        has_access = False
-        if current_user:
-            if current_user.role == "admin":
-                has_access = True
-            elif course.teacher_id == current_user.id:
-                has_access = True
-            else:
-                # Check enrollment
-                enrollment = db.query(Enrollment).filter(
-                    Enrollment.user_id == current_user.id,
-                    Enrollment.course_id == course_id
-                ).first()
-                if enrollment:
-                    has_access = True
-
-        if not has_access:
-            # Redact content for unauthorized users
-            for lesson in lessons:
-                lesson.video_url = None
-                lesson.pdf_url = None
-                lesson.ppt_url = None
-                lesson.content = None
-                lesson.code_template = None
-                lesson.quiz_data = None
-                lesson.autograde_tests = None
-                lesson.autograde_language = None
-
-        return lessons
+        # A course without lessons comes back as a single row of NULL lesson columns
+        return [row for row in rows if row.id is not None]
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to list lessons: {str(e)}"})
 
@@ -72,7 +75,10 @@ def create_lesson(course_id: int, lesson_data: LessonCreate, db: Session = Depen
 
         lesson = Lesson(**lesson_data.model_dump(), course_id=course_id)
         db.add(lesson)
+        course_stats_service.record(db, course.id, lesson_count=1)
+        video_packaging.sync_lesson(db, lesson)
         db.commit()
+        video_packaging.notify()
         db.refresh(lesson)
         return lesson
     except Exception as e:
@@ -93,11 +99,18 @@ def update_lesson(lesson_id: int, lesson_data: LessonUpdate, db: Session = Depen
         if course.teacher_id != current_user.id and current_user.role != "admin":
             return JSONResponse(status_code=403, content={"success": False, "message": "Not authorized to update this lesson"})
 
+        previous_tests = lesson.autograde_tests
+        previous_video = lesson.video_url
         update_data = lesson_data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(lesson, key, value)
+        if lesson.video_url != previous_video:
+            video_packaging.sync_lesson(db, lesson)
 
         db.commit()
+        video_packaging.notify()
+        if lesson.autograde_tests != previous_tests:
+            autograder_service.invalidate_tests(previous_tests or "{}")
         db.refresh(lesson)
         return lesson
     except Exception as e:
@@ -118,7 +131,9 @@ def delete_lesson(lesson_id: int, db: Session = Depends(get_db), current_user: U
         if course.teacher_id != current_user.id and current_user.role != "admin":
             return JSONResponse(status_code=403, content={"success": False, "message": "Not authorized to delete this lesson"})
 
+        progress_service.lesson_removed(db, lesson.id)
         db.delete(lesson)
+        course_stats_service.record(db, course.id, lesson_count=-1)
         db.commit()
         return {"success": True, "message": "Lesson deleted"}
     except Exception as e:
@@ -9,6 +9,7 @@ from app.models.payment import Payment
 from app.models.enrollment import Enrollment
 from app.schemas.schemas import PaymentCreate, PaymentOut
 from app.utils.auth import get_current_user
+from app.services import course_stats_service, stats_service
 
 router = APIRouter(prefix="/api/payments", tags=["Payments"])
 
@@ -44,8 +45,9 @@ def create_payment(data: PaymentCreate, db: Session = Depends(get_db), current_u
         if not existing_enrollment:
             enrollment = Enrollment(user_id=current_user.id, course_id=data.course_id)
             db.add(enrollment)
-            course.total_students = (course.total_students or 0) + 1
 
+        course_stats_service.record(db, course.id, revenue=payment.amount, total_students=0 if existing_enrollment else 1)
+        stats_service.record(db, total_revenue=payment.amount, total_enrollments=0 if existing_enrollment else 1)
         db.commit()
         db.refresh(payment)
         return payment
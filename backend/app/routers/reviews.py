@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func as sql_func
-from app.database import get_db
+from sqlalchemy import select
+from app.database import get_db, get_async_read_db
 from app.models.user import User
 from app.models.course import Course
 from app.models.review import Review
 from app.schemas.schemas import ReviewCreate, ReviewOut
 from app.utils.auth import get_current_user
+from app.services import course_stats_service
 
 router = APIRouter(prefix="/api/reviews", tags=["Reviews"])
 
@@ -30,10 +32,7 @@ def create_review(data: ReviewCreate, db: Session = Depends(get_db), current_use
 
         review = Review(user_id=current_user.id, course_id=data.course_id, rating=data.rating, comment=data.comment)
         db.add(review)
-        db.flush()
-
-        avg = db.query(sql_func.avg(Review.rating)).filter(Review.course_id == data.course_id).scalar()
-        course.avg_rating = round(float(avg), 2) if avg else 0.0
+        course_stats_service.record(db, course.id, rating_sum=data.rating, rating_count=1)
 
         db.commit()
         db.refresh(review)
@@ -44,9 +43,12 @@ def create_review(data: ReviewCreate, db: Session = Depends(get_db), current_use
 
 
 @router.get("/course/{course_id}", response_model=list[ReviewOut])
-def get_course_reviews(course_id: int, db: Session = Depends(get_db)):
+async def get_course_reviews(course_id: int, db: AsyncSession = Depends(get_async_read_db)):
     try:
-        return db.query(Review).options(joinedload(Review.user)).filter(Review.course_id == course_id).order_by(Review.created_at.desc()).all()
+        result = await db.execute(
+            select(Review).options(joinedload(Review.user).joinedload(User.permissions)).filter(Review.course_id == course_id).order_by(Review.created_at.desc())
+        )
+        return result.scalars().all()
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to get reviews: {str(e)}"})
 
@@ -62,12 +64,8 @@ def delete_review(review_id: int, db: Session = Depends(get_db), current_user: U
         if review.user_id != current_user.id and current_user.role != "admin":
             return JSONResponse(status_code=403, content={"success": False, "message": "Not authorized to delete this review"})
 
-        course_id = review.course_id
         db.delete(review)
-
-        avg = db.query(sql_func.avg(Review.rating)).filter(Review.course_id == course_id).scalar()
-        course = db.query(Course).filter(Course.id == course_id).first()
-        course.avg_rating = round(float(avg), 2) if avg else 0.0
+        course_stats_service.record(db, review.course_id, rating_sum=-review.rating, rating_count=-1)
 
         db.commit()
         return {"success": True, "message": "Review deleted"}
@@ -6,8 +6,9 @@ from app.database import get_db
 from app.models.user import User
 from app.models.teacher_application import TeacherApplication
 from app.schemas.schemas import TeacherApplicationCreate, TeacherApplicationOut
-from app.utils.auth import get_current_user, require_permission
-from app.services.minio_service import upload_file as minio_upload
+from app.utils.auth import get_current_user, require_permission, invalidate_user
+from app.services.minio_service import upload_file_async as minio_upload
+from app.services import stats_service
 
 router = APIRouter(prefix="/api/teacher-applications", tags=["Teacher Applications"])
 
@@ -47,7 +48,7 @@ async def upload_resume(
         if not contents[:4] == b"%PDF":
             return JSONResponse(status_code=400, content={"success": False, "message": "Invalid PDF file"})
 
-        result = minio_upload(
+        result = await minio_upload(
             file_data=contents,
             folder="pdfs",
             original_filename=file.filename,
@@ -199,9 +200,11 @@ def approve_application(
         # Promote the user to teacher
         user = db.query(User).filter(User.id == app.user_id).first()
         if user:
+            stats_service.role_changed(db, user.role, "teacher")
             user.role = "teacher"
 
         db.commit()
+        invalidate_user(app.user_id)
         return {"success": True, "message": "Application approved. User has been promoted to teacher."}
     except Exception as e:
         db.rollback()
@@ -1,8 +1,34 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Query
+from fastapi import APIRouter, Depends, UploadFile, File, Query, Request, Header
 from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO
+from app.config import get_settings
+from app.database import get_db
 from app.models.user import User
+from app.schemas.schemas import PresignedUploadRequest, UploadComplete, ResumableUploadCreate, ResumableUploadOut
 from app.utils.auth import require_role
-from app.services.minio_service import upload_file, delete_file
+from app.services import image_service, resumable_upload_service
+from app.services.image_service import ImageProcessingError
+from app.services.resumable_upload_service import ResumableUploadError
+from app.services.minio_service import (
+    ALLOWED_FOLDERS,
+    delete_file,
+    delete_file_async,
+    new_object_name,
+    object_size,
+    presigned_upload,
+    promote,
+    public_url,
+    read_head,
+    read_object,
+    run_async,
+    sanitize_content_type,
+    staging_name,
+    upload_stream_async,
+)
 
 import re
 
@@ -11,6 +37,19 @@ router = APIRouter(prefix="/api/uploads", tags=["Uploads"])
 # Max upload size: 500 MB
 MAX_FILE_SIZE = 500 * 1024 * 1024
 
+# Thumbnails are decoded in full to render renditions, so they get a tighter limit
+MAX_THUMBNAIL_SIZE = 20 * 1024 * 1024
+THUMBNAIL_FOLDER = "thumbnails"
+INVALID_IMAGE_MESSAGE = "Thumbnails must be JPEG, PNG or WebP images"
+
+# Bytes read up front to check magic bytes and reject empty files
+HEAD_CHUNK_SIZE = 64 * 1024
+
+# Longest magic byte signature checked on completed direct uploads
+MAGIC_BYTES_PROBE_SIZE = 16
+
+UPLOAD_TOKEN_PURPOSE = "direct_upload"
+
 # Block dangerous executables by magic bytes
 BLOCKED_MAGIC_BYTES = [
     b"MZ",                      # Windows executables (.exe, .dll)
@@ -37,6 +76,38 @@ def _is_blocked(data: bytes) -> bool:
     return False
 
 
+class UploadTooLarge(Exception):
+    """Raised mid-stream once an upload passes MAX_FILE_SIZE."""
+
+
+class _LimitedReader:
+    """File-like view of an upload that replays the already-read head chunk and
+    raises UploadTooLarge as soon as more than `limit` bytes have been read."""
+
+    def __init__(self, source: BinaryIO, head: bytes, limit: int):
+        self._source = source
+        self._head = head
+        self._limit = limit
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if self._head:
+            if size < 0 or size >= len(self._head):
+                data, self._head = self._head, b""
+                if size < 0:
+                    data += self._source.read()
+                elif size > len(data):
+                    data += self._source.read(size - len(data))
+            else:
+                data, self._head = self._head[:size], self._head[size:]
+        else:
+            data = self._source.read(size)
+        self.bytes_read += len(data)
+        if self.bytes_read > self._limit:
+            raise UploadTooLarge()
+        return data
+
+
 def _validate_object_name(object_name: str) -> bool:
     """Validate object_name to prevent path traversal on deletion."""
     if not object_name or ".." in object_name:
@@ -50,7 +121,12 @@ async def upload(
     folder: str = Query("materials", regex="^(thumbnails|pdfs|videos|materials)$"),
     current_user: User = Depends(require_role(["teacher", "admin"])),
 ):
-    """Upload any file to MinIO. Returns the public URL and object name."""
+    """Upload any file to MinIO. Returns the public URL and object name.
+
+    The file is streamed to MinIO as a multipart upload, so memory use per request
+    stays around one part (MINIO_UPLOAD_PART_SIZE) whatever the file size.
+    Thumbnails additionally get resized renditions, returned as `renditions`.
+    """
     if current_user is None:
         return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers and admins can upload files"})
 
@@ -58,31 +134,288 @@ async def upload(
         if not file.filename:
             return JSONResponse(status_code=400, content={"success": False, "message": "No filename provided"})
 
-        contents = await file.read()
+        if file.size is not None and file.size > MAX_FILE_SIZE:
+            return JSONResponse(status_code=400, content={"success": False, "message": "File too large. Maximum size is 500 MB"})
+        is_thumbnail = folder == THUMBNAIL_FOLDER
+        if is_thumbnail and file.size is not None and file.size > MAX_THUMBNAIL_SIZE:
+            return JSONResponse(status_code=400, content={"success": False, "message": "Thumbnail too large. Maximum size is 20 MB"})
+
+        head = await file.read(HEAD_CHUNK_SIZE)
 
-        if len(contents) == 0:
+        if len(head) == 0:
             return JSONResponse(status_code=400, content={"success": False, "message": "Empty file is not allowed"})
 
-        if len(contents) > MAX_FILE_SIZE:
-            return JSONResponse(status_code=400, content={"success": False, "message": "File too large. Maximum size is 500 MB"})
-
-        if _is_blocked(contents):
+        if _is_blocked(head):
             return JSONResponse(status_code=400, content={"success": False, "message": "Executable files are not allowed"})
 
         safe_name = _sanitize_filename(file.filename)
-        result = upload_file(
-            file_data=contents,
-            folder=folder,
-            original_filename=safe_name,
-            content_type=file.content_type or "application/octet-stream",
+        reader = _LimitedReader(file.file, head, MAX_THUMBNAIL_SIZE if is_thumbnail else MAX_FILE_SIZE)
+        result = await upload_stream_async(
+            reader,
+            folder,
+            safe_name,
+            file.content_type or "application/octet-stream",
+        )
+        response = {"success": True, "url": result["url"], "object_name": result["object_name"], "size": reader.bytes_read}
+
+        if is_thumbnail:
+            await file.seek(0)
+            try:
+                response["renditions"] = await image_service.create_renditions_async(result["object_name"], await file.read())
+            except ImageProcessingError:
+                await delete_file_async(result["object_name"])
+                return JSONResponse(status_code=400, content={"success": False, "message": INVALID_IMAGE_MESSAGE})
+
+        return response
+
+    except UploadTooLarge:
+        limit = "20 MB" if folder == THUMBNAIL_FOLDER else "500 MB"
+        return JSONResponse(status_code=400, content={"success": False, "message": f"File too large. Maximum size is {limit}"})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Upload failed: {str(e)}"})
+
+
+@router.post("/presign")
+def presign_upload(
+    payload: PresignedUploadRequest,
+    current_user: User = Depends(require_role(["teacher", "admin"])),
+):
+    """Issue a presigned POST form so the browser uploads straight to MinIO.
+
+    MinIO enforces the object key, content type and size from the signed policy.
+    The file lands under a private staging name; it becomes public at `object_name`
+    only after the upload_token is sent to /complete and the checks pass.
+    """
+    if current_user is None:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers and admins can upload files"})
+    try:
+        if not payload.filename:
+            return JSONResponse(status_code=400, content={"success": False, "message": "No filename provided"})
+        if payload.folder not in ALLOWED_FOLDERS:
+            return JSONResponse(status_code=400, content={"success": False, "message": "Invalid folder"})
+        if payload.size <= 0:
+            return JSONResponse(status_code=400, content={"success": False, "message": "Empty file is not allowed"})
+        if payload.size > MAX_FILE_SIZE:
+            return JSONResponse(status_code=400, content={"success": False, "message": "File too large. Maximum size is 500 MB"})
+        if payload.folder == THUMBNAIL_FOLDER and payload.size > MAX_THUMBNAIL_SIZE:
+            return JSONResponse(status_code=400, content={"success": False, "message": "Thumbnail too large. Maximum size is 20 MB"})
+
+        settings = get_settings()
+        object_name = new_object_name(payload.folder, _sanitize_filename(payload.filename))
+        content_type = sanitize_content_type(payload.content_type)
+        form = presigned_upload(staging_name(object_name), content_type, payload.size, settings.PRESIGNED_UPLOAD_EXPIRE_MINUTES)
+
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.PRESIGNED_UPLOAD_EXPIRE_MINUTES)
+        upload_token = jwt.encode(
+            {
+                "purpose": UPLOAD_TOKEN_PURPOSE,
+                "sub": str(current_user.id),
+                "object_name": object_name,
+                "max_size": payload.size,
+                # Completion may come a little after the form itself expires
+                "exp": expires_at + timedelta(minutes=settings.PRESIGNED_UPLOAD_EXPIRE_MINUTES),
+            },
+            settings.SECRET_KEY,
+            algorithm=settings.ALGORITHM,
         )
+        return {
+            "success": True,
+            "upload_url": form["url"],
+            "fields": form["fields"],
+            "object_name": object_name,
+            "upload_token": upload_token,
+            "expires_at": expires_at.isoformat(),
+        }
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to prepare upload: {str(e)}"})
+
 
-        return {"success": True, "url": result["url"], "object_name": result["object_name"], "size": len(contents)}
+@router.post("/complete")
+def complete_upload(
+    payload: UploadComplete,
+    current_user: User = Depends(require_role(["teacher", "admin"])),
+):
+    """Publish a direct upload after checking its size and magic bytes.
+
+    The staged object is copied to its public name only if the checks pass and is
+    deleted otherwise. Returns the same body as POST /.
+    """
+    if current_user is None:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers and admins can upload files"})
+    settings = get_settings()
+    try:
+        claims = jwt.decode(payload.upload_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return JSONResponse(status_code=400, content={"success": False, "message": "Invalid or expired upload token"})
+    if claims.get("purpose") != UPLOAD_TOKEN_PURPOSE or claims.get("sub") != str(current_user.id):
+        return JSONResponse(status_code=400, content={"success": False, "message": "Invalid or expired upload token"})
 
+    object_name = claims["object_name"]
+    staged = staging_name(object_name)
+    try:
+        head = read_head(staged, MAGIC_BYTES_PROBE_SIZE)
+        if head is None:
+            # A repeated /complete after the object was already published
+            published_size = object_size(object_name)
+            if published_size is not None:
+                return {"success": True, "url": public_url(object_name), "object_name": object_name, "size": published_size}
+            return JSONResponse(status_code=400, content={"success": False, "message": "Upload not found"})
+        size, first_bytes = head
+
+        error = None
+        if size == 0:
+            error = "Empty file is not allowed"
+        elif size > min(claims["max_size"], MAX_FILE_SIZE):
+            error = "File too large. Maximum size is 500 MB"
+        elif _is_blocked(first_bytes):
+            error = "Executable files are not allowed"
+        if error:
+            delete_file(staged)
+            return JSONResponse(status_code=400, content={"success": False, "message": error})
+
+        response = {"success": True, "url": public_url(object_name), "object_name": object_name, "size": size}
+        if object_name.startswith(THUMBNAIL_FOLDER + "/"):
+            try:
+                response["renditions"] = image_service.create_renditions(object_name, read_object(staged))
+            except ImageProcessingError:
+                delete_file(staged)
+                return JSONResponse(status_code=400, content={"success": False, "message": INVALID_IMAGE_MESSAGE})
+        promote(staged, object_name)
+        return response
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "message": f"Upload failed: {str(e)}"})
 
 
+def _resumable_out(upload) -> dict:
+    return ResumableUploadOut(
+        upload_id=upload.id,
+        object_name=upload.object_name,
+        size=upload.total_size,
+        chunk_size=upload.chunk_size,
+        offset=upload.received_bytes,
+    ).model_dump()
+
+
+@router.post("/resumable", status_code=201)
+def create_resumable_upload(
+    payload: ResumableUploadCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(["teacher", "admin"])),
+):
+    """Start a resumable upload. Send chunks of `chunk_size` bytes with PATCH, then POST /complete."""
+    if current_user is None:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers and admins can upload files"})
+    try:
+        if not payload.filename:
+            return JSONResponse(status_code=400, content={"success": False, "message": "No filename provided"})
+        if payload.folder not in ALLOWED_FOLDERS:
+            return JSONResponse(status_code=400, content={"success": False, "message": "Invalid folder"})
+        if payload.folder == THUMBNAIL_FOLDER:
+            return JSONResponse(status_code=400, content={"success": False, "message": "Upload thumbnails with POST /api/uploads/"})
+        if payload.size <= 0:
+            return JSONResponse(status_code=400, content={"success": False, "message": "Empty file is not allowed"})
+        if payload.size > MAX_FILE_SIZE:
+            return JSONResponse(status_code=400, content={"success": False, "message": "File too large. Maximum size is 500 MB"})
+
+        upload = resumable_upload_service.create(
+            db, current_user.id, payload.folder, _sanitize_filename(payload.filename), payload.content_type, payload.size
+        )
+        return {"success": True, **_resumable_out(upload)}
+    except Exception as e:
+        db.rollback()
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to start upload: {str(e)}"})
+
+
+@router.get("/resumable/{upload_id}")
+def get_resumable_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(["teacher", "admin"])),
+):
+    """Report how many bytes were received, i.e. the offset to resume from."""
+    if current_user is None:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers and admins can upload files"})
+    try:
+        upload = resumable_upload_service.get(db, upload_id, current_user.id)
+        return {"success": True, **_resumable_out(upload)}
+    except ResumableUploadError as e:
+        return JSONResponse(status_code=e.status_code, content={"success": False, "message": e.message})
+
+
+@router.patch("/resumable/{upload_id}")
+async def upload_resumable_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(["teacher", "admin"])),
+):
+    """Append the raw request body as the chunk starting at the Upload-Offset header."""
+    if current_user is None:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers and admins can upload files"})
+    try:
+        # Detached, so no pooled connection is held while the client sends the body
+        upload = await run_in_threadpool(resumable_upload_service.get_detached, db, upload_id, current_user.id)
+
+        # Never buffer more than one chunk
+        data = bytearray()
+        async for piece in request.stream():
+            data.extend(piece)
+            if len(data) > upload.chunk_size:
+                return JSONResponse(status_code=400, content={"success": False, "message": f"Chunks must be at most {upload.chunk_size} bytes"})
+        data = bytes(data)
+
+        end = resumable_upload_service.check_chunk(upload, upload_offset, data, _is_blocked)
+        await run_async(resumable_upload_service.store_chunk, upload, upload_offset, data)
+        offset = await run_in_threadpool(resumable_upload_service.record_chunk, db, upload.id, upload_offset, end)
+        return {"success": True, "offset": offset, "size": upload.total_size}
+    except ResumableUploadError as e:
+        return JSONResponse(status_code=e.status_code, content={"success": False, "message": e.message})
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Upload failed: {str(e)}"})
+
+
+@router.post("/resumable/{upload_id}/complete")
+def complete_resumable_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(["teacher", "admin"])),
+):
+    """Assemble the received chunks into the final object. Returns the same body as POST /."""
+    if current_user is None:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers and admins can upload files"})
+    try:
+        upload = resumable_upload_service.get(db, upload_id, current_user.id)
+        result = resumable_upload_service.complete(db, upload)
+        return {"success": True, "url": result["url"], "object_name": result["object_name"], "size": result["size"]}
+    except ResumableUploadError as e:
+        return JSONResponse(status_code=e.status_code, content={"success": False, "message": e.message})
+    except Exception as e:
+        db.rollback()
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Upload failed: {str(e)}"})
+
+
+@router.delete("/resumable/{upload_id}")
+def abort_resumable_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(["teacher", "admin"])),
+):
+    """Cancel a resumable upload and discard its chunks."""
+    if current_user is None:
+        return JSONResponse(status_code=403, content={"success": False, "message": "Only teachers and admins can upload files"})
+    try:
+        upload = resumable_upload_service.get(db, upload_id, current_user.id)
+        resumable_upload_service.abort(db, upload)
+        return {"success": True, "message": "Upload cancelled"}
+    except ResumableUploadError as e:
+        return JSONResponse(status_code=e.status_code, content={"success": False, "message": e.message})
+    except Exception as e:
+        db.rollback()
+        return JSONResponse(status_code=500, content={"success": False, "message": f"Failed to cancel upload: {str(e)}"})
+
+
 @router.delete("/{object_name:path}")
 def remove_file(
     object_name: str,
@@ -95,6 +428,8 @@ def remove_file(
         if not _validate_object_name(object_name):
             return JSONResponse(status_code=400, content={"success": False, "message": "Invalid file path"})
         delete_file(object_name)
+        if object_name.startswith(THUMBNAIL_FOLDER + "/"):
+            image_service.delete_renditions(object_name)
         return {"success": True, "message": "File deleted"}
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "message": f"Delete failed: {str(e)}"})
@@ -5,7 +5,7 @@ from typing import Optional
 from app.database import get_db
 from app.models.user import User
 from app.schemas.schemas import UserOut, UserUpdate
-from app.utils.auth import get_current_user, require_role
+from app.utils.auth import get_current_user, require_role, invalidate_user
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
@@ -53,6 +53,7 @@ def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_d
             setattr(user, key, value)
 
         db.commit()
+        invalidate_user(user.id)
         db.refresh(user)
         return user
     except Exception as e:
@@ -70,6 +71,7 @@ def delete_user(user_id: int, db: Session = Depends(get_db), current_user: User
             return JSONResponse(status_code=404, content={"success": False, "message": "User not found"})
         user.is_active = False
         db.commit()
+        invalidate_user(user.id)
         return {"success": True, "message": "User deactivated"}
     except Exception as e:
         db.rollback()
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, computed_field
 from typing import Optional
 from datetime import datetime
+from app.utils.storage_urls import rendition_urls
 
 
 # --- Auth ---
@@ -106,14 +107,27 @@ class CourseOut(BaseModel):
     status: str
     avg_rating: float
     total_students: int
+    rating_count: int = 0
+    lesson_count: int = 0
     created_at: datetime
     teacher: Optional[UserOut] = None
     category: Optional[CategoryOut] = None
 
+    @computed_field
+    @property
+    def thumbnail_renditions(self) -> Optional[dict[str, dict[str, str]]]:
+        """Resized WebP/JPEG thumbnail URLs as {format: {width: url}}; None for external thumbnails."""
+        return rendition_urls(self.thumbnail_url)
+
     class Config:
         from_attributes = True
 
 
+class CoursePage(BaseModel):
+    items: list[CourseOut]
+    next_cursor: Optional[str] = None
+
+
 # --- Lesson ---
 class LessonCreate(BaseModel):
     title: str
@@ -150,6 +164,7 @@ class LessonOut(BaseModel):
     content_type: str
     content: Optional[str] = None
     video_url: Optional[str] = None
+    hls_manifest_url: Optional[str] = None  # adaptive-bitrate stream, once packaged
     pdf_url: Optional[str] = None
     ppt_url: Optional[str] = None
     code_template: Optional[str] = None
@@ -174,6 +189,7 @@ class EnrollmentOut(BaseModel):
     course_id: int
     enrolled_at: datetime
     completed: bool
+    completed_lessons: int = 0
     course: Optional[CourseOut] = None
 
     class Config:
@@ -186,12 +202,30 @@ class ProgressUpdate(BaseModel):
     completed: bool = True
 
 
+class ProgressBulkUpdate(BaseModel):
+    course_id: int
+    lesson_ids: list[int]
+    completed: bool = True
+
+
+class ProgressEvent(BaseModel):
+    lesson_id: int
+    completed: Optional[bool] = None
+    position_seconds: Optional[float] = Field(default=None, ge=0, allow_inf_nan=False)
+
+
+class ProgressEventBatch(BaseModel):
+    course_id: int
+    events: list[ProgressEvent]
+
+
 class ProgressOut(BaseModel):
     id: int
     enrollment_id: int
     lesson_id: int
     completed: bool
     completed_at: Optional[datetime] = None
+    position_seconds: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -366,3 +400,30 @@ class PlacementStatOut(PlacementStatBase):
 
     class Config:
         from_attributes = True
+
+
+# --- Uploads ---
+class PresignedUploadRequest(BaseModel):
+    filename: str
+    folder: str = "materials"
+    content_type: str = "application/octet-stream"
+    size: int
+
+
+class UploadComplete(BaseModel):
+    upload_token: str
+
+
+class ResumableUploadCreate(BaseModel):
+    filename: str
+    folder: str = "videos"
+    content_type: str = "application/octet-stream"
+    size: int
+
+
+class ResumableUploadOut(BaseModel):
+    upload_id: str
+    object_name: str
+    size: int
+    chunk_size: int
+    offset: int
@@ -1,15 +1,143 @@
+import hashlib
 import json
 import os
 import subprocess
 import tempfile
-from typing import Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
 
+from app.services import metrics_service, sandbox_pool
 
 DEFAULT_AUTOGRADER_IMAGE = os.getenv("AUTOGRADER_IMAGE", "python:3.11-alpine")
 DEFAULT_AUTOGRADER_TIMEOUT = int(os.getenv("AUTOGRADER_TIMEOUT_SECONDS", "5"))
+# "harness": one container per submission running every case; "per_case": one container per case
+AUTOGRADER_MODE = os.getenv("AUTOGRADER_MODE", "harness")
+DOCKER_PROBE_TTL_SECONDS = int(os.getenv("AUTOGRADER_DOCKER_PROBE_TTL_SECONDS", "60"))
+# Seconds allowed for the container itself to start on top of the per-case budget
+CONTAINER_STARTUP_GRACE_SECONDS = 10
+MAX_CASE_OUTPUT_CHARS = 65536
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("AUTOGRADER_RESULT_CACHE_MAX_ENTRIES", "2048"))
+
+_docker_probe = {"available": False, "expires_at": 0.0}
+_docker_probe_lock = threading.Lock()
+
+
+class _ResultCache:
+    """LRU of grading results keyed by sha256(code, language, tests, image).
+
+    Grading is deterministic for a given key, so identical resubmissions (and
+    identical code across a cohort) reuse the first result. Keys are also
+    indexed by tests digest so a lesson's entries can be dropped when its tests
+    are edited.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[str, dict[str, Any]]]" = OrderedDict()
+        self._by_tests: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: str, tests_digest: str, result: dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (tests_digest, dict(result))
+            self._entries.move_to_end(key)
+            self._by_tests.setdefault(tests_digest, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                evicted, (evicted_digest, _) = self._entries.popitem(last=False)
+                keys = self._by_tests.get(evicted_digest)
+                if keys is not None:
+                    keys.discard(evicted)
+                    if not keys:
+                        del self._by_tests[evicted_digest]
+
+    def invalidate_tests(self, tests_digest: str) -> int:
+        with self._lock:
+            keys = self._by_tests.pop(tests_digest, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            return len(keys)
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+_result_cache = _ResultCache(RESULT_CACHE_MAX_ENTRIES)
+
+metrics_service.describe("autograder_cache_hits_total", "counter", "Autograder runs answered from the result cache")
+metrics_service.describe("autograder_cache_misses_total", "counter", "Autograder runs that had to execute code")
+metrics_service.describe("autograder_cache_hit_ratio", "gauge", "Share of autograder runs answered from the result cache")
+metrics_service.describe("autograder_cache_entries", "gauge", "Grading results held in the result cache")
+metrics_service.register_collector(lambda: {
+    "autograder_cache_hits_total": _result_cache.hits,
+    "autograder_cache_misses_total": _result_cache.misses,
+    "autograder_cache_hit_ratio": _result_cache.hit_ratio(),
+    "autograder_cache_entries": len(_result_cache),
+})
+
+
+def _digest(*parts: str) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        encoded = (part or "").encode("utf-8")
+        hasher.update(len(encoded).to_bytes(8, "big"))  # length-prefix so parts cannot run together
+        hasher.update(encoded)
+    return hasher.hexdigest()
+
+
+def _cache_key(code: str, language: str, tests_json: str) -> str:
+    return _digest(code, language, tests_json, DEFAULT_AUTOGRADER_IMAGE)
+
+
+def cached_result(code: str, language: str, tests_json: str) -> Optional[dict[str, Any]]:
+    """Result of an identical earlier run, or None. Misses are counted when the job actually runs."""
+    return _result_cache.get(_cache_key(code, language, tests_json), count_miss=False)
+
+
+def invalidate_tests(tests_json: Optional[str]) -> int:
+    """Drop cached results graded against these tests; call when a lesson's tests change."""
+    return _result_cache.invalidate_tests(_digest(tests_json))
+
+
+def _is_cacheable(result: dict[str, Any]) -> bool:
+    # Timeouts and sandbox failures depend on host load rather than on the code, so rerun those
+    if result["status"] not in ("passed", "failed") or "cases" not in result:
+        return False
+    return all(not case["timeout"] and case["returncode"] != -1 for case in result["cases"])
 
 
 def run_autograder(code: str, language: str, tests_json: str) -> dict[str, Any]:
+    key = _cache_key(code, language, tests_json)
+    cached = _result_cache.get(key)
+    if cached is not None:
+        return cached
+    result = _grade(code, language, tests_json)
+    if _is_cacheable(result):
+        _result_cache.put(key, _digest(tests_json), result)
+    return result
+
+
+def _grade(code: str, language: str, tests_json: str) -> dict[str, Any]:
     if language != "python":
         return {
             "status": "failed",
@@ -48,33 +176,36 @@ def run_autograder(code: str, language: str, tests_json: str) -> dict[str, Any]:
 
     passed = 0
     feedback_lines = []
+    case_results = []
+    stdins = [str(case.get("input", "")) for case in test_cases]
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        code_path = os.path.join(tmpdir, "solution.py")
-        with open(code_path, "w", encoding="utf-8") as handle:
-            handle.write(code)
-
-        for index, case in enumerate(test_cases, start=1):
-            expected_output = str(case.get("expected_output", "")).strip()
-            stdin = str(case.get("input", ""))
-            result = _run_python_in_container(tmpdir, stdin)
+    results = None
+    pool = sandbox_pool.get_pool()
+    if pool is not None:
+        results = pool.run(code, stdins, DEFAULT_AUTOGRADER_TIMEOUT, MAX_CASE_OUTPUT_CHARS)
+    if results is None:
+        results = _run_cold(code, stdins)
 
-            if result["timeout"]:
-                feedback_lines.append(f"Test {index}: timed out.")
-                continue
-            if result["returncode"] != 0:
-                stderr = result["stderr"].strip() or "Runtime error"
-                feedback_lines.append(f"Test {index}: runtime error: {stderr}")
-                continue
+    for index, (case, result) in enumerate(zip(test_cases, results), start=1):
+        expected_output = str(case.get("expected_output", "")).strip()
+        case_passed = False
 
+        if result["timeout"]:
+            feedback_lines.append(f"Test {index}: timed out.")
+        elif result["returncode"] != 0:
+            stderr = result["stderr"].strip() or "Runtime error"
+            feedback_lines.append(f"Test {index}: runtime error: {stderr}")
+        else:
             actual_output = result["stdout"].strip()
             if actual_output == expected_output:
+                case_passed = True
                 passed += 1
                 feedback_lines.append(f"Test {index}: passed.")
             else:
                 feedback_lines.append(
                     f"Test {index}: expected `{expected_output}` but got `{actual_output}`."
                 )
+        case_results.append({"index": index, "passed": case_passed, "timeout": result["timeout"], "returncode": result["returncode"]})
 
     max_score = float(len(test_cases))
     score = float(passed)
@@ -84,48 +215,103 @@ def run_autograder(code: str, language: str, tests_json: str) -> dict[str, Any]:
         "score": score,
         "max_score": max_score,
         "feedback": "\n".join(feedback_lines),
+        "cases": case_results,
     }
 
 
+def _run_cold(code: str, stdins: list[str]) -> list[dict[str, Any]]:
+    """Grade in freshly started container(s)."""
+    if AUTOGRADER_MODE == "per_case":
+        with tempfile.TemporaryDirectory() as tmpdir:
+            code_path = os.path.join(tmpdir, "solution.py")
+            with open(code_path, "w", encoding="utf-8") as handle:
+                handle.write(code)
+            return [_run_python_in_container(tmpdir, stdin) for stdin in stdins]
+    return _run_harness_in_container(code, stdins)
+
+
 def _docker_available() -> bool:
-    try:
-        completed = subprocess.run(
-            ["docker", "version"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-            check=False,
-        )
-        return completed.returncode == 0
-    except Exception:
-        return False
+    """Probe `docker version`, caching the answer for DOCKER_PROBE_TTL_SECONDS."""
+    with _docker_probe_lock:
+        if time.monotonic() < _docker_probe["expires_at"]:
+            return _docker_probe["available"]
+        try:
+            completed = subprocess.run(
+                ["docker", "version"],
+                capture_output=True,
+                text=True,
+                timeout=5,
+                check=False,
+            )
+            available = completed.returncode == 0
+        except Exception:
+            available = False
+        _docker_probe.update(available=available, expires_at=time.monotonic() + DOCKER_PROBE_TTL_SECONDS)
+        return available
 
 
-def _run_python_in_container(tmpdir: str, stdin: str) -> dict[str, Any]:
-    command = [
+def _sandbox_command(tmpdir: str, *args: str) -> list[str]:
+    return [
         "docker",
         "run",
         "--rm",
         "--network",
         "none",
         "--memory",
-        "128m",
+        sandbox_pool.SANDBOX_MEMORY,
         "--cpus",
-        "0.5",
+        sandbox_pool.SANDBOX_CPUS,
         "-v",
         f"{tmpdir}:/workspace:ro",
         "-w",
         "/workspace",
         DEFAULT_AUTOGRADER_IMAGE,
         "python",
-        "solution.py",
+        *args,
+    ]
+
+
+def _run_harness_in_container(code: str, stdins: list[str]) -> list[dict[str, Any]]:
+    """Run every case in one container via sandbox_pool.HARNESS_SOURCE; one result dict per case."""
+    command = [
+        "docker",
+        "run",
+        "-i",
+        "--rm",
+        "--network",
+        "none",
+        "--memory",
+        sandbox_pool.SANDBOX_MEMORY,
+        "--cpus",
+        sandbox_pool.SANDBOX_CPUS,
+        "--tmpfs",
+        "/workspace:rw,exec,size=16m",
+        "-w",
+        "/",
+        DEFAULT_AUTOGRADER_IMAGE,
     ]
+    # Per-case runs are a few ms apart, so the case timeouts bound the whole run
+    budget = DEFAULT_AUTOGRADER_TIMEOUT * len(stdins) + CONTAINER_STARTUP_GRACE_SECONDS
+    results, _ = sandbox_pool.run_harness(command, code, stdins, DEFAULT_AUTOGRADER_TIMEOUT, MAX_CASE_OUTPUT_CHARS, budget)
+    return results
+
+
+def _decode(output) -> str:
+    # TimeoutExpired carries raw bytes even when text=True
+    if isinstance(output, bytes):
+        return output.decode("utf-8", errors="replace")
+    return output or ""
+
+
+def _run_python_in_container(tmpdir: str, stdin: str) -> dict[str, Any]:
+    command = _sandbox_command(tmpdir, "solution.py")
     try:
         completed = subprocess.run(
             command,
             input=stdin,
             capture_output=True,
             text=True,
+            errors="replace",
             timeout=DEFAULT_AUTOGRADER_TIMEOUT,
             check=False,
         )
@@ -137,8 +323,8 @@ def _run_python_in_container(tmpdir: str, stdin: str) -> dict[str, Any]:
         }
     except subprocess.TimeoutExpired as exc:
         return {
-            "stdout": exc.stdout or "",
-            "stderr": exc.stderr or "",
+            "stdout": _decode(exc.stdout)[:MAX_CASE_OUTPUT_CHARS],
+            "stderr": _decode(exc.stderr)[:MAX_CASE_OUTPUT_CHARS],
             "returncode": -1,
             "timeout": True,
         }
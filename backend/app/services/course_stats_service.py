@@ -0,0 +1,70 @@
+"""Per-course counters stored on the ``courses`` row.
+
+``rating_sum``, ``rating_count``, ``total_students``, ``lesson_count`` and ``revenue``
+are kept current by the write paths through ``record``, which applies one atomic
+``UPDATE courses SET x = x + :delta`` in the caller's transaction (``avg_rating`` is
+derived in the same statement). The catalog and teacher analytics read them instead
+of aggregating enrollments, reviews, lessons and payments. ``reconcile`` recomputes
+them from the source tables.
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy import case, func as sql_func, literal_column, select, update
+from sqlalchemy.orm import Session
+
+from app.models.course import Course
+from app.models.enrollment import Enrollment
+from app.models.lesson import Lesson
+from app.models.payment import Payment
+from app.models.review import Review
+
+COUNTERS = ("rating_sum", "rating_count", "total_students", "lesson_count", "revenue")
+
+
+def _avg_rating(rating_sum, rating_count):
+    # 1.0 as a literal keeps the division numeric on PostgreSQL (round() has no
+    # double precision overload) and real on SQLite
+    return case(
+        (rating_count > 0, sql_func.round(rating_sum * literal_column("1.0") / rating_count, 2)),
+        else_=0.0,
+    )
+
+
+def record(db: Session, course_id: int, **deltas):
+    """Atomically add `deltas` (counter name -> amount) to one course in the caller's transaction."""
+    deltas = {name: amount for name, amount in deltas.items() if amount}
+    if not deltas:
+        return
+    unknown = set(deltas) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown course counters: {', '.join(sorted(unknown))}")
+    values = {getattr(Course, name): getattr(Course, name) + amount for name, amount in deltas.items()}
+    if "rating_sum" in deltas or "rating_count" in deltas:
+        # SET expressions see the row as it was before this UPDATE
+        values[Course.avg_rating] = _avg_rating(
+            Course.rating_sum + deltas.get("rating_sum", 0),
+            Course.rating_count + deltas.get("rating_count", 0),
+        )
+    db.query(Course).filter(Course.id == course_id).update(values, synchronize_session=False)
+
+
+def reconcile(db: Session, course_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute the counters (all courses, or just `course_ids`) in bulk; returns the courses updated."""
+    def scalar(column, model, *criteria):
+        return select(column).where(model.course_id == Course.id, *criteria).scalar_subquery()
+
+    counters = update(Course).values(
+        total_students=scalar(sql_func.count(Enrollment.id), Enrollment),
+        rating_sum=sql_func.coalesce(scalar(sql_func.sum(Review.rating), Review), 0),
+        rating_count=scalar(sql_func.count(Review.id), Review),
+        lesson_count=scalar(sql_func.count(Lesson.id), Lesson),
+        revenue=sql_func.coalesce(scalar(sql_func.sum(Payment.amount), Payment, Payment.status == "completed"), 0.0),
+    )
+    ratings = update(Course).values(avg_rating=_avg_rating(Course.rating_sum, Course.rating_count))
+    if course_ids is not None:
+        course_ids = list(course_ids)
+        counters = counters.where(Course.id.in_(course_ids))
+        ratings = ratings.where(Course.id.in_(course_ids))
+    updated = db.execute(counters.execution_options(synchronize_session=False)).rowcount
+    db.execute(ratings.execution_options(synchronize_session=False))
+    return updated
@@ -0,0 +1,195 @@
+"""Database-backed queue for autograded submissions.
+
+Submissions are stored with status "queued" and graded by a pool of worker
+threads. Workers claim one row at a time (``FOR UPDATE SKIP LOCKED`` on
+PostgreSQL plus a conditional status update, so several API processes can
+share the queue), run the autograder and write the result back. Because the
+queue is the lesson_submissions table itself, jobs survive restarts: rows left
+in "grading" by a dead worker are requeued once their lease expires. A job that
+raises is requeued at once. Either way, a submission that has used up
+AUTOGRADER_MAX_ATTEMPTS goes to manual review instead.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.lesson import Lesson
+from app.models.lesson_submission import LessonSubmission
+from app.services import metrics_service
+from app.services.autograder_service import run_autograder
+
+AUTOGRADER_WORKERS = int(os.getenv("AUTOGRADER_WORKERS", "2"))
+AUTOGRADER_POLL_SECONDS = float(os.getenv("AUTOGRADER_POLL_SECONDS", "2"))
+AUTOGRADER_LEASE_SECONDS = int(os.getenv("AUTOGRADER_LEASE_SECONDS", "300"))
+AUTOGRADER_MAX_ATTEMPTS = int(os.getenv("AUTOGRADER_MAX_ATTEMPTS", "3"))
+
+QUEUED = "queued"
+GRADING = "grading"
+IN_PROGRESS_STATUSES = (QUEUED, GRADING)
+
+_wakeup = threading.Event()
+_workers: list[threading.Thread] = []
+
+metrics_service.describe("autograder_queue_depth", "gauge", "Autograded submissions waiting for a worker")
+metrics_service.describe("autograder_jobs_total", "counter", "Autograder jobs finished, by outcome")
+metrics_service.describe("autograder_job_seconds", "summary", "Autograder job run time")
+
+
+def enqueue(db: Session, submission: LessonSubmission):
+    """Mark a new submission as queued; the caller commits, then workers are woken."""
+    submission.status = QUEUED
+    submission.attempts = 0
+
+
+def notify():
+    _wakeup.set()
+
+
+def queue_depth(db: Session) -> int:
+    return db.query(LessonSubmission).filter(LessonSubmission.status == QUEUED).count()
+
+
+def _claim(db: Session):
+    """Claim the oldest queued submission, or return None."""
+    candidate = (
+        db.query(LessonSubmission.id)
+        .filter(LessonSubmission.status == QUEUED)
+        .order_by(LessonSubmission.id.asc())
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if candidate is None:
+        db.rollback()
+        return None
+    claimed = (
+        db.query(LessonSubmission)
+        .filter(LessonSubmission.id == candidate.id, LessonSubmission.status == QUEUED)
+        .update(
+            {
+                LessonSubmission.status: GRADING,
+                LessonSubmission.locked_at: datetime.now(timezone.utc),
+                LessonSubmission.attempts: LessonSubmission.attempts + 1,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if not claimed:
+        return None
+    return db.query(LessonSubmission).filter(LessonSubmission.id == candidate.id).first()
+
+
+def _grade(db: Session, submission: LessonSubmission):
+    lesson = db.query(Lesson).filter(Lesson.id == submission.lesson_id).first()
+    started = time.perf_counter()
+    if lesson is None:
+        result = {"status": "failed", "score": 0.0, "max_score": 0.0, "feedback": "Lesson no longer exists."}
+    else:
+        result = run_autograder(
+            code=submission.submission_code or "",
+            language=lesson.autograde_language or "python",
+            tests_json=lesson.autograde_tests or "{}",
+        )
+    metrics_service.observe("autograder_job_seconds", time.perf_counter() - started)
+    metrics_service.inc(f'autograder_jobs_total{{status="{result["status"]}"}}')
+    apply_result(submission, result)
+    db.commit()
+
+
+def apply_result(submission: LessonSubmission, result: dict):
+    """Copy an autograder result onto the submission; the caller commits."""
+    submission.status = result["status"]
+    submission.score = result.get("score")
+    submission.max_score = result.get("max_score")
+    submission.feedback = result.get("feedback")
+    submission.graded_at = datetime.now(timezone.utc) if result["status"] != "pending_manual_review" else None
+    submission.locked_at = None
+
+
+def _release(submission: LessonSubmission):
+    """Requeue a submission whose grading did not finish; give up after AUTOGRADER_MAX_ATTEMPTS."""
+    submission.locked_at = None
+    if (submission.attempts or 0) >= AUTOGRADER_MAX_ATTEMPTS:
+        submission.status = "pending_manual_review"
+        submission.feedback = "The autograder could not finish this submission. It will be reviewed manually."
+    else:
+        submission.status = QUEUED
+
+
+def requeue_failed(db: Session, submission_id: int):
+    """Release a submission whose grading raised, in a new transaction on `db`."""
+    submission = (
+        db.query(LessonSubmission)
+        .filter(LessonSubmission.id == submission_id, LessonSubmission.status == GRADING)
+        .with_for_update()
+        .first()
+    )
+    if submission is not None:
+        _release(submission)
+    db.commit()
+
+
+def requeue_stale(db: Session) -> int:
+    """Requeue submissions whose worker died mid-grade; give up after AUTOGRADER_MAX_ATTEMPTS."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=AUTOGRADER_LEASE_SECONDS)
+    stale = (
+        db.query(LessonSubmission)
+        .filter(LessonSubmission.status == GRADING, LessonSubmission.locked_at < cutoff)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for submission in stale:
+        _release(submission)
+    db.commit()
+    return len(stale)
+
+
+def _worker_loop():
+    last_sweep = 0.0
+    while True:
+        db = SessionLocal()
+        try:
+            if time.monotonic() - last_sweep > AUTOGRADER_LEASE_SECONDS / 2:
+                requeue_stale(db)
+                last_sweep = time.monotonic()
+            submission = _claim(db)
+            if submission is not None:
+                submission_id = submission.id
+                try:
+                    _grade(db, submission)
+                except Exception as e:
+                    # Lease expiry is only for workers that die; a failed job goes straight back
+                    db.rollback()
+                    print(f"⚠️ Autograder job {submission_id} failed: {e}")
+                    requeue_failed(db, submission_id)
+                continue
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Autograder worker error: {e}")
+        finally:
+            db.close()
+        _wakeup.wait(AUTOGRADER_POLL_SECONDS)
+        _wakeup.clear()
+
+
+def _queue_depth_gauge() -> dict[str, float]:
+    db = SessionLocal()
+    try:
+        return {"autograder_queue_depth": queue_depth(db)}
+    finally:
+        db.close()
+
+
+def start_workers():
+    """Start the grading worker threads once per process (AUTOGRADER_WORKERS=0 disables them)."""
+    if _workers or AUTOGRADER_WORKERS <= 0:
+        return
+    metrics_service.register_collector(_queue_depth_gauge)
+    for index in range(AUTOGRADER_WORKERS):
+        worker = threading.Thread(target=_worker_loop, daemon=True, name=f"autograder-{index}")
+        worker.start()
+        _workers.append(worker)
@@ -0,0 +1,129 @@
+"""Resized renditions of uploaded course thumbnails.
+
+Teachers upload full-size photos to the ``thumbnails`` folder. For each one,
+WebP and JPEG renditions are rendered at RENDITION_WIDTHS on a dedicated process
+pool (decoding and resampling are CPU-bound) and stored next to the original as
+``thumbnails/<uuid>_w<width>.<ext>``. Because the names are derived from the
+original's (see app/utils/storage_urls.py), ``rendition_urls`` can turn any
+bucket thumbnail URL into rendition URLs without a lookup. That is how CourseOut
+exposes them.
+"""
+import asyncio
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import get_settings
+from app.services import metrics_service, minio_service
+from app.utils.storage_urls import RENDITION_EXTENSIONS, RENDITION_WIDTHS, rendition_name, rendition_urls
+
+# extension (one per RENDITION_EXTENSIONS) -> (Pillow format, content type, save options)
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+MAX_IMAGE_PIXELS = 40_000_000  # decompression-bomb guard
+RENDER_TIMEOUT_SECONDS = 30
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ImageProcessingError(Exception):
+    """Raised when an upload cannot be decoded as an image."""
+
+
+# Worker-side function: top-level so it can be pickled into the pool.
+def _render(data: bytes, widths: tuple[int, ...]) -> dict[tuple[int, str], bytes]:
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    renditions = {}
+    for width in widths:
+        resized = image
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+        for ext, (fmt, _, options) in RENDITION_FORMATS.items():
+            frame = resized.convert("RGB") if fmt == "JPEG" else resized
+            buffer = io.BytesIO()
+            frame.save(buffer, fmt, **options)
+            renditions[(width, ext)] = buffer.getvalue()
+    return renditions
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: forking a threaded server process is unsafe
+                _executor = ProcessPoolExecutor(
+                    max_workers=get_settings().IMAGE_PROCESS_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def _check_thumbnail(object_name: str):
+    if rendition_name(object_name, RENDITION_WIDTHS[0], "jpg") is None:
+        raise ValueError(f"Not a thumbnail object: {object_name}")
+
+
+def _store(object_name: str, renditions: dict[tuple[int, str], bytes]) -> dict[str, dict[str, str]]:
+    for (width, ext), payload in renditions.items():
+        minio_service.put_bytes(rendition_name(object_name, width, ext), payload, RENDITION_FORMATS[ext][1])
+    metrics_service.inc('thumbnail_renditions_total{status="ok"}')
+    return rendition_urls(minio_service.public_url(object_name))
+
+
+def _failed(e: Exception) -> ImageProcessingError:
+    metrics_service.inc('thumbnail_renditions_total{status="failed"}')
+    return ImageProcessingError(f"Could not process image: {e}")
+
+
+def create_renditions(object_name: str, data: bytes) -> dict[str, dict[str, str]]:
+    """Render and store every rendition of a freshly uploaded thumbnail; returns rendition URLs.
+
+    Raises ImageProcessingError if the data is not a decodable image.
+    """
+    _check_thumbnail(object_name)
+    try:
+        renditions = _get_executor().submit(_render, data, RENDITION_WIDTHS).result(timeout=RENDER_TIMEOUT_SECONDS)
+    except Exception as e:
+        raise _failed(e) from e
+    return _store(object_name, renditions)
+
+
+async def create_renditions_async(object_name: str, data: bytes) -> dict[str, dict[str, str]]:
+    """Async variant: awaits the render pool, then stores the results on the storage I/O pool."""
+    _check_thumbnail(object_name)
+    try:
+        future = _get_executor().submit(_render, data, RENDITION_WIDTHS)
+        renditions = await asyncio.wait_for(asyncio.wrap_future(future), RENDER_TIMEOUT_SECONDS)
+    except Exception as e:
+        raise _failed(e) from e
+    return await minio_service.run_async(_store, object_name, renditions)
+
+
+def delete_renditions(object_name: str):
+    for width in RENDITION_WIDTHS:
+        for ext in RENDITION_EXTENSIONS:
+            name = rendition_name(object_name, width, ext)
+            if name is not None:
+                minio_service.delete_file(name)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+metrics_service.describe("thumbnail_renditions_total", "counter", "Thumbnail uploads processed into renditions, by outcome")
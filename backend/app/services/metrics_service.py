@@ -0,0 +1,73 @@
+"""In-process metrics exported in Prometheus text format at GET /metrics.
+
+Counters and summaries are updated by the code paths that own them; gauges that
+are cheaper to read on demand (pool sizes, queue depths) register a collector
+callback that is evaluated at scrape time.
+"""
+import threading
+from collections import defaultdict
+from typing import Callable
+
+_lock = threading.Lock()
+_counters: dict[str, float] = defaultdict(float)
+_summaries: dict[str, list[float]] = {}  # name -> [count, sum, max]
+_help: dict[str, tuple[str, str]] = {}  # name -> (type, help text)
+_collectors: list[Callable[[], dict[str, float]]] = []
+
+
+def describe(name: str, metric_type: str, help_text: str):
+    _help[name] = (metric_type, help_text)
+
+
+def inc(name: str, amount: float = 1.0):
+    with _lock:
+        _counters[name] += amount
+
+
+def observe(name: str, value: float):
+    """Record one observation (e.g. a latency in seconds) into a count/sum/max summary."""
+    with _lock:
+        summary = _summaries.setdefault(name, [0, 0.0, 0.0])
+        summary[0] += 1
+        summary[1] += value
+        summary[2] = max(summary[2], value)
+
+
+def register_collector(collector: Callable[[], dict[str, float]]):
+    """Register a callback returning {gauge name: value}, evaluated on every scrape."""
+    with _lock:
+        _collectors.append(collector)
+
+
+def snapshot() -> dict[str, float]:
+    with _lock:
+        values = dict(_counters)
+        for name, (count, total, peak) in _summaries.items():
+            base, brace, labels = name.partition("{")
+            labels = brace + labels
+            values[f"{base}_count{labels}"] = count
+            values[f"{base}_sum{labels}"] = total
+            values[f"{base}_max{labels}"] = peak
+        collectors = list(_collectors)
+    for collector in collectors:
+        try:
+            values.update(collector())
+        except Exception:
+            continue
+    return values
+
+
+def render() -> str:
+    lines = []
+    described = set()
+    for name, value in sorted(snapshot().items()):
+        base = name.split("{", 1)[0]
+        if base not in _help:
+            base = base.rsplit("_", 1)[0]  # summary series: <name>_count/_sum/_max
+        if base in _help and base not in described:
+            metric_type, help_text = _help[base]
+            lines.append(f"# HELP {base} {help_text}")
+            lines.append(f"# TYPE {base} {metric_type}")
+            described.add(base)
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
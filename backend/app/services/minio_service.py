@@ -1,12 +1,43 @@
+import asyncio
+import functools
 import io
 import json
+import os
 import re
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Optional
 
+import certifi
+import urllib3
 from minio import Minio
+from minio.commonconfig import ComposeSource, CopySource
+from minio.datatypes import PostPolicy
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
 from app.config import get_settings
+from app.services import metrics_service
+from app.utils.storage_urls import public_url
+
+ALLOWED_FOLDERS = {"thumbnails", "pdfs", "videos", "materials"}
+# Direct (presigned) uploads land here and are copied to their public name once
+# /api/uploads/complete has checked them; only ALLOWED_FOLDERS are publicly readable
+STAGING_PREFIX = ".staging/"
+
+# Policy fields that S3/MinIO accept either as a string or a list
+_POLICY_LIST_FIELDS = {"AWS", "Action", "NotAction", "Resource", "NotResource"}
 
 _client = None
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+_bucket_ready = threading.Event()
+_bucket_lock = threading.Lock()
+_bucket_error: Optional[str] = "not checked yet"
+_init_thread = None
 
 
 def get_minio_client() -> Minio:
@@ -14,17 +45,87 @@ def get_minio_client() -> Minio:
     global _client
     if _client is None:
         settings = get_settings()
+        # One HTTP connection per storage I/O thread, so workers never queue for a socket
+        http_client = urllib3.PoolManager(
+            timeout=urllib3.Timeout(connect=300, read=300),
+            maxsize=settings.MINIO_IO_WORKERS,
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+            retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+        )
         _client = Minio(
             endpoint=settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY,
             secret_key=settings.MINIO_SECRET_KEY,
             secure=settings.MINIO_SECURE,
+            http_client=http_client,
         )
     return _client
 
 
+# --- Async facade ---
+# The minio client is blocking. Async routes await these wrappers, which run the
+# call on a dedicated pool of MINIO_IO_WORKERS threads: the event loop keeps
+# serving other requests, and slow transfers cannot starve the threadpool that
+# sync routes run on.
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=get_settings().MINIO_IO_WORKERS, thread_name_prefix="minio-io")
+    return _executor
+
+
+def _tracked(fn, *args, **kwargs):
+    global _in_flight
+    with _executor_lock:
+        _in_flight += 1
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        with _executor_lock:
+            _in_flight -= 1
+
+
+async def run_async(fn, *args, **kwargs):
+    """Run a blocking storage call on the storage I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(_tracked, fn, *args, **kwargs))
+
+
+async def upload_file_async(file_data: bytes, folder: str, original_filename: str, content_type: str = "application/octet-stream") -> dict:
+    return await run_async(upload_file, file_data, folder, original_filename, content_type)
+
+
+async def upload_stream_async(
+    stream: BinaryIO,
+    folder: str,
+    original_filename: str,
+    content_type: str = "application/octet-stream",
+    length: int = -1,
+) -> dict:
+    return await run_async(upload_stream, stream, folder, original_filename, content_type, length)
+
+
+async def delete_file_async(object_name: str):
+    await run_async(delete_file, object_name)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+metrics_service.describe("minio_io_in_flight", "gauge", "Storage calls running on the MinIO I/O pool")
+metrics_service.register_collector(lambda: {"minio_io_in_flight": _in_flight})
+
+
 def ensure_bucket():
-    """Create the default bucket if it doesn't exist. Sets public read-only policy."""
+    """Create the default bucket if it doesn't exist. Sets public read-only policy on ALLOWED_FOLDERS."""
     settings = get_settings()
     client = get_minio_client()
     bucket = settings.MINIO_BUCKET_NAME
@@ -39,21 +140,111 @@ def ensure_bucket():
                 "Effect": "Allow",
                 "Principal": {"AWS": "*"},
                 "Action": ["s3:GetObject"],
-                "Resource": [f"arn:aws:s3:::{bucket}/*"],
+                "Resource": [f"arn:aws:s3:::{bucket}/{folder}/*" for folder in sorted(ALLOWED_FOLDERS)],
             }
         ],
     }
-    client.set_bucket_policy(bucket, json.dumps(policy))
+    # Only write the policy when it changed; every worker runs this on boot
+    try:
+        current = json.loads(client.get_bucket_policy(bucket))
+    except S3Error as e:
+        if e.code != "NoSuchBucketPolicy":
+            raise
+        current = None
+    if current is None or _normalize_policy(current) != _normalize_policy(policy):
+        client.set_bucket_policy(bucket, json.dumps(policy))
+
+
+def _normalize_policy(value, key: Optional[str] = None):
+    """Canonical form of a bucket policy so equivalent documents compare equal."""
+    if isinstance(value, dict):
+        return {k: _normalize_policy(v, k) for k, v in value.items() if v not in ("", None)}
+    if isinstance(value, list):
+        return sorted((_normalize_policy(item) for item in value), key=lambda item: json.dumps(item, sort_keys=True))
+    if key in _POLICY_LIST_FIELDS:
+        return [value]
+    return value
+
+
+def ensure_bucket_ready() -> bool:
+    """Run ensure_bucket once per process; later calls are a flag check. Never raises."""
+    global _bucket_error
+    if _bucket_ready.is_set():
+        return True
+    with _bucket_lock:
+        if _bucket_ready.is_set():
+            return True
+        try:
+            ensure_bucket()
+        except Exception as e:
+            _bucket_error = str(e)
+            return False
+        _bucket_error = None
+        _bucket_ready.set()
+        return True
+
+
+def storage_status() -> dict:
+    return {"ready": _bucket_ready.is_set(), "error": _bucket_error}
+
+
+def _init_loop():
+    delay = 1
+    while not ensure_bucket_ready():
+        print(f"⏳ MinIO not ready, retrying in {delay}s... ({_bucket_error})")
+        time.sleep(delay)
+        delay = min(delay * 2, 30)
+    print("✅ MinIO bucket ready")
+
+
+def start_background_init():
+    """Prepare the bucket off the startup path, retrying with backoff until MinIO answers."""
+    global _init_thread
+    if _init_thread is None:
+        _init_thread = threading.Thread(target=_init_loop, daemon=True, name="minio-init")
+        _init_thread.start()
 
 
 def upload_file(file_data: bytes, folder: str, original_filename: str, content_type: str = "application/octet-stream") -> dict:
     """Upload a file to MinIO. Returns dict with 'url' and 'object_name'."""
+    return upload_stream(io.BytesIO(file_data), folder, original_filename, content_type, length=len(file_data))
+
+
+def upload_stream(
+    stream: BinaryIO,
+    folder: str,
+    original_filename: str,
+    content_type: str = "application/octet-stream",
+    length: int = -1,
+) -> dict:
+    """Upload from a file-like object without loading it into memory.
+
+    With an unknown length (-1) the object is sent as a multipart upload of
+    MINIO_UPLOAD_PART_SIZE parts, so at most one part is buffered at a time.
+    An exception raised by ``stream.read`` aborts the multipart upload.
+    Returns dict with 'url' and 'object_name'.
+    """
+    ensure_bucket_ready()  # no-op once the background init succeeded
     settings = get_settings()
     client = get_minio_client()
-    bucket = settings.MINIO_BUCKET_NAME
+    object_name = new_object_name(folder, original_filename)
 
+    client.put_object(
+        bucket_name=settings.MINIO_BUCKET_NAME,
+        object_name=object_name,
+        data=stream,
+        length=length,
+        part_size=settings.MINIO_UPLOAD_PART_SIZE,
+        content_type=sanitize_content_type(content_type),
+    )
+
+    return {"url": public_url(object_name), "object_name": object_name}
+
+
+def new_object_name(folder: str, original_filename: str) -> str:
+    """Return a fresh ``<folder>/<uuid>.<ext>`` object name."""
     # Validate folder
-    if folder not in {"thumbnails", "pdfs", "videos", "materials"}:
+    if folder not in ALLOWED_FOLDERS:
         raise ValueError(f"Invalid folder: {folder}")
 
     # Extract extension safely
@@ -63,23 +254,174 @@ def upload_file(file_data: bytes, folder: str, original_filename: str, content_t
         ext = re.sub(r"[^a-z0-9.]", "", ext)  # only safe chars
 
     # UUID-only filename — no user-controlled parts
-    object_name = f"{folder}/{uuid.uuid4().hex}{ext}"
+    return f"{folder}/{uuid.uuid4().hex}{ext}"
 
-    # Sanitize content type
-    safe_ct = content_type.split(";")[0].strip().lower() if content_type else "application/octet-stream"
 
-    client.put_object(
-        bucket_name=bucket,
-        object_name=object_name,
-        data=io.BytesIO(file_data),
-        length=len(file_data),
-        content_type=safe_ct,
-    )
+def sanitize_content_type(content_type: Optional[str]) -> str:
+    return content_type.split(";")[0].strip().lower() if content_type else "application/octet-stream"
+
+
+def staging_name(object_name: str) -> str:
+    """Private name a direct upload of `object_name` is written to before it is checked."""
+    return STAGING_PREFIX + object_name
 
+
+def promote(staged_name: str, object_name: str):
+    """Copy a checked upload to its public name server-side, then drop the staged copy."""
+    settings = get_settings()
+    client = get_minio_client()
+    bucket = settings.MINIO_BUCKET_NAME
+    client.copy_object(bucket, object_name, CopySource(bucket, staged_name))
+    client.remove_object(bucket, staged_name)
+
+
+def delete_older_than(prefix: str, cutoff: datetime) -> int:
+    """Delete objects under `prefix` last modified before `cutoff`; returns how many."""
+    if not prefix or ".." in prefix or not prefix.endswith("/"):
+        raise ValueError("Invalid prefix")
+    settings = get_settings()
+    client = get_minio_client()
+    bucket = settings.MINIO_BUCKET_NAME
+    stale = [
+        DeleteObject(obj.object_name)
+        for obj in client.list_objects(bucket, prefix=prefix, recursive=True)
+        if obj.last_modified is not None and obj.last_modified < cutoff
+    ]
+    for error in client.remove_objects(bucket, iter(stale)):
+        raise RuntimeError(f"Failed to delete {error.name}: {error.message}")
+    return len(stale)
+
+
+def presigned_upload(object_name: str, content_type: str, max_size: int, expires_minutes: int) -> dict:
+    """Presigned POST form letting a browser upload one object straight to MinIO.
+
+    The policy pins the object key and content type and caps the body at
+    ``max_size`` bytes, so MinIO itself rejects anything else. Returns the form
+    ``url`` and the ``fields`` to send before the file field.
+    """
+    ensure_bucket_ready()
+    settings = get_settings()
+    client = get_minio_client()
+    policy = PostPolicy(settings.MINIO_BUCKET_NAME, datetime.now(timezone.utc) + timedelta(minutes=expires_minutes))
+    policy.add_equals_condition("key", object_name)
+    policy.add_equals_condition("Content-Type", content_type)
+    policy.add_content_length_range_condition(1, max_size)
+    fields = client.presigned_post_policy(policy)
+    fields.update({"key": object_name, "Content-Type": content_type})
+
+    # The POST policy signature does not cover the host, so point browsers at the external endpoint
     protocol = "https" if settings.MINIO_SECURE else "http"
-    url = f"{protocol}://{settings.MINIO_EXTERNAL_ENDPOINT}/{bucket}/{object_name}"
+    return {"url": f"{protocol}://{settings.MINIO_EXTERNAL_ENDPOINT}/{settings.MINIO_BUCKET_NAME}", "fields": fields}
+
 
-    return {"url": url, "object_name": object_name}
+def object_size(object_name: str) -> Optional[int]:
+    """Size of an object in bytes, or None if it does not exist."""
+    if not object_name or ".." in object_name:
+        raise ValueError("Invalid object name")
+    settings = get_settings()
+    client = get_minio_client()
+    try:
+        return client.stat_object(settings.MINIO_BUCKET_NAME, object_name).size
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchObject"):
+            return None
+        raise
+
+
+def read_head(object_name: str, length: int) -> Optional[tuple[int, bytes]]:
+    """Return (object size, first `length` bytes) via a ranged GET, or None if the object is missing."""
+    size = object_size(object_name)
+    if size is None:
+        return None
+    settings = get_settings()
+    client = get_minio_client()
+    if size == 0:
+        return 0, b""
+    response = client.get_object(settings.MINIO_BUCKET_NAME, object_name, offset=0, length=min(length, size))
+    try:
+        return size, response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def put_bytes(object_name: str, data: bytes, content_type: str = "application/octet-stream"):
+    """Store a small in-memory object (e.g. one resumable-upload chunk) under a fixed name."""
+    ensure_bucket_ready()
+    settings = get_settings()
+    client = get_minio_client()
+    client.put_object(settings.MINIO_BUCKET_NAME, object_name, io.BytesIO(data), length=len(data), content_type=content_type)
+
+
+def compose(object_name: str, source_names: list[str], content_type: str) -> dict:
+    """Concatenate existing objects server-side into `object_name`.
+
+    Every source except the last must be at least 5 MiB (S3 multipart rule).
+    Returns dict with 'url' and 'object_name'.
+    """
+    settings = get_settings()
+    client = get_minio_client()
+    bucket = settings.MINIO_BUCKET_NAME
+    client.compose_object(
+        bucket,
+        object_name,
+        [ComposeSource(bucket, name) for name in source_names],
+        metadata={"Content-Type": content_type},
+    )
+    return {"url": public_url(object_name), "object_name": object_name}
+
+
+def list_prefixes(prefix: str) -> list[str]:
+    """Return the immediate "sub-directories" under `prefix` (which must end with '/')."""
+    settings = get_settings()
+    client = get_minio_client()
+    return [obj.object_name for obj in client.list_objects(settings.MINIO_BUCKET_NAME, prefix=prefix) if obj.is_dir]
+
+
+def delete_prefix(prefix: str):
+    """Delete every object under `prefix`."""
+    if not prefix or ".." in prefix or not prefix.endswith("/"):
+        raise ValueError("Invalid prefix")
+    settings = get_settings()
+    client = get_minio_client()
+    bucket = settings.MINIO_BUCKET_NAME
+    objects = (DeleteObject(obj.object_name) for obj in client.list_objects(bucket, prefix=prefix, recursive=True))
+    for error in client.remove_objects(bucket, objects):
+        raise RuntimeError(f"Failed to delete {error.name}: {error.message}")
+
+
+def read_object(object_name: str) -> bytes:
+    """Download a whole object; only for small files such as thumbnails."""
+    if not object_name or ".." in object_name:
+        raise ValueError("Invalid object name")
+    settings = get_settings()
+    client = get_minio_client()
+    response = client.get_object(settings.MINIO_BUCKET_NAME, object_name)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def download_file(object_name: str, path: str):
+    """Download an object to a local file (e.g. a video for transcoding)."""
+    if not object_name or ".." in object_name:
+        raise ValueError("Invalid object name")
+    settings = get_settings()
+    client = get_minio_client()
+    client.fget_object(settings.MINIO_BUCKET_NAME, object_name, path)
+
+
+def upload_path(object_name: str, path: str, content_type: str = "application/octet-stream"):
+    """Upload a local file under a fixed name."""
+    ensure_bucket_ready()
+    settings = get_settings()
+    client = get_minio_client()
+    client.fput_object(
+        settings.MINIO_BUCKET_NAME, object_name, path,
+        content_type=content_type, part_size=settings.MINIO_UPLOAD_PART_SIZE,
+    )
 
 
 def delete_file(object_name: str):
@@ -0,0 +1,146 @@
+"""Password hashing on a dedicated, bounded process pool.
+
+bcrypt is deliberately slow, so hashing and verification run in worker processes
+instead of the request threadpool. At most PASSWORD_HASH_MAX_PENDING jobs may be
+queued or running; beyond that callers get PasswordHasherBusy and should answer
+503 rather than pile up. The bcrypt work factor comes from PASSWORD_BCRYPT_ROUNDS,
+or is calibrated at startup to PASSWORD_HASH_TARGET_MS, and hashes created with a
+lower cost are flagged for a transparent rehash on the next login.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.hash import bcrypt as bcrypt_handler
+
+from app.config import get_settings
+from app.services import metrics_service
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+# Worker-side functions: top-level so they can be pickled into the pool.
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt_handler.using(rounds=rounds).hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    try:
+        return bcrypt_handler.verify(password, password_hash)
+    except ValueError:
+        return False  # malformed or non-bcrypt hash
+
+
+class _PasswordHasher:
+    def __init__(self):
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = None
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.rounds = get_settings().PASSWORD_BCRYPT_ROUNDS
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    settings = get_settings()
+                    self._slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+                    # spawn: forking a threaded server process is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=settings.PASSWORD_HASH_WORKERS,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def run(self, fn, *args, operation: str):
+        executor = self._get_executor()
+        if not self._slots.acquire(blocking=False):
+            metrics_service.inc(f'password_hash_rejected_total{{operation="{operation}"}}')
+            raise PasswordHasherBusy("Password hashing queue is full")
+        with self._pending_lock:
+            self._pending += 1
+        started = time.perf_counter()
+        try:
+            return executor.submit(fn, *args).result(timeout=get_settings().PASSWORD_HASH_TIMEOUT_SECONDS)
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+            self._slots.release()
+            metrics_service.observe(f'password_hash_seconds{{operation="{operation}"}}', time.perf_counter() - started)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_hasher = _PasswordHasher()
+
+metrics_service.describe("password_hash_queue_depth", "gauge", "Password hash/verify jobs queued or running")
+metrics_service.describe("password_hash_rounds", "gauge", "Current bcrypt work factor")
+metrics_service.describe("password_hash_rejected_total", "counter", "Jobs rejected because the queue was full")
+metrics_service.describe("password_hash_seconds", "summary", "Wall time of password hash/verify jobs")
+metrics_service.register_collector(lambda: {
+    "password_hash_queue_depth": _hasher.pending,
+    "password_hash_rounds": _hasher.rounds,
+})
+
+
+def hash_password(password: str) -> str:
+    return _hasher.run(_hash, password, _hasher.rounds, operation="hash")
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return _hasher.run(_verify, password, password_hash, operation="verify")
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True if the hash was made with a lower bcrypt cost than the current one.
+
+    Never downgrades: workers calibrated to different costs would otherwise rehash
+    the same password back and forth on every login.
+    """
+    try:
+        return bcrypt_handler.from_string(password_hash).rounds < _hasher.rounds
+    except ValueError:
+        return True
+
+
+def calibrate():
+    """Pick the bcrypt cost whose hash time is closest to, without exceeding, the target.
+
+    Each extra round doubles the cost, so one timing at MIN_ROUNDS is enough to
+    extrapolate. A target of 0 keeps the configured PASSWORD_BCRYPT_ROUNDS.
+    Every worker process calibrates on its own and may land a round apart, which
+    is why needs_rehash only ever upgrades.
+    """
+    target_ms = get_settings().PASSWORD_HASH_TARGET_MS
+    if target_ms <= 0:
+        return _hasher.rounds
+    samples = []
+    for _ in range(3):
+        started = time.perf_counter()
+        _hash("calibration-password", MIN_ROUNDS)
+        samples.append((time.perf_counter() - started) * 1000)
+    base_ms = min(samples)
+    rounds = MIN_ROUNDS
+    while rounds < MAX_ROUNDS and base_ms * 2 ** (rounds + 1 - MIN_ROUNDS) <= target_ms:
+        rounds += 1
+    _hasher.rounds = rounds
+    print(f"🔐 bcrypt calibrated to {rounds} rounds (~{base_ms * 2 ** (rounds - MIN_ROUNDS):.0f} ms, target {target_ms} ms)")
+    return rounds
+
+
+def shutdown():
+    _hasher.shutdown()
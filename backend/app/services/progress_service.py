@@ -0,0 +1,99 @@
+"""Lesson progress writes with an O(1) completion check.
+
+Each enrollment keeps ``completed_lessons`` and each course ``lesson_count``
+(see course_stats_service), so a course is complete when the two are equal and no
+write has to count progress rows or lessons. Progress rows are created with one
+``INSERT ... ON CONFLICT`` per call and completion is flipped with conditional
+UPDATEs: only rows whose state actually changes are matched, and that row count is
+the exact delta applied to ``completed_lessons`` in the same transaction, however
+many times a client repeats the request.
+"""
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import func as sql_func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.enrollment import Enrollment
+from app.models.progress import Progress
+
+MAX_BATCH_LESSONS = 500
+MAX_BATCH_EVENTS = 1000
+
+
+def _upsert(db: Session, enrollment_id: int, positions: dict[int, Optional[float]]):
+    """Make sure a progress row exists for each lesson; store positions that are not None."""
+    insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = insert(Progress).values([
+        {"enrollment_id": enrollment_id, "lesson_id": lesson_id, "completed": False, "position_seconds": position}
+        for lesson_id, position in positions.items()
+    ])
+    if any(position is not None for position in positions.values()):
+        statement = statement.on_conflict_do_update(
+            index_elements=[Progress.enrollment_id, Progress.lesson_id],
+            set_={"position_seconds": sql_func.coalesce(statement.excluded.position_seconds, Progress.position_seconds)},
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=[Progress.enrollment_id, Progress.lesson_id])
+    db.execute(statement)
+
+
+def _set_completed(db: Session, enrollment_id: int, lesson_ids: list[int], completed: bool) -> int:
+    """Flip existing rows to `completed`; returns the change in completed lessons."""
+    if not lesson_ids:
+        return 0
+    # Rows already in the requested state are left alone and not counted
+    changed = Progress.completed.isnot(True) if completed else Progress.completed.is_(True)
+    flipped = db.execute(
+        update(Progress)
+        .where(Progress.enrollment_id == enrollment_id, Progress.lesson_id.in_(lesson_ids), changed)
+        .values(completed=completed, completed_at=datetime.now(timezone.utc) if completed else None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return flipped if completed else -flipped
+
+
+def _add_completed(db: Session, enrollment_id: int, delta: int):
+    if delta:
+        db.query(Enrollment).filter(Enrollment.id == enrollment_id).update(
+            {Enrollment.completed_lessons: Enrollment.completed_lessons + delta}, synchronize_session=False
+        )
+
+
+def mark_lessons(db: Session, enrollment: Enrollment, lesson_ids: list[int], completed: bool):
+    """Set progress for `lesson_ids` (lessons of the enrollment's course) in the caller's transaction."""
+    lesson_ids = list(dict.fromkeys(lesson_ids))
+    _upsert(db, enrollment.id, dict.fromkeys(lesson_ids))
+    _add_completed(db, enrollment.id, _set_completed(db, enrollment.id, lesson_ids, completed))
+
+
+def coalesce_events(events: Iterable) -> dict[int, dict]:
+    """Collapse player events to the latest position and completion state per lesson (in event order)."""
+    latest: dict[int, dict] = {}
+    for event in events:
+        state = latest.setdefault(event.lesson_id, {"position_seconds": None, "completed": None})
+        if event.position_seconds is not None:
+            state["position_seconds"] = event.position_seconds
+        if event.completed is not None:
+            state["completed"] = event.completed
+    return latest
+
+
+def record_events(db: Session, enrollment: Enrollment, latest: dict[int, dict]):
+    """Write coalesced events: one upsert, plus a conditional UPDATE per completion state reported."""
+    _upsert(db, enrollment.id, {lesson_id: state["position_seconds"] for lesson_id, state in latest.items()})
+    delta = 0
+    for completed in (True, False):
+        lesson_ids = [lesson_id for lesson_id, state in latest.items() if state["completed"] is completed]
+        delta += _set_completed(db, enrollment.id, lesson_ids, completed)
+    _add_completed(db, enrollment.id, delta)
+
+
+def lesson_removed(db: Session, lesson_id: int):
+    """Take a lesson out of the completion counters of everyone who finished it. Call before deleting."""
+    finished = select(Progress.enrollment_id).where(Progress.lesson_id == lesson_id, Progress.completed.is_(True))
+    db.query(Enrollment).filter(Enrollment.id.in_(finished)).update(
+        {Enrollment.completed_lessons: Enrollment.completed_lessons - 1}, synchronize_session=False
+    )
@@ -0,0 +1,190 @@
+"""Resumable (tus-style) uploads for large files such as lesson videos.
+
+A session fixes the final object name, total size and chunk size. The client
+sends chunks in order, each tagged with the byte offset it starts at. Every
+chunk is stored as its own MinIO object under ``.uploads/<session id>/``, so a
+dropped connection only loses the chunk in flight: the client asks for the
+received offset and carries on from there. Finishing the session concatenates
+the chunks server-side with ``compose_object`` and removes them. Sessions idle
+for longer than RESUMABLE_UPLOAD_EXPIRE_HOURS are garbage-collected together
+with their chunks. The same sweep removes presigned direct uploads that were
+never completed (see minio_service.STAGING_PREFIX).
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.resumable_upload import ResumableUpload
+from app.services import minio_service
+
+CHUNK_PREFIX = ".uploads/"
+
+_gc_thread = None
+
+
+class ResumableUploadError(Exception):
+    """Client-facing failure; `status_code` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _chunk_prefix(upload_id: str) -> str:
+    return f"{CHUNK_PREFIX}{upload_id}/"
+
+
+def _chunk_name(upload_id: str, index: int) -> str:
+    return f"{_chunk_prefix(upload_id)}{index:05d}"
+
+
+def create(db: Session, user_id: int, folder: str, filename: str, content_type: str, total_size: int) -> ResumableUpload:
+    upload = ResumableUpload(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        object_name=minio_service.new_object_name(folder, filename),
+        content_type=minio_service.sanitize_content_type(content_type),
+        total_size=total_size,
+        chunk_size=get_settings().MINIO_UPLOAD_PART_SIZE,
+        received_bytes=0,
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+
+def get(db: Session, upload_id: str, user_id: int) -> ResumableUpload:
+    upload = db.query(ResumableUpload).filter(ResumableUpload.id == upload_id).first()
+    if upload is None or upload.user_id != user_id:
+        raise ResumableUploadError("Upload not found", 404)
+    return upload
+
+
+def get_detached(db: Session, upload_id: str, user_id: int) -> ResumableUpload:
+    """Like get(), but hands the connection back to the pool before returning.
+
+    For callers that wait on the client (reading a chunk body) before their next
+    query; the returned row is detached, with its columns already loaded.
+    """
+    upload = get(db, upload_id, user_id)
+    db.expunge(upload)
+    db.rollback()
+    return upload
+
+
+def check_chunk(upload: ResumableUpload, offset: int, data: bytes, is_blocked) -> int:
+    """Validate the chunk starting at `offset` and return the offset it ends at.
+
+    Chunks must arrive in order and be exactly `chunk_size` bytes, except the
+    last one.
+    """
+    if offset != upload.received_bytes:
+        raise ResumableUploadError(f"Offset mismatch: expected {upload.received_bytes}", 409)
+    end = offset + len(data)
+    if not data or end > upload.total_size:
+        raise ResumableUploadError("Chunk is empty or runs past the declared size")
+    if len(data) != upload.chunk_size and end != upload.total_size:
+        raise ResumableUploadError(f"Chunks must be {upload.chunk_size} bytes except the last one")
+    if offset == 0 and is_blocked(data):
+        raise ResumableUploadError("Executable files are not allowed")
+    return end
+
+
+def store_chunk(upload: ResumableUpload, offset: int, data: bytes):
+    """Write a checked chunk to storage. Re-sending a chunk whose offset was not
+    acknowledged is safe: it overwrites the same chunk object."""
+    minio_service.put_bytes(_chunk_name(upload.id, offset // upload.chunk_size), data)
+
+
+def record_chunk(db: Session, upload_id: str, offset: int, end: int) -> int:
+    """Advance the received offset past a stored chunk and return it."""
+    # Conditional on the offset so two concurrent senders cannot both advance it
+    updated = (
+        db.query(ResumableUpload)
+        .filter(ResumableUpload.id == upload_id, ResumableUpload.received_bytes == offset)
+        .update({ResumableUpload.received_bytes: end}, synchronize_session=False)
+    )
+    db.commit()
+    if not updated:
+        received = db.query(ResumableUpload.received_bytes).filter(ResumableUpload.id == upload_id).scalar()
+        raise ResumableUploadError(f"Offset mismatch: expected {received}", 409)
+    return end
+
+
+def complete(db: Session, upload: ResumableUpload) -> dict:
+    """Assemble the chunks into the final object and close the session."""
+    if upload.received_bytes != upload.total_size:
+        raise ResumableUploadError(f"Upload incomplete: {upload.received_bytes} of {upload.total_size} bytes received", 409)
+    chunk_count = -(-upload.total_size // upload.chunk_size)
+    result = minio_service.compose(
+        upload.object_name,
+        [_chunk_name(upload.id, index) for index in range(chunk_count)],
+        upload.content_type,
+    )
+    minio_service.delete_prefix(_chunk_prefix(upload.id))
+    db.delete(upload)
+    db.commit()
+    return {**result, "size": upload.total_size}
+
+
+def abort(db: Session, upload: ResumableUpload):
+    minio_service.delete_prefix(_chunk_prefix(upload.id))
+    db.delete(upload)
+    db.commit()
+
+
+def collect_garbage(db: Session) -> int:
+    """Drop sessions idle past the expiry, chunk folders no session owns and abandoned staged uploads.
+
+    Returns the number of sessions removed.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=get_settings().RESUMABLE_UPLOAD_EXPIRE_HOURS)
+    expired = db.query(ResumableUpload).filter(ResumableUpload.updated_at < cutoff).all()
+    for upload in expired:
+        minio_service.delete_prefix(_chunk_prefix(upload.id))
+        db.delete(upload)
+    db.commit()
+
+    # Chunks left behind when a session row went away but the MinIO cleanup failed.
+    # List before reading the live ids: a session row always exists before its first chunk.
+    prefixes = minio_service.list_prefixes(CHUNK_PREFIX)
+    live = {upload_id for (upload_id,) in db.query(ResumableUpload.id)}
+    for prefix in prefixes:
+        if prefix[len(CHUNK_PREFIX):].rstrip("/") not in live:
+            minio_service.delete_prefix(prefix)
+
+    # Presigned uploads never sent to /complete. Their upload token stays valid for
+    # twice the form expiry, so nothing younger than that can still be completed.
+    staging_cutoff = datetime.now(timezone.utc) - 2 * timedelta(minutes=get_settings().PRESIGNED_UPLOAD_EXPIRE_MINUTES)
+    minio_service.delete_older_than(minio_service.STAGING_PREFIX, staging_cutoff)
+    return len(expired)
+
+
+def _gc_loop(interval: int):
+    while True:
+        time.sleep(interval)
+        db = SessionLocal()
+        try:
+            collect_garbage(db)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Resumable upload cleanup failed: {e}")
+        finally:
+            db.close()
+
+
+def start_gc_loop():
+    """Start the abandoned-upload cleanup thread once per process (0 disables it)."""
+    global _gc_thread
+    interval = get_settings().RESUMABLE_UPLOAD_GC_INTERVAL_SECONDS
+    if interval <= 0 or _gc_thread is not None:
+        return
+    _gc_thread = threading.Thread(target=_gc_loop, args=(interval,), daemon=True, name="resumable-upload-gc")
+    _gc_thread.start()
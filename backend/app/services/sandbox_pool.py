@@ -0,0 +1,283 @@
+"""Pool of pre-started autograder sandboxes.
+
+Cold ``docker run`` dominates grading latency, so this keeps AUTOGRADER_POOL_SIZE
+idle containers (no network, memory/CPU/pid capped, writable tmpfs workspace)
+running ``sleep``. A submission is graded with a single ``docker exec`` that
+streams the code and test inputs over stdin. Every container grades exactly one
+submission and is then removed, so nothing a student writes to the workspace or
+leaves running can reach the next student's job. Idle containers are
+health-checked, and a background thread removes used ones and keeps the pool
+topped up. Callers fall back to the cold path in autograder_service when no
+sandbox is ready.
+"""
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Any, Optional
+
+from app.services import metrics_service
+
+POOL_SIZE = int(os.getenv("AUTOGRADER_POOL_SIZE", "0"))
+POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("AUTOGRADER_POOL_ACQUIRE_TIMEOUT_SECONDS", "1"))
+POOL_HEALTH_INTERVAL_SECONDS = int(os.getenv("AUTOGRADER_POOL_HEALTH_INTERVAL_SECONDS", "30"))
+SANDBOX_MEMORY = os.getenv("AUTOGRADER_MEMORY", "128m")
+SANDBOX_CPUS = os.getenv("AUTOGRADER_CPUS", "0.5")
+SANDBOX_PIDS_LIMIT = os.getenv("AUTOGRADER_PIDS_LIMIT", "64")
+SANDBOX_LABEL = "course-seller.autograder=1"
+EXEC_GRACE_SECONDS = 2
+
+# Grading driver, shared by the pooled and the cold (docker run) path. Reads
+# {"code", "cases", "timeout", "max_output"} from stdin, runs solution.py once per
+# case in a private temp dir under /workspace and prints one JSON list of results.
+# Run as ``python -I -S`` from the read-only root, so nothing in /workspace is importable.
+HARNESS_SOURCE = """
+import json, shutil, subprocess, sys, tempfile
+
+def text(value):
+    # TimeoutExpired carries raw bytes even when text=True
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value or ""
+
+job = json.load(sys.stdin)
+max_output = job["max_output"]
+workdir = tempfile.mkdtemp(dir="/workspace")
+try:
+    with open(workdir + "/solution.py", "w", encoding="utf-8") as handle:
+        handle.write(job["code"])
+    results = []
+    for stdin in job["cases"]:
+        try:
+            completed = subprocess.run(
+                [sys.executable, "solution.py"], input=stdin, capture_output=True, cwd=workdir,
+                text=True, errors="replace", timeout=job["timeout"], check=False,
+            )
+            results.append({"stdout": completed.stdout[:max_output], "stderr": completed.stderr[:max_output],
+                            "returncode": completed.returncode, "timeout": False})
+        except subprocess.TimeoutExpired as exc:
+            results.append({"stdout": text(exc.stdout)[:max_output], "stderr": text(exc.stderr)[:max_output],
+                            "returncode": -1, "timeout": True})
+finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+print(json.dumps(results))
+"""
+
+
+def run_harness(
+    command: list[str], code: str, stdins: list[str], timeout: int, max_output: int, budget: float
+) -> tuple[list[dict[str, Any]], str]:
+    """Grade every case with HARNESS_SOURCE under `command` (a ``docker run``/``docker exec``
+    prefix ending at the image or container).
+
+    Returns one result per case and the outcome: "ok", "timeout", "malformed" or
+    "exec_error". On anything but "ok" every case carries the failure.
+    """
+    job = json.dumps({"code": code, "cases": stdins, "timeout": timeout, "max_output": max_output})
+    try:
+        completed = subprocess.run(
+            [*command, "python", "-I", "-S", "-c", HARNESS_SOURCE],
+            input=job,
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=budget,
+            check=False,
+        )
+    except subprocess.TimeoutExpired:
+        # The harness enforces per-case timeouts, so overrunning the whole budget means it is wedged
+        return [{"stdout": "", "stderr": "", "returncode": -1, "timeout": True} for _ in stdins], "timeout"
+    except OSError as e:
+        error, outcome = f"Autograder sandbox could not be started: {e}", "exec_error"
+    else:
+        try:
+            results = json.loads(completed.stdout)
+            if isinstance(results, list) and len(results) == len(stdins):
+                return results, "ok"
+            error, outcome = completed.stderr.strip() or "Autograder harness returned malformed results", "malformed"
+        except json.JSONDecodeError:
+            error, outcome = completed.stderr.strip() or "Autograder harness crashed", "exec_error"
+    return [{"stdout": "", "stderr": error, "returncode": -1, "timeout": False} for _ in stdins], outcome
+
+
+class _Sandbox:
+    def __init__(self, container_id: str):
+        self.container_id = container_id
+        self.checked_at = time.monotonic()
+
+
+class SandboxPool:
+    def __init__(self, size: int, image: str):
+        self.size = size
+        self.image = image
+        self._idle: "queue.Queue[_Sandbox]" = queue.Queue()
+        self._used: "queue.Queue[_Sandbox]" = queue.Queue()
+        self._starting = 0
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> int:
+        return self._idle.qsize()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._maintain, daemon=True, name="autograder-sandbox-pool")
+            self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+        self._remove_used()
+        while True:
+            try:
+                self._destroy(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def run(self, code: str, stdins: list[str], timeout: int, max_output: int) -> Optional[list[dict[str, Any]]]:
+        """Grade on a warm sandbox; None means none was ready and the caller should fall back.
+
+        Once the code has been handed to a sandbox it is not run again elsewhere:
+        harness failures come back as error results for every case.
+        """
+        try:
+            sandbox = self._idle.get(timeout=POOL_ACQUIRE_TIMEOUT_SECONDS)
+        except queue.Empty:
+            metrics_service.inc('autograder_pool_fallbacks_total{reason="empty"}')
+            return None
+        with self._lock:
+            self._in_use += 1
+
+        try:
+            results, outcome = run_harness(
+                ["docker", "exec", "-i", "-w", "/", sandbox.container_id],
+                code, stdins, timeout, max_output, timeout * len(stdins) + EXEC_GRACE_SECONDS,
+            )
+            if outcome != "ok":
+                metrics_service.inc(f'autograder_pool_errors_total{{reason="{outcome}"}}')
+            return results
+        finally:
+            # Single use: the maintenance thread removes it and starts a replacement
+            self._used.put(sandbox)
+            with self._lock:
+                self._in_use -= 1
+            self._wakeup.set()
+
+    def _maintain(self):
+        while not self._stopped:
+            self._remove_used()
+            self._health_check_idle()
+            while not self._stopped and self._idle.qsize() + self._in_use + self._starting < self.size:
+                with self._lock:
+                    self._starting += 1
+                try:
+                    sandbox = self._create()
+                    if sandbox is not None:
+                        self._idle.put(sandbox)
+                finally:
+                    with self._lock:
+                        self._starting -= 1
+                if sandbox is None:
+                    break  # docker unavailable; retry on the next tick
+            self._wakeup.wait(POOL_HEALTH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+
+    def _remove_used(self):
+        while True:
+            try:
+                self._destroy(self._used.get_nowait())
+            except queue.Empty:
+                return
+
+    def _health_check_idle(self):
+        for _ in range(self._idle.qsize()):
+            try:
+                sandbox = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if time.monotonic() - sandbox.checked_at < POOL_HEALTH_INTERVAL_SECONDS:
+                self._idle.put(sandbox)
+                continue
+            if self._is_healthy(sandbox):
+                sandbox.checked_at = time.monotonic()
+                self._idle.put(sandbox)
+            else:
+                metrics_service.inc("autograder_pool_replaced_total")
+                self._destroy(sandbox)
+
+    def _create(self) -> Optional[_Sandbox]:
+        command = [
+            "docker", "run", "-d", "--rm",
+            "--network", "none",
+            "--memory", SANDBOX_MEMORY,
+            "--cpus", SANDBOX_CPUS,
+            "--pids-limit", SANDBOX_PIDS_LIMIT,
+            "--read-only",
+            "--tmpfs", "/workspace:rw,exec,size=16m",
+            "--tmpfs", "/tmp:rw,size=16m",
+            "-w", "/workspace",
+            "--label", SANDBOX_LABEL,
+            self.image,
+            "sleep", "infinity",
+        ]
+        try:
+            completed = subprocess.run(command, capture_output=True, text=True, timeout=30, check=False)
+        except (subprocess.TimeoutExpired, OSError):
+            return None
+        if completed.returncode != 0:
+            return None
+        return _Sandbox(completed.stdout.strip())
+
+    def _is_healthy(self, sandbox: _Sandbox) -> bool:
+        try:
+            completed = subprocess.run(
+                ["docker", "exec", sandbox.container_id, "python", "-c", "print('ok')"],
+                capture_output=True,
+                text=True,
+                timeout=5,
+                check=False,
+            )
+            return completed.returncode == 0 and completed.stdout.strip() == "ok"
+        except (subprocess.TimeoutExpired, OSError):
+            return False
+
+    def _destroy(self, sandbox: _Sandbox):
+        try:
+            subprocess.run(["docker", "rm", "-f", sandbox.container_id], capture_output=True, timeout=15, check=False)
+        except (subprocess.TimeoutExpired, OSError):
+            pass
+
+
+_pool: Optional[SandboxPool] = None
+
+metrics_service.describe("autograder_pool_ready", "gauge", "Idle pre-started autograder sandboxes")
+metrics_service.describe("autograder_pool_fallbacks_total", "counter", "Gradings that could not use a warm sandbox")
+metrics_service.describe("autograder_pool_errors_total", "counter", "Pooled gradings whose harness timed out, crashed or returned malformed results")
+metrics_service.describe("autograder_pool_replaced_total", "counter", "Idle sandboxes replaced after a failed health check")
+
+
+def get_pool() -> Optional[SandboxPool]:
+    return _pool
+
+
+def start_pool(image: str):
+    """Start the pool once per process; AUTOGRADER_POOL_SIZE=0 keeps the cold path only."""
+    global _pool
+    if _pool is not None or POOL_SIZE <= 0:
+        return
+    _pool = SandboxPool(POOL_SIZE, image)
+    metrics_service.register_collector(lambda: {"autograder_pool_ready": _pool.ready if _pool else 0})
+    _pool.start()
+
+
+def stop_pool():
+    global _pool
+    if _pool is not None:
+        _pool.stop()
+        _pool = None
@@ -0,0 +1,217 @@
+"""Course catalog search.
+
+On PostgreSQL, matching and ranking use the ``courses.search_vector`` tsvector
+(GIN-indexed, see migration 6a1d3f8e2c57) with a pg_trgm similarity match on
+the title for typo tolerance. Other dialects (SQLite test runs) fall back to an
+in-process inverted index over title and description.
+
+The fallback index belongs to one process: it is loaded from the database on
+first use and afterwards only sees writes committed through that process's own
+sessions. It is meant for single-worker development and tests; with several
+workers, each one misses the others' changes until it restarts.
+"""
+import difflib
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Iterator, Optional
+
+from sqlalchemy import Float, case, cast, event, false, literal, literal_column, or_, text
+from sqlalchemy import func as sql_func
+from sqlalchemy.orm import Session
+
+from app.models.course import Course
+
+SEARCH_CONFIG = "english"
+TITLE_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_UPDATE_VECTOR_SQL = text(
+    "UPDATE courses SET search_vector = "
+    "setweight(to_tsvector(:config, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector(:config, coalesce(description, '')), 'B') "
+    "WHERE id = :course_id"
+)
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _tokenize(value: str | None) -> list[str]:
+    return _TOKEN_RE.findall((value or "").lower())
+
+
+class _InvertedIndex:
+    """Weighted term -> {course_id: frequency} postings, loaded lazily from the DB."""
+
+    def __init__(self):
+        self._postings: dict[str, dict[int, int]] = defaultdict(dict)
+        self._terms: dict[int, set[str]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self, db: Session):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for course_id, title, description in db.query(Course.id, Course.title, Course.description):
+                self._add(course_id, title, description)
+            self._loaded = True
+
+    def add(self, course_id: int, title: str | None, description: str | None):
+        with self._lock:
+            self._remove(course_id)
+            self._add(course_id, title, description)
+
+    def remove(self, course_id: int):
+        with self._lock:
+            self._remove(course_id)
+
+    def search(self, query: str) -> dict[int, float]:
+        """Return {course_id: score} for courses matching every query term (or a close spelling)."""
+        tokens = _tokenize(query)
+        if not tokens:
+            return {}
+        total = max(len(self._terms), 1)
+        scores: dict[int, float] | None = None
+        for token in tokens:
+            token_scores: dict[int, float] = {}
+            for term in self._expand(token):
+                postings = self._postings.get(term, {})
+                idf = math.log(1 + total / (1 + len(postings)))
+                penalty = 1.0 if term == token else 0.5
+                for course_id, freq in postings.items():
+                    token_scores[course_id] = token_scores.get(course_id, 0.0) + freq * idf * penalty
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {cid: s + token_scores[cid] for cid, s in scores.items() if cid in token_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def _expand(self, token: str) -> list[str]:
+        if token in self._postings:
+            terms = [token]
+        else:
+            terms = difflib.get_close_matches(token, self._postings.keys(), n=3, cutoff=0.8)
+        terms += [t for t in self._postings if t != token and t.startswith(token) and len(token) >= 3]
+        return terms
+
+    def _add(self, course_id: int, title: str | None, description: str | None):
+        counts: dict[str, int] = defaultdict(int)
+        for token in _tokenize(title):
+            counts[token] += TITLE_WEIGHT
+        for token in _tokenize(description):
+            counts[token] += DESCRIPTION_WEIGHT
+        for token, freq in counts.items():
+            self._postings[token][course_id] = freq
+        self._terms[course_id] = set(counts)
+
+    def _remove(self, course_id: int):
+        for token in self._terms.pop(course_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(course_id, None)
+            if not postings:
+                del self._postings[token]
+
+
+_memory_index = _InvertedIndex()
+
+# In-process index changes made in a session, applied only once it commits
+_PENDING_KEY = "search_index_pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session):
+    for course_id, document in session.info.pop(_PENDING_KEY, {}).items():
+        if document is None:
+            _memory_index.remove(course_id)
+        else:
+            _memory_index.add(course_id, *document)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session: Session, transaction):
+    # Runs after after_commit, so anything still pending was rolled back or abandoned
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def index_course(db: Session, course: Course):
+    """Refresh the search document for a course after its title/description changed.
+
+    Call inside the transaction that changes the course; the in-process index is
+    only updated if that transaction commits.
+    """
+    if _is_postgres(db):
+        db.execute(_UPDATE_VECTOR_SQL, {"config": SEARCH_CONFIG, "course_id": course.id})
+    else:
+        db.info.setdefault(_PENDING_KEY, {})[course.id] = (course.title, course.description)
+
+
+def unindex_course(db: Session, course_id: int):
+    """Drop a course from the in-process index when the deleting transaction commits.
+
+    PostgreSQL search vectors go with the row.
+    """
+    if not _is_postgres(db):
+        db.info.setdefault(_PENDING_KEY, {})[course_id] = None
+
+
+def _postgres_clause(search: str):
+    vector = literal_column("courses.search_vector")
+    tsquery = sql_func.websearch_to_tsquery(SEARCH_CONFIG, search)
+    criterion = or_(vector.op("@@")(tsquery), Course.title.op("%")(search))
+    rank = sql_func.ts_rank_cd(vector, tsquery) + sql_func.similarity(Course.title, search)
+    return criterion, cast(rank, Float)
+
+
+def _scores_clause(scores: dict[int, float]):
+    if not scores:
+        return false(), literal(0.0, Float)
+    return Course.id.in_(scores.keys()), case(scores, value=Course.id, else_=0.0)
+
+
+def search_clause(db: Session, search: str):
+    """Return (filter criterion, rank expression) for a free-text catalog search."""
+    if _is_postgres(db):
+        return _postgres_clause(search)
+    _memory_index.ensure_loaded(db)
+    return _scores_clause(_memory_index.search(search))
+
+
+def ranked_search_clauses(db: Session, search: str, after: Optional[tuple] = None, window: int = 25) -> Iterator:
+    """Yield (criterion, rank) clauses for a relevance-ordered search, best matches first.
+
+    PostgreSQL ranks in the query, so there is a single clause. The in-process
+    fallback instead sorts its matches by (score, id) descending, skips past the
+    `after` cursor and yields them in consecutive windows of `window` matches,
+    doubling in size, so each statement's IN list and CASE only cover about one
+    page. The caller runs the windows in order and stops once it has a full page;
+    rows the other filters reject just move it on to the next window.
+    """
+    if _is_postgres(db):
+        return iter([_postgres_clause(search)])
+    _memory_index.ensure_loaded(db)
+    ranked = sorted(((score, course_id) for course_id, score in _memory_index.search(search).items()), reverse=True)
+    if after is not None:
+        ranked = [entry for entry in ranked if entry < tuple(after)]
+    return _windows(ranked, window)
+
+
+def _windows(ranked: list[tuple[float, int]], window: int) -> Iterator:
+    start = 0
+    while start < len(ranked):
+        chunk = ranked[start:start + window]
+        yield _scores_clause({course_id: score for score, course_id in chunk})
+        start += window
+        window *= 2
@@ -0,0 +1,159 @@
+"""Platform counter rollup behind the admin and landing stats endpoints.
+
+Write paths apply atomic ``UPDATE platform_stats SET x = x + :delta`` deltas inside
+their own transaction, so readers fetch one row instead of scanning users, courses,
+enrollments and payments. ``reconcile`` recomputes every counter from the source
+tables and runs periodically to correct any drift.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import func as sql_func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models.course import Course
+from app.models.enrollment import Enrollment
+from app.models.payment import Payment
+from app.models.platform_stat import PlatformStat
+from app.models.user import User
+
+STATS_ROW_ID = 1
+
+# Roles that have their own counter column
+_ROLE_COUNTERS = {"student": "total_students", "teacher": "total_teachers"}
+
+_reconcile_thread = None
+
+
+def record(db: Session, **deltas):
+    """Atomically add `deltas` (counter name -> amount) to the rollup row in the caller's transaction."""
+    deltas = {name: amount for name, amount in deltas.items() if amount}
+    if not deltas:
+        return
+    values = {getattr(PlatformStat, name): getattr(PlatformStat, name) + amount for name, amount in deltas.items()}
+    updated = (
+        db.query(PlatformStat)
+        .filter(PlatformStat.id == STATS_ROW_ID)
+        .update(values, synchronize_session=False)
+    )
+    if not updated:
+        # No rollup row yet (fresh database): build it from the source tables,
+        # which already include this transaction's flushed changes.
+        db.flush()
+        reconcile(db)
+
+
+def user_registered(db: Session, role: str):
+    deltas = {"total_users": 1}
+    if role in _ROLE_COUNTERS:
+        deltas[_ROLE_COUNTERS[role]] = 1
+    record(db, **deltas)
+
+
+def role_changed(db: Session, old_role: str, new_role: str):
+    if old_role == new_role:
+        return
+    deltas = {}
+    if old_role in _ROLE_COUNTERS:
+        deltas[_ROLE_COUNTERS[old_role]] = -1
+    if new_role in _ROLE_COUNTERS:
+        deltas[_ROLE_COUNTERS[new_role]] = 1
+    record(db, **deltas)
+
+
+def course_status_changed(db: Session, old_status: str, new_status: str):
+    if old_status == new_status:
+        return
+    if new_status == "published":
+        record(db, published_courses=1)
+    elif old_status == "published":
+        record(db, published_courses=-1)
+
+
+def course_removed(db: Session, course: Course):
+    """Subtract a course and the enrollments/payments its delete cascades to. Call before deleting."""
+    enrollments = db.query(sql_func.count(Enrollment.id)).filter(Enrollment.course_id == course.id).scalar() or 0
+    revenue = db.query(sql_func.sum(Payment.amount)).filter(
+        Payment.course_id == course.id, Payment.status == "completed"
+    ).scalar() or 0.0
+    record(
+        db,
+        total_courses=-1,
+        published_courses=-1 if course.status == "published" else 0,
+        total_enrollments=-enrollments,
+        total_revenue=-float(revenue),
+    )
+
+
+def reconcile(db: Session) -> PlatformStat:
+    """Recompute every counter from the source tables and store it on the rollup row."""
+    # Lock the row first: writers whose deltas are already applied commit before we
+    # count, and writers still in flight apply their delta on top of our totals.
+    stats = db.query(PlatformStat).filter(PlatformStat.id == STATS_ROW_ID).with_for_update().first()
+    role_counts = dict(db.query(User.role, sql_func.count(User.id)).group_by(User.role).all())
+    course_counts = dict(db.query(Course.status, sql_func.count(Course.id)).group_by(Course.status).all())
+    revenue = db.query(sql_func.sum(Payment.amount)).filter(Payment.status == "completed").scalar() or 0.0
+
+    if stats is None:
+        stats = PlatformStat(id=STATS_ROW_ID)
+        db.add(stats)
+    stats.total_users = sum(role_counts.values())
+    stats.total_students = role_counts.get("student", 0)
+    stats.total_teachers = role_counts.get("teacher", 0)
+    stats.total_courses = sum(course_counts.values())
+    stats.published_courses = course_counts.get("published", 0)
+    stats.total_enrollments = db.query(sql_func.count(Enrollment.id)).scalar() or 0
+    stats.total_revenue = float(revenue)
+    stats.reconciled_at = datetime.now(timezone.utc)
+    return stats
+
+
+def get_stats(db: Session) -> PlatformStat:
+    """Return the rollup row, building it on first use."""
+    stats = db.query(PlatformStat).filter(PlatformStat.id == STATS_ROW_ID).first()
+    if stats is None:
+        stats = reconcile(db)
+        db.commit()
+        db.refresh(stats)
+    return stats
+
+
+async def get_stats_async(db: AsyncSession) -> PlatformStat:
+    """get_stats for `async def` routes."""
+    stats = await db.get(PlatformStat, STATS_ROW_ID)
+    if stats is None and db.info.get("replica"):
+        # Building the row is a write: do it on the primary
+        async with AsyncSessionLocal() as primary:
+            return await get_stats_async(primary)
+    if stats is None:
+        stats = await db.run_sync(reconcile)
+        await db.commit()
+    return stats
+
+
+def _reconcile_loop(interval: int):
+    while True:
+        time.sleep(interval)
+        db = SessionLocal()
+        try:
+            reconcile(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Platform stats reconcile failed: {e}")
+        finally:
+            db.close()
+
+
+def start_reconcile_loop():
+    """Start the periodic drift-correction thread once per process (0 disables it)."""
+    global _reconcile_thread
+    interval = get_settings().STATS_RECONCILE_INTERVAL_SECONDS
+    if interval <= 0 or _reconcile_thread is not None:
+        return
+    _reconcile_thread = threading.Thread(target=_reconcile_loop, args=(interval,), daemon=True, name="stats-reconcile")
+    _reconcile_thread.start()
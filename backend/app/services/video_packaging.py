@@ -0,0 +1,335 @@
+"""Background HLS packaging of lesson videos.
+
+A lesson's ``video_url`` points at the teacher's upload, a single full-bitrate
+file. When a lesson is saved with a video from our bucket, a ``video_packages``
+row is queued for that source object. Worker threads claim rows the same way
+the grading queue does (``FOR UPDATE SKIP LOCKED`` plus a lease; a job that
+raises is requeued at once). Each job downloads the source and has ffmpeg
+transcode it into an adaptive-bitrate ladder of HLS variants with a master
+playlist. The output is uploaded to ``videos/hls/<uuid>/``, and every lesson
+using that source gets ``hls_manifest_url``. Rungs above the source resolution
+are skipped.
+"""
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.lesson import Lesson
+from app.models.video_package import VideoPackage
+from app.services import metrics_service, minio_service
+
+QUEUED = "queued"
+PROCESSING = "processing"
+READY = "ready"
+FAILED = "failed"
+
+SEGMENT_SECONDS = 6
+MASTER_PLAYLIST = "master.m3u8"
+# (height, video bitrate, audio bitrate)
+LADDER = ((360, 800_000, 96_000), (720, 2_800_000, 128_000), (1080, 5_000_000, 128_000))
+CONTENT_TYPES = {".m3u8": "application/vnd.apple.mpegurl", ".ts": "video/mp2t"}
+
+# Lesson videos are uploaded to either folder; only packaged when the extension says video
+_SOURCE_RE = re.compile(r"^(?:videos|materials)/([a-f0-9]{32})\.(?:mp4|m4v|mov|webm|mkv|avi)$")
+
+_wakeup = threading.Event()
+_workers: list[threading.Thread] = []
+
+metrics_service.describe("video_packaging_queue_depth", "gauge", "Lesson videos waiting to be packaged")
+metrics_service.describe("video_packaging_jobs_total", "counter", "Video packaging jobs finished, by outcome")
+metrics_service.describe("video_packaging_job_seconds", "summary", "Video packaging job run time")
+
+
+class PackagingError(Exception):
+    """ffmpeg/ffprobe failed on a source video."""
+
+
+# --- ffmpeg ---
+
+def _run(command: list[str], timeout: int) -> subprocess.CompletedProcess:
+    try:
+        return subprocess.run(command, capture_output=True, text=True, timeout=timeout, check=False)
+    except subprocess.TimeoutExpired as e:
+        # run() has already killed the process; fail the job instead of waiting out its lease
+        raise PackagingError(f"{os.path.basename(command[0])} timed out after {timeout}s") from e
+
+
+def _probe(source_path: str) -> tuple[int, bool]:
+    """Return (video height, has audio) for a local file."""
+    completed = _run(
+        [get_settings().FFPROBE_BINARY, "-v", "error", "-show_entries", "stream=codec_type,height", "-of", "json", source_path],
+        timeout=60,
+    )
+    if completed.returncode != 0:
+        raise PackagingError(completed.stderr.strip() or "ffprobe failed")
+    streams = json.loads(completed.stdout).get("streams", [])
+    heights = [s["height"] for s in streams if s.get("codec_type") == "video" and s.get("height")]
+    if not heights:
+        raise PackagingError("No video stream found")
+    return heights[0], any(s.get("codec_type") == "audio" for s in streams)
+
+
+def _ladder(source_height: int) -> list[tuple[int, int, int]]:
+    rungs = [rung for rung in LADDER if rung[0] <= source_height]
+    if not rungs:
+        # Smaller than the lowest rung: one variant at the source height
+        rungs = [(source_height - source_height % 2, LADDER[0][1], LADDER[0][2])]
+    return rungs
+
+
+def package_hls(source_path: str, output_dir: str) -> str:
+    """Transcode a local video into HLS variants under `output_dir`; returns the master playlist path."""
+    source_height, has_audio = _probe(source_path)
+    rungs = _ladder(source_height)
+
+    split = f"[0:v]split={len(rungs)}" + "".join(f"[v{i}]" for i in range(len(rungs)))
+    scales = [f"[v{i}]scale=-2:{height}[v{i}out]" for i, (height, _, _) in enumerate(rungs)]
+    command = [get_settings().FFMPEG_BINARY, "-y", "-v", "error", "-i", source_path, "-filter_complex", ";".join([split, *scales])]
+    stream_map = []
+    for i, (_, video_bitrate, audio_bitrate) in enumerate(rungs):
+        command += ["-map", f"[v{i}out]"]
+        command += [f"-b:v:{i}", str(video_bitrate), f"-maxrate:v:{i}", str(int(video_bitrate * 1.07)), f"-bufsize:v:{i}", str(int(video_bitrate * 1.5))]
+        if has_audio:
+            command += ["-map", "0:a:0", f"-b:a:{i}", str(audio_bitrate)]
+            stream_map.append(f"v:{i},a:{i}")
+        else:
+            stream_map.append(f"v:{i}")
+    command += [
+        "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main",
+        # Keyframe on every segment boundary so variants switch cleanly
+        "-force_key_frames", f"expr:gte(t,n_forced*{SEGMENT_SECONDS})", "-sc_threshold", "0",
+    ]
+    if has_audio:
+        command += ["-c:a", "aac", "-ac", "2"]
+    command += [
+        "-f", "hls",
+        "-hls_time", str(SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(output_dir, "v%v", "segment_%04d.ts"),
+        "-master_pl_name", MASTER_PLAYLIST,
+        "-var_stream_map", " ".join(stream_map),
+        os.path.join(output_dir, "v%v", "index.m3u8"),
+    ]
+    completed = _run(command, timeout=get_settings().VIDEO_PACKAGING_TIMEOUT_SECONDS)
+    if completed.returncode != 0:
+        raise PackagingError(completed.stderr.strip()[-2000:] or "ffmpeg failed")
+    return os.path.join(output_dir, MASTER_PLAYLIST)
+
+
+# --- Queue ---
+
+def source_object(video_url: Optional[str]) -> Optional[str]:
+    """The bucket object behind a lesson video URL, or None for external videos."""
+    base = minio_service.public_url("")
+    if not video_url or not video_url.startswith(base):
+        return None
+    object_name = video_url[len(base):]
+    return object_name if _SOURCE_RE.match(object_name) else None
+
+
+def _output_prefix(source: str) -> str:
+    return f"videos/hls/{_SOURCE_RE.match(source).group(1)}/"
+
+
+def sync_lesson(db: Session, lesson: Lesson):
+    """Point a saved lesson at its HLS package, queueing one if needed; the caller commits, then notify()."""
+    source = source_object(lesson.video_url)
+    lesson.hls_manifest_url = None
+    if source is None:
+        return
+    package = db.query(VideoPackage).filter(VideoPackage.source_object == source).first()
+    if package is None:
+        package = _queue_package(db, source)
+    if package is None:
+        return
+    if package.status == READY:
+        lesson.hls_manifest_url = minio_service.public_url(package.manifest_object)
+    elif package.status == FAILED:
+        package.status = QUEUED  # saving the lesson again retries a failed package
+        package.attempts = 0
+        package.error = None
+
+
+def _queue_package(db: Session, source: str) -> Optional[VideoPackage]:
+    """Queue a package for `source`; if a concurrent save queued it first, return that row instead."""
+    try:
+        # A savepoint, so losing the race on the unique source_object keeps the caller's transaction
+        with db.begin_nested():
+            db.add(VideoPackage(source_object=source, status=QUEUED, attempts=0))
+        return None
+    except IntegrityError:
+        return db.query(VideoPackage).filter(VideoPackage.source_object == source).one()
+
+
+def notify():
+    _wakeup.set()
+
+
+def queue_depth(db: Session) -> int:
+    return db.query(VideoPackage).filter(VideoPackage.status == QUEUED).count()
+
+
+def _claim(db: Session) -> Optional[VideoPackage]:
+    candidate = (
+        db.query(VideoPackage.id)
+        .filter(VideoPackage.status == QUEUED)
+        .order_by(VideoPackage.id.asc())
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if candidate is None:
+        db.rollback()
+        return None
+    claimed = (
+        db.query(VideoPackage)
+        .filter(VideoPackage.id == candidate.id, VideoPackage.status == QUEUED)
+        .update(
+            {
+                VideoPackage.status: PROCESSING,
+                VideoPackage.locked_at: datetime.now(timezone.utc),
+                VideoPackage.attempts: VideoPackage.attempts + 1,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if not claimed:
+        return None
+    return db.query(VideoPackage).filter(VideoPackage.id == candidate.id).first()
+
+
+def _process(db: Session, package: VideoPackage):
+    started = time.perf_counter()
+    prefix = _output_prefix(package.source_object)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            source_path = os.path.join(workdir, "source" + os.path.splitext(package.source_object)[1])
+            minio_service.download_file(package.source_object, source_path)
+            output_dir = os.path.join(workdir, "hls")
+            os.makedirs(output_dir)
+            package_hls(source_path, output_dir)
+            for root, _, files in os.walk(output_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    relative = os.path.relpath(path, output_dir).replace(os.sep, "/")
+                    content_type = CONTENT_TYPES.get(os.path.splitext(name)[1], "application/octet-stream")
+                    minio_service.upload_path(prefix + relative, path, content_type)
+    except PackagingError as e:
+        # Bad input: retrying will not help
+        package.status = FAILED
+        package.error = str(e)
+        package.locked_at = None
+        db.commit()
+        metrics_service.inc('video_packaging_jobs_total{status="failed"}')
+        return
+
+    package.status = READY
+    package.manifest_object = prefix + MASTER_PLAYLIST
+    package.error = None
+    package.locked_at = None
+    manifest_url = minio_service.public_url(package.manifest_object)
+    source_url = minio_service.public_url(package.source_object)
+    db.query(Lesson).filter(Lesson.video_url == source_url).update(
+        {Lesson.hls_manifest_url: manifest_url}, synchronize_session=False
+    )
+    db.commit()
+    metrics_service.observe("video_packaging_job_seconds", time.perf_counter() - started)
+    metrics_service.inc('video_packaging_jobs_total{status="ready"}')
+
+
+def _release(package: VideoPackage):
+    """Requeue a job that did not finish; give up after VIDEO_PACKAGING_MAX_ATTEMPTS."""
+    package.locked_at = None
+    if (package.attempts or 0) >= get_settings().VIDEO_PACKAGING_MAX_ATTEMPTS:
+        package.status = FAILED
+        package.error = "Packaging did not finish"
+    else:
+        package.status = QUEUED
+
+
+def requeue_failed(db: Session, package_id: int):
+    """Release a job whose processing raised, in a new transaction on `db`."""
+    package = (
+        db.query(VideoPackage)
+        .filter(VideoPackage.id == package_id, VideoPackage.status == PROCESSING)
+        .with_for_update()
+        .first()
+    )
+    if package is not None:
+        _release(package)
+    db.commit()
+
+
+def requeue_stale(db: Session) -> int:
+    """Requeue jobs whose worker died mid-transcode; give up after VIDEO_PACKAGING_MAX_ATTEMPTS."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=get_settings().VIDEO_PACKAGING_TIMEOUT_SECONDS * 2)
+    stale = (
+        db.query(VideoPackage)
+        .filter(VideoPackage.status == PROCESSING, VideoPackage.locked_at < cutoff)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for package in stale:
+        _release(package)
+    db.commit()
+    return len(stale)
+
+
+def _worker_loop():
+    settings = get_settings()
+    last_sweep = 0.0
+    while True:
+        db = SessionLocal()
+        try:
+            if time.monotonic() - last_sweep > settings.VIDEO_PACKAGING_TIMEOUT_SECONDS / 2:
+                requeue_stale(db)
+                last_sweep = time.monotonic()
+            package = _claim(db)
+            if package is not None:
+                package_id = package.id
+                try:
+                    _process(db, package)
+                except Exception as e:
+                    # Storage or database trouble, worth retrying; lease expiry is only for workers that die
+                    db.rollback()
+                    print(f"⚠️ Video packaging job {package_id} failed: {e}")
+                    requeue_failed(db, package_id)
+                continue
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Video packaging worker error: {e}")
+        finally:
+            db.close()
+        _wakeup.wait(settings.VIDEO_PACKAGING_POLL_SECONDS)
+        _wakeup.clear()
+
+
+def _queue_depth_gauge() -> dict[str, float]:
+    db = SessionLocal()
+    try:
+        return {"video_packaging_queue_depth": queue_depth(db)}
+    finally:
+        db.close()
+
+
+def start_workers():
+    """Start the packaging worker threads once per process (VIDEO_PACKAGING_WORKERS=0 disables them)."""
+    workers = get_settings().VIDEO_PACKAGING_WORKERS
+    if _workers or workers <= 0:
+        return
+    metrics_service.register_collector(_queue_depth_gauge)
+    for index in range(workers):
+        worker = threading.Thread(target=_worker_loop, daemon=True, name=f"video-packaging-{index}")
+        worker.start()
+        _workers.append(worker)
@@ -1,28 +1,34 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.config import get_settings
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.user import User
+from app.models.permission import ManagerPermission
+from app.services import password_service
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_service.hash_password(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_service.verify_password(plain_password, hashed_password)
 
 
 def create_access_token(data: dict) -> str:
@@ -32,20 +38,129 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+@dataclass(frozen=True)
+class PermissionFlags:
+    can_manage_users: bool = False
+    can_manage_courses: bool = False
+    can_manage_categories: bool = False
+    can_manage_applications: bool = False
+    can_manage_coupons: bool = False
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Authorization snapshot of a user: what routers read from `current_user`."""
+    id: int
+    role: str
+    is_active: bool
+    permissions: Optional[PermissionFlags] = None
+
+
+class _PrincipalCache:
+    """Per-process TTL + LRU map of user id -> UserPrincipal."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, tuple[float, UserPrincipal]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[UserPrincipal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: UserPrincipal):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+_principal_cache = _PrincipalCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+def invalidate_user(user_id: int):
+    """Drop a cached principal after its role, active flag or permissions change."""
+    _principal_cache.invalidate(user_id)
+
+
+def _user_id_from_token(token: str) -> Optional[int]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id_str: str = payload.get("sub")
         if user_id_str is None:
             return None
-        user_id = int(user_id_str)
+        return int(user_id_str)
     except (JWTError, ValueError):
         return None
 
-    user = db.query(User).filter(User.id == user_id).first()
+
+def _principal_query(user_id: int):
+    return (
+        select(User.id, User.role, User.is_active, ManagerPermission)
+        .outerjoin(ManagerPermission, ManagerPermission.user_id == User.id)
+        .filter(User.id == user_id)
+    )
+
+
+def _cache_principal(row) -> Optional[UserPrincipal]:
+    if row is None:
+        return None
+    perms = row.ManagerPermission
+    principal = UserPrincipal(
+        id=row.id,
+        role=row.role,
+        is_active=bool(row.is_active),
+        permissions=PermissionFlags(
+            can_manage_users=bool(perms.can_manage_users),
+            can_manage_courses=bool(perms.can_manage_courses),
+            can_manage_categories=bool(perms.can_manage_categories),
+            can_manage_applications=bool(perms.can_manage_applications),
+            can_manage_coupons=bool(perms.can_manage_coupons),
+        ) if perms is not None else None,
+    )
+    _principal_cache.put(principal)
+    return principal
+
+
+def _load_principal(db: Session, user_id: int) -> Optional[UserPrincipal]:
+    principal = _principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    return _cache_principal(db.execute(_principal_query(user_id)).first())
+
+
+async def _load_principal_async(db: AsyncSession, user_id: int) -> Optional[UserPrincipal]:
+    principal = _principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    return _cache_principal((await db.execute(_principal_query(user_id))).first())
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> UserPrincipal:
+    user_id = _user_id_from_token(token)
+    if user_id is None:
+        return None
+
+    user = _load_principal(db, user_id)
     if user is None or not user.is_active:
         return None
     return user
@@ -54,26 +169,38 @@ def get_current_user(
 def get_current_user_optional(
     token: str = Depends(oauth2_scheme_optional),
     db: Session = Depends(get_db),
-) -> User:
+) -> UserPrincipal:
     if not token:
         return None
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id_str: str = payload.get("sub")
-        if user_id_str is None:
-            return None
-        user_id = int(user_id_str)
-    except (JWTError, ValueError):
+    user_id = _user_id_from_token(token)
+    if user_id is None:
         return None  # Invalid token, treat as guest
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = _load_principal(db, user_id)
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+async def get_current_user_optional_async(
+    token: str = Depends(oauth2_scheme_optional),
+    db: AsyncSession = Depends(get_async_db),
+) -> UserPrincipal:
+    """get_current_user_optional for `async def` routes (shares the principal cache)."""
+    if not token:
+        return None
+    user_id = _user_id_from_token(token)
+    if user_id is None:
+        return None
+
+    user = await _load_principal_async(db, user_id)
     if user is None or not user.is_active:
         return None
     return user
 
 
 def require_role(allowed_roles: list[str]):
-    def role_checker(current_user: User = Depends(get_current_user)):
+    def role_checker(current_user: UserPrincipal = Depends(get_current_user)):
         if current_user is None:
             return None
         if current_user.role not in allowed_roles:
@@ -87,7 +214,7 @@ def require_permission(permission_name: str):
     Allows access if the user is an 'admin', OR if the user is a 'manager'
     and has the specific permission set to True in their ManagerPermission record.
     """
-    def permission_checker(current_user: User = Depends(get_current_user)):
+    def permission_checker(current_user: UserPrincipal = Depends(get_current_user)):
         if current_user is None:
             return None
         
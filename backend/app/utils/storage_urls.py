@@ -0,0 +1,45 @@
+"""Public URLs of stored objects and the names of derived files.
+
+Pure string derivation from settings and object names, with no storage access,
+so schemas can expose these URLs without depending on the storage services.
+"""
+import re
+from typing import Optional
+
+from app.config import get_settings
+
+# Thumbnail renditions (rendered by services/image_service.py) are stored next to
+# the original as thumbnails/<uuid>_w<width>.<ext>
+RENDITION_WIDTHS = (320, 640, 1280)
+RENDITION_EXTENSIONS = ("webp", "jpg")
+
+_ORIGINAL_RE = re.compile(r"^thumbnails/([a-f0-9]{32})\.[a-z0-9]+$")
+
+
+def public_url(object_name: str) -> str:
+    settings = get_settings()
+    protocol = "https" if settings.MINIO_SECURE else "http"
+    return f"{protocol}://{settings.MINIO_EXTERNAL_ENDPOINT}/{settings.MINIO_BUCKET_NAME}/{object_name}"
+
+
+def rendition_name(object_name: str, width: int, ext: str) -> Optional[str]:
+    match = _ORIGINAL_RE.match(object_name or "")
+    if match is None:
+        return None
+    return f"thumbnails/{match.group(1)}_w{width}.{ext}"
+
+
+def rendition_urls(thumbnail_url: Optional[str]) -> Optional[dict[str, dict[str, str]]]:
+    """{ext: {width: url}} for a thumbnail stored in our bucket, else None (external or legacy URLs)."""
+    if not thumbnail_url:
+        return None
+    base = public_url("")
+    if not thumbnail_url.startswith(base):
+        return None
+    object_name = thumbnail_url[len(base):]
+    if rendition_name(object_name, RENDITION_WIDTHS[0], "jpg") is None:
+        return None
+    return {
+        ext: {str(width): public_url(rendition_name(object_name, width, ext)) for width in RENDITION_WIDTHS}
+        for ext in RENDITION_EXTENSIONS
+    }
@@ -0,0 +1,87 @@
+"""
+Throughput benchmark for the public read endpoints.
+Usage: python scripts/api_benchmark.py [--base-url http://localhost:8000] [--concurrency 200] [--requests 5000] [--course-id 1]
+
+Fires requests from N concurrent clients at a running server and prints
+requests/s and latency percentiles per endpoint. Run it against a build
+before and after a change with the same database to compare.
+"""
+import argparse
+import asyncio
+import contextlib
+import time
+
+import httpx
+
+
+def endpoints(course_id: int) -> list[str]:
+    return [
+        "/api/courses/",
+        f"/api/courses/{course_id}",
+        f"/api/courses/{course_id}/lessons",
+        f"/api/reviews/course/{course_id}",
+        "/api/landing/stats",
+    ]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+async def bench(clients: list[httpx.AsyncClient], path: str, total: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(worker(client) for client in clients))
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "errors": errors,
+        "client_cpu": (time.process_time() - cpu_started) / elapsed,
+    }
+
+
+async def main(args):
+    # One keep-alive connection per simulated client. A single shared httpx pool
+    # spends CPU per request in proportion to its open connections and becomes the
+    # bottleneck long before the server does.
+    limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+    async with contextlib.AsyncExitStack() as stack:
+        clients = [
+            await stack.enter_async_context(httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60))
+            for _ in range(args.concurrency)
+        ]
+        print(f"📊 {args.concurrency} concurrent clients, {args.requests} requests per endpoint against {args.base_url}")
+        print(f"{'endpoint':36} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7} {'client cpu':>11}")
+        for path in endpoints(args.course_id):
+            await asyncio.gather(*(client.get(path) for client in clients))  # warm up, opens the connections
+            r = await bench(clients, path, args.requests)
+            print(f"{path:36} {r['rps']:8.0f} {r['p50_ms']:7.1f}ms {r['p99_ms']:7.1f}ms {r['errors']:7d} {r['client_cpu']:10.0%}")
+        print("A client cpu near 100% means the benchmark, not the server, set the pace; run it on another machine.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--course-id", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,44 @@
+"""
+Backfill script — renders thumbnail renditions for courses uploaded before they existed.
+Run once after deploying renditions: python scripts/backfill_thumbnails.py
+
+Courses whose thumbnail_url points outside the bucket are skipped; the catalog
+keeps serving the original for those.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.models.course import Course
+from app.services import image_service, minio_service
+from app.utils.storage_urls import rendition_urls
+
+
+def backfill():
+    db = SessionLocal()
+    base = minio_service.public_url("")
+    done = skipped = failed = 0
+    try:
+        urls = [url for (url,) in db.query(Course.thumbnail_url).filter(Course.thumbnail_url.isnot(None)).distinct()]
+        for url in urls:
+            if rendition_urls(url) is None:
+                skipped += 1
+                continue
+            object_name = url[len(base):]
+            try:
+                image_service.create_renditions(object_name, minio_service.read_object(object_name))
+                done += 1
+            except Exception as e:
+                failed += 1
+                print(f"  ⚠️ {object_name}: {e}")
+    finally:
+        db.close()
+        image_service.shutdown()
+    print(f"✅ Renditions created for {done} thumbnails ({skipped} external skipped, {failed} failed)")
+
+
+if __name__ == "__main__":
+    print("🖼️ Backfilling thumbnail renditions...")
+    backfill()
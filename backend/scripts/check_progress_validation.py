@@ -0,0 +1,60 @@
+"""
+Check that player heartbeats with an invalid position are rejected before they reach the database.
+Usage: python scripts/check_progress_validation.py   (exit code 1 on a failure)
+
+ProgressEvent.position_seconds must be a finite number >= 0. Checks the schema
+directly, then POSTs raw JSON bodies (NaN and Infinity are valid JSON tokens for
+Python's parser) to /api/enrollments/progress/events with a stand-in user, and
+expects a 422 for each. Rejected bodies never open a connection, so this runs
+without a database.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.main import app as fastapi_app
+from app.schemas.schemas import ProgressEvent
+from app.utils.auth import get_current_user
+
+VALID = [None, 0, 12.5]
+INVALID = ["-1", "-0.5", "NaN", "Infinity", "-Infinity"]
+
+
+def main() -> int:
+    failures = 0
+
+    for value in VALID:
+        try:
+            ProgressEvent(lesson_id=1, position_seconds=value)
+            print(f"✅ schema accepts position_seconds={value}")
+        except ValidationError:
+            print(f"❌ schema rejects position_seconds={value}")
+            failures += 1
+
+    fastapi_app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=0, role="student")
+    try:
+        client = TestClient(fastapi_app)
+        for token in INVALID:
+            body = '{"course_id": 1, "events": [{"lesson_id": 1, "position_seconds": %s}]}' % token
+            response = client.post(
+                "/api/enrollments/progress/events", content=body, headers={"Content-Type": "application/json"}
+            )
+            if response.status_code == 422:
+                print(f"✅ events endpoint rejects position_seconds={token}")
+            else:
+                print(f"❌ events endpoint answered {response.status_code} for position_seconds={token}")
+                failures += 1
+    finally:
+        fastapi_app.dependency_overrides.pop(get_current_user, None)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
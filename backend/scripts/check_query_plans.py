@@ -0,0 +1,107 @@
+"""
+Query-plan regression check: asserts the hot filter paths are served by their indexes.
+Run after migrations: python scripts/check_query_plans.py   (exit code 1 on a regression)
+
+Works against PostgreSQL (EXPLAIN with sequential scans disabled, so tiny dev
+tables still show which index the planner would pick) and SQLite
+(EXPLAIN QUERY PLAN).
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import select, text
+
+from app.database import engine
+from app.models import Certificate, Course, Enrollment, Lesson, Payment, Progress, Review
+
+# (description, statement, index expected in the plan)
+CHECKS = [
+    (
+        "enrollment lookup (enroll, lesson access)",
+        select(Enrollment).filter(Enrollment.user_id == 1, Enrollment.course_id == 1),
+        "uq_enrollments_user_course",
+    ),
+    (
+        "recent enrollments of a course (analytics)",
+        select(Enrollment).filter(Enrollment.course_id == 1).order_by(Enrollment.enrolled_at.desc()).limit(10),
+        "ix_enrollments_course_enrolled_at",
+    ),
+    (
+        "lesson progress (update_progress)",
+        select(Progress).filter(Progress.enrollment_id == 1, Progress.lesson_id == 1),
+        "uq_progress_enrollment_lesson",
+    ),
+    (
+        "course reviews, newest first",
+        select(Review).filter(Review.course_id == 1).order_by(Review.created_at.desc()),
+        "ix_reviews_course_created_at",
+    ),
+    (
+        "existing review check",
+        select(Review).filter(Review.user_id == 1, Review.course_id == 1),
+        "uq_reviews_user_course",
+    ),
+    (
+        "completed payment check (create_payment)",
+        select(Payment).filter(Payment.user_id == 1, Payment.course_id == 1, Payment.status == "completed"),
+        "ix_payments_user_course_status",
+    ),
+    (
+        "course lessons in order (list_lessons)",
+        select(Lesson).filter(Lesson.course_id == 1).order_by(Lesson.order_index),
+        "ix_lessons_course_order",
+    ),
+    (
+        "catalog, newest first (list_courses)",
+        select(Course).filter(Course.status == "published").order_by(Course.created_at.desc(), Course.id.desc()).limit(24),
+        "ix_courses_status_created_at",
+    ),
+    (
+        "teacher's courses (my_courses)",
+        select(Course).filter(Course.teacher_id == 1).order_by(Course.created_at.desc()),
+        "ix_courses_teacher_created_at",
+    ),
+    (
+        "existing certificate check",
+        select(Certificate).filter(Certificate.user_id == 1, Certificate.course_id == 1),
+        "uq_certificates_user_course",
+    ),
+]
+
+
+def explain(conn, statement) -> str:
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "postgresql":
+        return "\n".join(row[0] for row in conn.execute(text("EXPLAIN " + sql)))
+    return "\n".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+
+def plan_uses(plan: str, statement, index: str) -> bool:
+    if index in plan:
+        return True
+    # SQLite backs UNIQUE constraints with unnamed sqlite_autoindex_<table>_N indexes
+    table = statement.get_final_froms()[0].name
+    return engine.dialect.name == "sqlite" and index.startswith("uq_") and f"sqlite_autoindex_{table}_" in plan
+
+
+def check() -> bool:
+    ok = True
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("SET enable_seqscan = off"))
+        for description, statement, index in CHECKS:
+            plan = explain(conn, statement)
+            if plan_uses(plan, statement, index):
+                print(f"  ✅ {description}: {index}")
+            else:
+                ok = False
+                print(f"  ❌ {description}: expected {index}, plan was:")
+                print("     " + plan.replace("\n", "\n     "))
+    return ok
+
+
+if __name__ == "__main__":
+    print(f"🔎 Checking query plans on {engine.dialect.name}...")
+    sys.exit(0 if check() else 1)
@@ -0,0 +1,95 @@
+"""
+Load test for the DB_* connection pool settings.
+Usage: python scripts/db_pool_loadtest.py [--threads 50] [--seconds 10] [--query-ms 20]
+
+Runs each configuration below against DATABASE_URL with N threads that check
+out a connection, run a query lasting --query-ms (pg_sleep on PostgreSQL) and
+return it. Prints throughput, checkout wait percentiles and timeouts for each.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import create_engine, exc, text
+
+from app.config import get_settings
+from app.database import engine_options
+
+CONFIGS = [
+    ("defaults (5+10, no pre-ping)", {"DB_POOL_SIZE": 5, "DB_MAX_OVERFLOW": 10, "DB_POOL_PRE_PING": False, "DB_POOL_RECYCLE_SECONDS": -1}),
+    ("configured", {}),
+    ("pool 20+0", {"DB_POOL_SIZE": 20, "DB_MAX_OVERFLOW": 0}),
+    ("pool 20+20", {"DB_POOL_SIZE": 20, "DB_MAX_OVERFLOW": 20}),
+    ("pre-ping off", {"DB_POOL_PRE_PING": False}),
+    ("timeout 1s", {"DB_POOL_TIMEOUT_SECONDS": 1}),
+    ("pgbouncer mode (NullPool)", {"DB_PGBOUNCER_MODE": True}),
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(url: str, overrides: dict, threads: int, seconds: float, query_ms: int) -> dict:
+    config = get_settings().model_copy(update=overrides)
+    engine = create_engine(url, **engine_options(url, config))
+    is_postgres = url.startswith("postgresql")
+    query = text("SELECT pg_sleep(:s)") if is_postgres else text("SELECT 1")
+    waits: list[float] = []
+    counts = {"ok": 0, "timeouts": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    waited = time.perf_counter() - started
+                    conn.execute(query, {"s": query_ms / 1000})
+                    if not is_postgres:
+                        time.sleep(query_ms / 1000)  # hold the connection as long as a real query would
+                with lock:
+                    waits.append(waited)
+                    counts["ok"] += 1
+            except exc.TimeoutError:
+                with lock:
+                    counts["timeouts"] += 1
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    engine.dispose()
+    return {
+        "qps": counts["ok"] / seconds,
+        "p50_ms": percentile(waits, 0.50) * 1000,
+        "p99_ms": percentile(waits, 0.99) * 1000,
+        **counts,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--query-ms", type=int, default=20)
+    args = parser.parse_args()
+
+    url = get_settings().DATABASE_URL
+    print(f"📊 {args.threads} threads x {args.seconds:.0f}s, {args.query_ms} ms queries against {url.split('@')[-1]}")
+    print(f"{'config':32} {'qps':>8} {'wait p50':>9} {'wait p99':>9} {'timeouts':>9} {'errors':>7}")
+    for name, overrides in CONFIGS:
+        r = run(url, overrides, args.threads, args.seconds, args.query_ms)
+        print(f"{name:32} {r['qps']:8.0f} {r['p50_ms']:7.1f}ms {r['p99_ms']:7.1f}ms {r['timeouts']:9d} {r['errors']:7d}")
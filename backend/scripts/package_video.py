@@ -0,0 +1,29 @@
+"""
+Package a local video as HLS with the same ladder the workers use — no database or MinIO needed.
+Usage: python scripts/package_video.py sample.mp4 [output_dir]
+
+Serve the output directory (python -m http.server) and open master.m3u8 in
+Safari or VLC to check the variants.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.video_packaging import PackagingError, package_hls
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    source = sys.argv[1]
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + "_hls"
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"🎞️ Packaging {source} -> {output_dir}")
+    try:
+        manifest = package_hls(source, output_dir)
+    except PackagingError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Master playlist: {manifest}")
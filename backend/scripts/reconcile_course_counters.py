@@ -0,0 +1,34 @@
+"""
+Admin command — recomputes the denormalized course counters from the source tables.
+Run to repair drift: python scripts/reconcile_course_counters.py [course_id ...]
+
+Without arguments every course is recomputed in two bulk UPDATE statements.
+A write that commits while this runs can be missed; run it again (or for
+that course) if the numbers still look off.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services import course_stats_service
+
+
+def reconcile(course_ids=None):
+    db = SessionLocal()
+    try:
+        updated = course_stats_service.reconcile(db, course_ids)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Reconcile failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    print(f"✅ Counters recomputed for {updated} courses")
+
+
+if __name__ == "__main__":
+    print("🔢 Reconciling course counters...")
+    reconcile([int(arg) for arg in sys.argv[1:]] or None)
@@ -15,6 +15,7 @@ from sqlalchemy import inspect
 from app.database import SessionLocal, engine
 from app.models.user import User
 from app.models.category import Category
+from app.services import stats_service
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -97,6 +98,9 @@ def seed():
             else:
                 print(f"  ⏭️  Category already exists: {cat_data['name']}")
 
+        # Users are inserted directly, so rebuild the platform stats rollup
+        db.flush()
+        stats_service.reconcile(db)
         db.commit()
 
         print(f"\n🎉 Seed complete: {created['users']} users, {created['categories']} categories created")
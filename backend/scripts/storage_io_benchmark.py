@@ -0,0 +1,121 @@
+"""
+Benchmark for how blocking storage calls are run from async routes.
+Usage: python scripts/storage_io_benchmark.py [--uploads 60] [--size-mb 20] [--part-ms 100]
+
+Replaces the MinIO client with one that spends --part-ms per MINIO_UPLOAD_PART_SIZE
+part (no server needed), starts N concurrent uploads and meanwhile measures
+  - event loop lag: how late a 10 ms asyncio.sleep wakes up (async routes)
+  - sync route wait: how long a 1 ms run_in_threadpool call takes (sync routes
+    share that threadpool, 40 threads by default)
+for each way of calling upload_stream:
+  - "on the event loop": a direct call, as upload_resume used to make
+  - "run_in_threadpool": the shared threadpool, as POST /api/uploads/ used to
+  - "storage I/O pool": minio_service.upload_stream_async (MINIO_IO_WORKERS threads)
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.services import minio_service
+
+
+class SlowClient:
+    """Stands in for Minio: reads the stream part by part, sleeping part_ms per part."""
+
+    def __init__(self, part_ms: int):
+        self.part_ms = part_ms
+
+    def put_object(self, bucket_name, object_name, data, length, part_size, content_type):
+        while data.read(part_size):
+            time.sleep(self.part_ms / 1000)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def on_loop(stream, length):
+    return minio_service.upload_stream(stream, "videos", "a.mp4", "video/mp4", length)
+
+
+async def in_threadpool(stream, length):
+    return await run_in_threadpool(minio_service.upload_stream, stream, "videos", "a.mp4", "video/mp4", length)
+
+
+async def on_storage_pool(stream, length):
+    return await minio_service.upload_stream_async(stream, "videos", "a.mp4", "video/mp4", length)
+
+
+MODES = [
+    ("on the event loop", on_loop),
+    ("run_in_threadpool", in_threadpool),
+    ("storage I/O pool", on_storage_pool),
+]
+
+
+async def run(upload, uploads: int, size: int) -> dict:
+    payload = b"v" * size
+    done = asyncio.Event()
+    loop_lag: list[float] = []
+    sync_wait: list[float] = []
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            loop_lag.append(time.perf_counter() - started - 0.01)
+
+    async def sync_route():
+        while not done.is_set():
+            started = time.perf_counter()
+            await run_in_threadpool(time.sleep, 0.001)
+            sync_wait.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+
+    probes = [asyncio.create_task(ticker()), asyncio.create_task(sync_route())]
+    started = time.perf_counter()
+    await asyncio.gather(*(upload(io.BytesIO(payload), size) for _ in range(uploads)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*probes)
+    return {
+        "seconds": elapsed,
+        "lag_p50_ms": percentile(loop_lag, 0.50) * 1000,
+        "lag_max_ms": max(loop_lag, default=0.0) * 1000,
+        "sync_p50_ms": percentile(sync_wait, 0.50) * 1000,
+        "sync_max_ms": max(sync_wait, default=0.0) * 1000,
+    }
+
+
+async def main(args):
+    minio_service._client = SlowClient(args.part_ms)
+    minio_service._bucket_ready.set()
+    size = args.size_mb * 1024 * 1024
+    parts = -(-size // get_settings().MINIO_UPLOAD_PART_SIZE)
+    print(f"📊 {args.uploads} concurrent {args.size_mb} MB uploads, {parts} parts of {args.part_ms} ms each, "
+          f"MINIO_IO_WORKERS={get_settings().MINIO_IO_WORKERS}")
+    print(f"{'mode':20} {'total':>8} {'loop lag p50':>13} {'max':>9} {'sync wait p50':>14} {'max':>9}")
+    for name, upload in MODES:
+        r = await run(upload, args.uploads, size)
+        print(f"{name:20} {r['seconds']:7.2f}s {r['lag_p50_ms']:11.1f}ms {r['lag_max_ms']:7.0f}ms "
+              f"{r['sync_p50_ms']:12.1f}ms {r['sync_max_ms']:7.0f}ms")
+    minio_service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=60)
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--part-ms", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
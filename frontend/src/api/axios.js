@@ -6,6 +6,8 @@ const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || `http://${hostname}:80
 
 const api = axios.create({
   baseURL: API_BASE_URL,
+  // Send the API's cookies (it pins reads to the primary database right after a write)
+  withCredentials: true,
 });
 
 // Add JWT token to every request
@@ -46,4 +48,20 @@ api.interceptors.response.use(
   }
 );
 
+// POST that outlives the page (tab close, navigation away). Uses fetch keepalive:
+// XHR requests are cancelled on unload, and sendBeacon cannot send the token.
+export function postKeepalive(path, data) {
+  const token = localStorage.getItem('token');
+  return fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    keepalive: true,
+    credentials: 'include',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify(data),
+  }).catch(() => { });
+}
+
 export default api;
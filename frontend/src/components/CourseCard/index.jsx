@@ -1,3 +1,4 @@
+import { useState } from 'react';
 import { Link } from 'react-router-dom';
 import './index.css';
 import './light.css';
@@ -5,12 +6,40 @@ import './dark.css';
 import './mlight.css';
 import './mdark.css';
 
+const srcSet = (urls) => Object.entries(urls).map(([width, url]) => `${url} ${width}w`).join(', ');
+
+// Cards render ~360px wide; let the browser pick the smallest rendition that fits
+const CARD_SIZES = '(max-width: 640px) 100vw, 360px';
+
+function Thumbnail({ course }) {
+    // Thumbnails uploaded before renditions existed may not have them yet
+    const [renditionsFailed, setRenditionsFailed] = useState(false);
+    const renditions = course.thumbnail_renditions;
+    if (!renditions || renditionsFailed) {
+        return <img src={course.thumbnail_url} alt={course.title} loading="lazy" />;
+    }
+    return (
+        <picture>
+            <source type="image/webp" srcSet={srcSet(renditions.webp)} sizes={CARD_SIZES} />
+            <img
+                src={renditions.jpg['640']}
+                srcSet={srcSet(renditions.jpg)}
+                sizes={CARD_SIZES}
+                alt={course.title}
+                loading="lazy"
+                decoding="async"
+                onError={() => setRenditionsFailed(true)}
+            />
+        </picture>
+    );
+}
+
 export default function CourseCard({ course }) {
     return (
         <Link to={`/courses/${course.id}`} className="coursecard-root">
             <div className="coursecard-thumbnail">
                 {course.thumbnail_url ? (
-                    <img src={course.thumbnail_url} alt={course.title} />
+                    <Thumbnail course={course} />
                 ) : (
                     <div className="coursecard-placeholder">
                         <span>📚</span>
@@ -1,6 +1,6 @@
-import { useEffect, useMemo, useState } from 'react';
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import api from '../../api/axios';
+import api, { postKeepalive } from '../../api/axios';
 import { useAuth } from '../../context/AuthContext';
 import './index.css';
 import './light.css';
@@ -12,6 +12,17 @@ function isDirectVideoUrl(url) {
     return /\.(mp4|mkv|mov|webm|avi)(\?.*)?$/i.test(url || '');
 }
 
+// Browsers with native HLS (Safari, iOS, most Android) get the adaptive stream; others play the original file.
+function videoSource(lesson) {
+    if (lesson.hls_manifest_url && document.createElement('video').canPlayType('application/vnd.apple.mpegurl')) {
+        return lesson.hls_manifest_url;
+    }
+    return lesson.video_url;
+}
+
+// Watch position is buffered and sent as one batch instead of a request per timeupdate
+const PROGRESS_FLUSH_MS = 30000;
+
 function parseJson(value, fallback) {
     try {
         return value ? JSON.parse(value) : fallback;
@@ -28,6 +39,8 @@ export default function CoursePlayer() {
     const [lessons, setLessons] = useState([]);
     const [currentLesson, setCurrentLesson] = useState(null);
     const [progress, setProgress] = useState({});
+    const [positions, setPositions] = useState({});
+    const pendingEvents = useRef({});
     const [submissions, setSubmissions] = useState([]);
     const [quizAnswers, setQuizAnswers] = useState([]);
     const [submissionForm, setSubmissionForm] = useState({ submission_text: '', submission_code: '' });
@@ -54,8 +67,13 @@ export default function CoursePlayer() {
 
             api.get(`/enrollments/${enr.id}/progress`).then(p => {
                 const map = {};
-                p.data.forEach(pr => { map[pr.lesson_id] = pr.completed; });
+                const watched = {};
+                p.data.forEach(pr => {
+                    map[pr.lesson_id] = pr.completed;
+                    if (pr.position_seconds) watched[pr.lesson_id] = pr.position_seconds;
+                });
                 setProgress(map);
+                setPositions(watched);
             });
         });
     }, [courseId, hasDirectAccess, navigate]);
@@ -67,6 +85,39 @@ export default function CoursePlayer() {
         setSubmissionForm({ submission_text: '', submission_code: currentLesson.code_template || '' });
     }, [currentLesson, user]);
 
+    const flushProgress = useCallback((leavingPage = false) => {
+        const events = Object.entries(pendingEvents.current).map(([lessonId, event]) => ({ lesson_id: parseInt(lessonId), ...event }));
+        pendingEvents.current = {};
+        if (events.length === 0 || hasDirectAccess) return;
+        const batch = { course_id: parseInt(courseId), events };
+        if (leavingPage) {
+            postKeepalive('/enrollments/progress/events', batch);
+        } else {
+            api.post('/enrollments/progress/events', batch).catch(() => { });
+        }
+    }, [courseId, hasDirectAccess]);
+
+    useEffect(() => {
+        const timer = setInterval(flushProgress, PROGRESS_FLUSH_MS);
+        // The tab may be closed or discarded without an unmount: flush when it is hidden
+        const onHidden = () => {
+            if (document.visibilityState === 'hidden') flushProgress(true);
+        };
+        const onPageHide = () => flushProgress(true);
+        document.addEventListener('visibilitychange', onHidden);
+        window.addEventListener('pagehide', onPageHide);
+        return () => {
+            clearInterval(timer);
+            document.removeEventListener('visibilitychange', onHidden);
+            window.removeEventListener('pagehide', onPageHide);
+            flushProgress();
+        };
+    }, [flushProgress]);
+
+    const trackPosition = (lessonId, video) => {
+        pendingEvents.current[lessonId] = { ...pendingEvents.current[lessonId], position_seconds: Math.floor(video.currentTime) };
+    };
+
     const latestSubmission = submissions[0] || null;
     const quizPayload = useMemo(() => parseJson(currentLesson?.quiz_data, { questions: [] }), [currentLesson?.quiz_data]);
 
@@ -78,6 +129,19 @@ export default function CoursePlayer() {
         } catch { }
     };
 
+    // Autograded submissions are graded in the background; long-poll until they finish
+    const pollSubmission = async (submissionId) => {
+        for (let attempt = 0; attempt < 15; attempt++) {
+            try {
+                const res = await api.get(`/lessons/submissions/${submissionId}?wait=20`);
+                setSubmissions(prev => prev.map(s => (s.id === submissionId ? res.data : s)));
+                if (!['queued', 'grading'].includes(res.data.status)) return;
+            } catch {
+                return;
+            }
+        }
+    };
+
     const submitLesson = async () => {
         if (!currentLesson) return;
         setSubmitting(true);
@@ -91,6 +155,9 @@ export default function CoursePlayer() {
 
             const res = await api.post(`/lessons/${currentLesson.id}/submit`, payload);
             setSubmissions(prev => [res.data, ...prev]);
+            if (['queued', 'grading'].includes(res.data.status)) {
+                pollSubmission(res.data.id);
+            }
             if (!progress[currentLesson.id] && !hasDirectAccess) {
                 markComplete(currentLesson.id);
             }
@@ -141,7 +208,15 @@ export default function CoursePlayer() {
 
                         {currentLesson.content_type === 'video' && currentLesson.video_url && (
                             isDirectVideoUrl(currentLesson.video_url) ? (
-                                <video controls src={currentLesson.video_url} style={{ width: '100%', borderRadius: '16px', background: '#000' }} />
+                                <video
+                                    controls
+                                    src={videoSource(currentLesson)}
+                                    style={{ width: '100%', borderRadius: '16px', background: '#000' }}
+                                    onLoadedMetadata={e => { if (positions[currentLesson.id]) e.currentTarget.currentTime = positions[currentLesson.id]; }}
+                                    onTimeUpdate={e => trackPosition(currentLesson.id, e.currentTarget)}
+                                    onPause={e => setPositions(prev => ({ ...prev, [currentLesson.id]: e.currentTarget.currentTime }))}
+                                    onEnded={() => markComplete(currentLesson.id)}
+                                />
                             ) : (
                                 <div className="courseplayer-videocontainer">
                                     <iframe src={currentLesson.video_url} title={currentLesson.title} allowFullScreen />
@@ -15,6 +15,8 @@ export default function Courses() {
     const [categoryId, setCategoryId] = useState('');
     const [sortBy, setSortBy] = useState('newest');
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [searchParams] = useSearchParams();
 
     useEffect(() => {
@@ -23,18 +25,39 @@ export default function Courses() {
         api.get('/categories/').then(r => setCategories(r.data)).catch(() => { });
     }, [searchParams]);
 
-    useEffect(() => {
-        setLoading(true);
+    const buildParams = () => {
         const params = new URLSearchParams();
         if (search) params.set('search', search);
         if (categoryId) params.set('category_id', categoryId);
         if (sortBy) params.set('sort_by', sortBy);
-        api.get(`/courses/?${params.toString()}`)
-            .then(r => setCourses(r.data))
+        return params;
+    };
+
+    useEffect(() => {
+        setLoading(true);
+        api.get(`/courses/?${buildParams().toString()}`)
+            .then(r => {
+                setCourses(r.data.items);
+                setNextCursor(r.data.next_cursor);
+            })
             .catch(() => { })
             .finally(() => setLoading(false));
     }, [search, categoryId, sortBy]);
 
+    const loadMore = () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        const params = buildParams();
+        params.set('cursor', nextCursor);
+        api.get(`/courses/?${params.toString()}`)
+            .then(r => {
+                setCourses(prev => [...prev, ...r.data.items]);
+                setNextCursor(r.data.next_cursor);
+            })
+            .catch(() => { })
+            .finally(() => setLoadingMore(false));
+    };
+
     return (
         <div className="courses-page">
             <div className="courses-header">
@@ -50,6 +73,7 @@ export default function Courses() {
                     ))}
                 </select>
                 <select className="courses-select" value={sortBy} onChange={e => setSortBy(e.target.value)}>
+                    <option value="relevance">Best Match</option>
                     <option value="newest">Newest</option>
                     <option value="price">Price: Low to High</option>
                     <option value="rating">Top Rated</option>
@@ -65,11 +89,20 @@ export default function Courses() {
                     <p>Try adjusting your filters</p>
                 </div>
             ) : (
-                <div className="courses-grid">
-                    {courses.map(course => (
-                        <CourseCard key={course.id} course={course} />
-                    ))}
-                </div>
+                <>
+                    <div className="courses-grid">
+                        {courses.map(course => (
+                            <CourseCard key={course.id} course={course} />
+                        ))}
+                    </div>
+                    {nextCursor && (
+                        <div className="courses-loadmore">
+                            <button className="courses-loadmorebtn" onClick={loadMore} disabled={loadingMore}>
+                                {loadingMore ? 'Loading...' : 'Load more'}
+                            </button>
+                        </div>
+                    )}
+                </>
             )}
         </div>
     );
@@ -37,7 +37,7 @@ export default function Home() {
     const [placementStats, setPlacementStats] = useState(null);
 
     useEffect(() => {
-        api.get('/courses/?sort_by=rating').then(r => setFeatured(r.data.slice(0, 6))).catch(() => { });
+        api.get('/courses/?sort_by=rating&limit=6').then(r => setFeatured(r.data.items)).catch(() => { });
         api.get('/categories/').then(r => setCategories(r.data)).catch(() => { });
         api.get('/landing/stats').then(r => setStats(r.data)).catch(() => { });
         api.get('/testimonials/').then(r => setTestimonials(r.data)).catch(() => { });
@@ -60,6 +60,8 @@ export default function TeacherDashboard() {
 
     // Student & review filters
     const [selectedCourseId, setSelectedCourseId] = useState('all');
+    const [studentsPage, setStudentsPage] = useState({ items: [], next_cursor: null });
+    const [reviewsPage, setReviewsPage] = useState({ items: [], next_cursor: null });
 
     // File upload handler
     const handleFileUpload = async (file, folder, onSuccess) => {
@@ -83,11 +85,29 @@ export default function TeacherDashboard() {
         }).catch(() => setLoading(false));
     };
 
+    // Students and reviews are paginated sub-resources of the analytics endpoint
+    const fetchAnalyticsPage = (resource, setPage, cursor = null) => {
+        const params = new URLSearchParams();
+        if (selectedCourseId !== 'all') params.set('course_id', selectedCourseId);
+        if (cursor) params.set('cursor', cursor);
+        api.get(`/courses/my/analytics/${resource}?${params.toString()}`).then(r => {
+            setPage(prev => ({
+                items: cursor ? [...prev.items, ...r.data.items] : r.data.items,
+                next_cursor: r.data.next_cursor,
+            }));
+        }).catch(() => { });
+    };
+
     useEffect(() => {
         fetchAnalytics();
         api.get('/categories/').then(r => setCategories(r.data)).catch(() => { });
     }, []);
 
+    useEffect(() => {
+        if (tab === 'students') fetchAnalyticsPage('students', setStudentsPage);
+        if (tab === 'reviews') fetchAnalyticsPage('reviews', setReviewsPage);
+    }, [tab, selectedCourseId]);
+
     const handleSubmit = async (e) => {
         e.preventDefault();
         const data = { ...form, category_id: form.category_id ? parseInt(form.category_id) : null };
@@ -132,8 +152,8 @@ export default function TeacherDashboard() {
 
     // Filtered data for Students / Reviews tabs
     const filteredCourses = selectedCourseId === 'all' ? courses : courses.filter(c => c.id === parseInt(selectedCourseId));
-    const allStudents = filteredCourses.flatMap(c => c.students.map(s => ({ ...s, course_title: c.title, course_id: c.id })));
-    const allReviews = filteredCourses.flatMap(c => c.reviews.map(r => ({ ...r, course_title: c.title, course_id: c.id })));
+    const allStudents = studentsPage.items;
+    const allReviews = reviewsPage.items;
 
     return (
         <div className="teacherdash-root fade-in">
@@ -404,6 +424,11 @@ export default function TeacherDashboard() {
                                 </table>
                             </div>
                         )}
+                        {studentsPage.next_cursor && (
+                            <button className="teacherdash-actionbtn" style={{ marginTop: '0.75rem' }} onClick={() => fetchAnalyticsPage('students', setStudentsPage, studentsPage.next_cursor)}>
+                                Load more students
+                            </button>
+                        )}
                         <p style={{ marginTop: '0.75rem', fontSize: '0.85rem', color: 'var(--text-muted)' }}>
                             Showing {allStudents.length} student{allStudents.length !== 1 ? 's' : ''} across {filteredCourses.length} course{filteredCourses.length !== 1 ? 's' : ''}
                         </p>
@@ -467,7 +492,7 @@ export default function TeacherDashboard() {
                             <h2>⭐ Student Reviews</h2>
                             <select className="teacherdash-select" value={selectedCourseId} onChange={e => setSelectedCourseId(e.target.value)}>
                                 <option value="all">All Courses</option>
-                                {courses.map(c => <option key={c.id} value={c.id}>{c.title} ({c.reviews.length} reviews)</option>)}
+                                {courses.map(c => <option key={c.id} value={c.id}>{c.title} ({c.review_count} reviews)</option>)}
                             </select>
                         </div>
 
@@ -496,6 +521,11 @@ export default function TeacherDashboard() {
                                 ))}
                             </div>
                         )}
+                        {reviewsPage.next_cursor && (
+                            <button className="teacherdash-actionbtn" style={{ marginTop: '0.75rem' }} onClick={() => fetchAnalyticsPage('reviews', setReviewsPage, reviewsPage.next_cursor)}>
+                                Load more reviews
+                            </button>
+                        )}
                         <p style={{ marginTop: '0.75rem', fontSize: '0.85rem', color: 'var(--text-muted)' }}>
                             Showing {allReviews.length} review{allReviews.length !== 1 ? 's' : ''}
                         </p>